@@ -0,0 +1,203 @@
+"""
+API 并发基准：N 个并发客户端下各接口的 p50/p99 延迟
+
+用法: python benchmarks/bench_api_concurrency.py [实验数] [并发客户端数] [每个客户端的请求数] [工作进程数] [读线程数]
+
+在临时数据库中生成实验记录后以子进程启动 uvicorn，每个客户端循环发出看板的典型请求
+（列表、统计、单条、搜索、参数筛选），同时有一个写入客户端持续创建和更新实验。
+p99 超过目标值或出现错误响应时以非零状态退出。
+"""
+
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot")
+sys.path.insert(0, ROOT)
+
+from labpilot.database import ExperimentDB  # noqa: E402
+from labpilot.storage import get_storage  # noqa: E402
+
+# 默认 8 个并发客户端下的延迟目标（毫秒）：(p50, p99)
+# 单核机器上客户端与服务端共用 CPU，延迟主要是 HTTP 处理的排队时间（每个请求的数据库耗时 1~4 ms）
+TARGETS = {
+    "list": (25, 150),
+    "stats": (25, 150),
+    "single": (25, 150),
+    "search": (50, 300),
+    "param": (30, 200),
+    "write": (60, 300),
+}
+
+MODELS = ["resnet18", "resnet50", "vit_base", "bert_base", "llama7b", "unet"]
+STATUSES = ["success", "failed", "aborted", "running"]
+BATCH_SIZE = 50000
+
+
+def populate(path, count, seed=0):
+    rng = random.Random(seed)
+    db = ExperimentDB(path)
+    if db.backfill_thread is not None:
+        db.backfill_thread.join()
+    rows = []
+    for i in range(count):
+        minute = i // 60
+        command = (f"python train.py --model {rng.choice(MODELS)} --lr {rng.choice(['0.1', '0.01', '1e-4'])} "
+                   f"--batch_size {rng.choice([32, 64, 128])}")
+        rows.append((f"2025-{1 + minute // 43200 % 12:02d}-{1 + minute // 1440 % 28:02d}T"
+                     f"{minute // 60 % 24:02d}:{minute % 60:02d}:{i % 60:02d}",
+                     f"gpu{i % 16:02d}", command, rng.choice(STATUSES)))
+        if len(rows) == BATCH_SIZE:
+            db.storage.executemany(
+                "INSERT INTO experiments (start_time, server, command, status) VALUES (?, ?, ?, ?)", rows)
+            rows = []
+    if rows:
+        db.storage.executemany(
+            "INSERT INTO experiments (start_time, server, command, status) VALUES (?, ?, ?, ?)", rows)
+    # 参数表由命令解析得到，这里直接为批量写入的实验补齐
+    from labpilot.migrations import backfill_params
+    db.storage.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('params_backfill_before', ?)",
+                       (count + 1,))
+    backfill_params(db.storage)
+    get_storage(path).close_all()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(path, port, workers, readers):
+    # 服务进程在临时目录中运行，读取那里的 .labpilot.yaml
+    work_dir = os.path.dirname(path)
+    with open(os.path.join(work_dir, ".labpilot.yaml"), "w") as f:
+        f.write(f"api:\n  readers: {readers}\n")
+    env = dict(os.environ, LABPILOT_DB_PATH=path, PYTHONPATH=ROOT)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=work_dir, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn 未能启动")
+
+
+def read_requests(count, rng):
+    return [
+        ("list", "/experiments", {"limit": 50, "status": rng.choice(STATUSES + [None])}),
+        ("stats", "/experiments/stats", {}),
+        ("single", f"/experiments/{rng.randint(1, count)}", {}),
+        ("search", "/experiments", {"search": rng.choice(MODELS), "limit": 50}),
+        ("param", "/experiments", {"param": ["lr=1e-4", "batch_size>=64"], "limit": 50}),
+    ]
+
+
+async def reader(client, count, requests, latencies, errors, seed):
+    rng = random.Random(seed)
+    for _ in range(requests):
+        name, url, params = rng.choice(read_requests(count, rng))
+        params = {k: v for k, v in params.items() if v is not None}
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, params=params)
+        except httpx.HTTPError as e:
+            errors.append((name, type(e).__name__))
+            continue
+        latencies[name].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append((name, response.status_code))
+
+
+async def writer(client, latencies, errors, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = await client.post("/experiments", json={"command": "python train.py --lr 0.01"})
+            if response.status_code == 200:
+                response = await client.put(f"/experiments/{response.json()['id']}", json={"status": "success"})
+        except httpx.HTTPError as e:
+            errors.append(("write", type(e).__name__))
+            continue
+        latencies["write"].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(("write", response.status_code))
+        await asyncio.sleep(0.01)
+
+
+async def run(port, count, clients, requests):
+    latencies = {name: [] for name in TARGETS}
+    errors = []
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        write_task = asyncio.create_task(writer(client, latencies, errors, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(reader(client, count, requests, latencies, errors, seed)
+                               for seed in range(clients)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await write_task
+    return latencies, errors, elapsed
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    readers = int(sys.argv[5]) if len(sys.argv) > 5 else 8
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "labpilot.db")
+        print(f"生成 {count} 条实验记录...")
+        populate(path, count)
+        port = free_port()
+        server = start_server(path, port, workers, readers)
+        try:
+            latencies, errors, elapsed = asyncio.run(run(port, count, clients, requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{clients} 个并发客户端, {workers} 个工作进程 x {readers} 个读线程, CPU {os.cpu_count()} 核: "
+          f"{total} 个请求, {total / elapsed:.0f} req/s")
+    print(f"{'接口':<8} {'请求数':>6} {'p50 ms':>8} {'p99 ms':>8} {'目标 p50/p99':>14}  结果")
+    failed = bool(errors)
+    for name, (target_p50, target_p99) in TARGETS.items():
+        values = latencies[name]
+        if not values:
+            continue
+        p50, p99 = statistics.median(values), percentile(values, 0.99)
+        ok = p50 <= target_p50 and p99 <= target_p99
+        failed |= not ok
+        print(f"{name:<8} {len(values):>6} {p50:>8.1f} {p99:>8.1f} {target_p50:>6}/{target_p99:<7}  "
+              f"{'通过' if ok else '未达标'}")
+    if errors:
+        print(f"错误响应 {len(errors)} 个，例如 {errors[:5]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
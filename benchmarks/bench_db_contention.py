@@ -0,0 +1,149 @@
+"""
+数据库并发基准：多个 labrun 写入进程与看板轮询同时访问数据库，
+对比旧实现（每次调用新建连接、回滚日志模式）与共享存储层（线程长连接、WAL、忙重试）
+
+用法: python benchmarks/bench_db_contention.py [写入进程数] [每个进程的实验数]
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot"))
+
+from labpilot.database import ExperimentDB  # noqa: E402
+from labpilot.migrations import BASE_SCHEMA  # noqa: E402
+
+
+class LegacyDB:
+    """旧实现：每个方法打开并关闭一个连接，使用默认的回滚日志和 5 秒锁等待"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _write(self, sql, params, many=False):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if many:
+            cursor.executemany(sql, params)
+        else:
+            cursor.execute(sql, params)
+        conn.commit()
+        conn.close()
+        return cursor.lastrowid
+
+    def insert_experiment(self, command, commit_hash="", params="", status="running", commit_message=""):
+        return self._write("""
+            INSERT INTO experiments (start_time, server, command, commit_hash, commit_message, params, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (datetime.now().isoformat(), "bench", command, commit_hash, commit_message, params, status))
+
+    def insert_metrics(self, experiment_id, points):
+        self._write("INSERT OR REPLACE INTO metrics (experiment_id, name, step, value) VALUES (?, ?, ?, ?)",
+                    [(experiment_id, name, step, value) for step, name, value in points], many=True)
+
+    def update_experiment(self, experiment_id, end_time, duration, status, log_snippet, exit_code, ckpt_path=""):
+        self._write("""
+            UPDATE experiments SET end_time=?, duration=?, status=?, log_snippet=?, exit_code=?, ckpt_path=?
+            WHERE id=?
+        """, (end_time, duration, status, log_snippet, exit_code, ckpt_path, experiment_id))
+
+    def get_experiments(self, limit=100, offset=0):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT * FROM experiments ORDER BY start_time DESC LIMIT ? OFFSET ?",
+                            (limit, offset)).fetchall()
+        conn.close()
+        return rows
+
+    def get_stats(self):
+        conn = sqlite3.connect(self.db_path)
+        stats = conn.execute("SELECT status, COUNT(*) FROM experiments GROUP BY status").fetchall()
+        conn.close()
+        return stats
+
+
+def open_db(mode, db_path):
+    return LegacyDB(db_path) if mode == "legacy" else ExperimentDB(db_path)
+
+
+def writer(mode, db_path, runs, errors):
+    """模拟一个 labrun：登记实验、分批写入指标、更新结束状态"""
+    db = open_db(mode, db_path)
+    for run in range(runs):
+        try:
+            experiment_id = db.insert_experiment(f"python train.py --seed {run}", "abc1234")
+            for batch in range(10):
+                db.insert_metrics(experiment_id, [(batch * 100 + step, "loss", 1.0 / (step + 1))
+                                                  for step in range(100)])
+            db.update_experiment(experiment_id, datetime.now().isoformat(), 1.0, "success", "", 0)
+        except sqlite3.OperationalError:
+            with errors.get_lock():
+                errors.value += 1
+
+
+def poll_dashboard(mode, db_path, stop, latencies, errors):
+    """模拟看板每 20ms 刷新一次实验列表和统计"""
+    db = open_db(mode, db_path)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            db.get_experiments(limit=50)
+            db.get_stats()
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            errors[0] += 1
+        stop.wait(0.02)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000 if values else 0.0
+
+
+def run(mode, writers, runs):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "labpilot.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript(BASE_SCHEMA)
+        conn.close()
+
+        # 用 spawn 启动写入进程：与真实的 labrun 一样是独立进程，
+        # 也避免 fork 时继承看板线程持有的 SQLite 内部锁
+        context = multiprocessing.get_context("spawn")
+        errors = context.Value("i", 0)
+        stop = threading.Event()
+        latencies, read_errors = [], [0]
+        poller = threading.Thread(target=poll_dashboard, args=(mode, db_path, stop, latencies, read_errors))
+        poller.start()
+
+        start = time.perf_counter()
+        processes = [context.Process(target=writer, args=(mode, db_path, runs, errors))
+                     for _ in range(writers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        poller.join()
+
+    print(f"{mode:8} 写入 {elapsed:6.2f} s, 写入失败 {errors.value:4d} 次 | "
+          f"看板 {len(latencies):4d} 次刷新, p50 {percentile(latencies, 0.5):7.1f} ms, "
+          f"p99 {percentile(latencies, 0.99):7.1f} ms, 失败 {read_errors[0]} 次")
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{writers} 个写入进程 x {runs} 个实验（每个实验 12 次写事务），看板每 20ms 轮询")
+    run("legacy", writers, runs)
+    run("storage", writers, runs)
+
+
+if __name__ == "__main__":
+    main()
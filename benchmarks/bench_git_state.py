@@ -0,0 +1,139 @@
+"""
+Git 状态探测基准：对比旧实现逐项调用 git 与 GitState 批量探测的子进程数和耗时
+
+用法: python benchmarks/bench_git_state.py [文件数] [重复次数]
+
+在临时仓库中模拟一次 labrun 启动的 Git 操作，分为入口脚本未修改（clean）和
+入口脚本依赖有改动需要快照（dirty）两种场景。旧实现按其实际调用顺序重放 git 命令。
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot"))
+
+from labpilot import git_utils as git_utils_module  # noqa: E402
+from labpilot.git_utils import GitUtils  # noqa: E402
+
+SNAPSHOT_FILES = ["helper.py", "train.py"]
+
+# 旧实现在一次启动中执行的 git 命令（每个方法内部都会先调用 is_git_repo）
+LEGACY_CLEAN = [
+    ["git", "rev-parse", "--git-dir"], ["git", "status", "--porcelain"],                 # get_related_dirty_files
+    ["git", "rev-parse", "--git-dir"], ["git", "rev-parse", "HEAD"],                     # get_git_info
+    ["git", "log", "-1", "--pretty=%s"],
+    ["git", "rev-parse", "--git-dir"], ["git", "log", "-1", "--pretty=%B"],              # get_commit_body
+]
+
+LEGACY_DIRTY = [
+    ["git", "rev-parse", "--git-dir"], ["git", "status", "--porcelain"],                 # get_related_dirty_files
+    ["git", "rev-parse", "--git-dir"],                                                   # check_and_handle_repo
+    ["git", "rev-parse", "--git-dir"], ["git", "status", "--porcelain"],                 # is_dirty
+    ["git", "rev-parse", "--git-dir"],                                                   # auto_commit
+    ["git", "rev-parse", "--git-dir"], ["git", "status", "--porcelain"],                 # is_dirty
+    ["git", "add"] + SNAPSHOT_FILES,
+    ["git", "rev-parse", "--git-dir"], ["git", "diff", "--cached"] + SNAPSHOT_FILES,     # get_diff
+    ["git", "diff"] + SNAPSHOT_FILES,
+    ["git", "add"] + SNAPSHOT_FILES,
+    ["git", "commit", "-q", "-m", "snapshot", "--only", "--"] + SNAPSHOT_FILES,
+    ["git", "rev-parse", "--git-dir"], ["git", "rev-parse", "HEAD"],                     # get_git_info
+    ["git", "log", "-1", "--pretty=%s"],
+    ["git", "rev-parse", "--git-dir"], ["git", "rev-parse", "HEAD"],                     # get_git_info (cli)
+    ["git", "log", "-1", "--pretty=%s"],
+    ["git", "rev-parse", "--git-dir"], ["git", "log", "-1", "--pretty=%B"],              # get_commit_body
+]
+
+
+def make_repo(path, file_count):
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.email", "bench@example.com"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.name", "bench"], cwd=path, check=True)
+    for i in range(file_count):
+        directory = os.path.join(path, "pkg", f"mod{i // 500}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.py"), "w") as f:
+            f.write(f"VALUE = {i}\n")
+    with open(os.path.join(path, "train.py"), "w") as f:
+        f.write("import helper\nprint(helper.VALUE)\n")
+    with open(os.path.join(path, "helper.py"), "w") as f:
+        f.write("VALUE = 1\n")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "baseline"], cwd=path, check=True)
+
+
+def touch_helper(path, n):
+    with open(os.path.join(path, "helper.py"), "w") as f:
+        f.write(f"VALUE = {n}\n")
+
+
+def run_legacy(commands):
+    for cmd in commands:
+        subprocess.run(cmd, capture_output=True, text=True)
+    return len(commands)
+
+
+def run_gitstate(dirty):
+    git_utils = GitUtils()
+    git_utils.ai_config = {}
+    real_run = subprocess.run
+    calls = []
+
+    def counting_run(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return real_run(cmd, *args, **kwargs)
+
+    git_utils_module.subprocess.run = counting_run
+    try:
+        files = git_utils.get_related_dirty_files("train.py")
+        if dirty:
+            git_utils.check_and_handle_repo(specific_files=files)
+        git_utils.get_git_info()
+        git_utils.get_commit_body()
+    finally:
+        git_utils_module.subprocess.run = real_run
+    return len(calls)
+
+
+def measure(fn, repeats, prepare=None):
+    timings, count = [], 0
+    for i in range(repeats):
+        if prepare:
+            prepare(i)
+        start = time.perf_counter()
+        count = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return count, statistics.median(timings)
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as repo:
+        print(f"创建含 {file_count} 个文件的临时仓库...")
+        make_repo(repo, file_count)
+        os.chdir(repo)
+        try:
+            counter = iter(range(2, 1000000))
+            dirty = lambda _: touch_helper(repo, next(counter))  # noqa: E731
+
+            results = [
+                ("clean", "旧实现", measure(lambda: run_legacy(LEGACY_CLEAN), repeats)),
+                ("clean", "GitState", measure(lambda: run_gitstate(False), repeats)),
+                ("dirty", "旧实现", measure(lambda: run_legacy(LEGACY_DIRTY), repeats, dirty)),
+                ("dirty", "GitState", measure(lambda: run_gitstate(True), repeats, dirty)),
+            ]
+        finally:
+            os.chdir(old_cwd)
+
+    for scenario, name, (count, median) in results:
+        print(f"{scenario:6s} {name:10s} {count:3d} 个 git 子进程, 中位数 {median:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+导入图基准：对比逐次解析（旧实现）、冷缓存和热缓存下收集入口脚本依赖的耗时
+
+用法: python benchmarks/bench_import_graph.py [模块数]
+"""
+
+import ast
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot"))
+
+from labpilot.import_graph import ImportGraph  # noqa: E402
+
+
+def make_project(root, module_count):
+    """生成 pkg0..pkgN 下的模块，按三叉树互相导入（旧实现递归遍历，依赖链不能太深）"""
+    for i in range(module_count):
+        package = os.path.join(root, f"pkg{i // 100}")
+        os.makedirs(package, exist_ok=True)
+        init = os.path.join(package, "__init__.py")
+        if not os.path.exists(init):
+            open(init, "w").close()
+        imports = "".join(f"import pkg{j // 100}.mod{j}\n" for j in range(3 * i + 1, min(3 * i + 4, module_count)))
+        body = "".join(f"def f{k}(x):\n    return x * {k}\n" for k in range(30))
+        with open(os.path.join(package, f"mod{i}.py"), "w") as f:
+            f.write(imports + "import os\nimport numpy\n" + body)
+    with open(os.path.join(root, "train.py"), "w") as f:
+        f.write("import pkg0.mod0\n")
+
+
+def legacy_dependencies(root, script_file):
+    """旧实现：每次启动重新读取并解析所有可达模块，每个导入探测 4 个候选路径"""
+    visited, related = set(), set()
+
+    def resolve_module(module_name, base_dir):
+        parts = module_name.split('.')
+        for candidate in (os.path.join(base_dir, *parts) + '.py', os.path.join(root, *parts) + '.py',
+                          os.path.join(base_dir, *parts, '__init__.py'), os.path.join(root, *parts, '__init__.py')):
+            candidate_abs = os.path.abspath(candidate)
+            if os.path.exists(candidate_abs) and os.path.commonpath([root, candidate_abs]) == root:
+                return candidate_abs
+        return None
+
+    def visit(path):
+        abs_path = os.path.abspath(path)
+        if abs_path in visited or not os.path.exists(abs_path):
+            return
+        visited.add(abs_path)
+        related.add(os.path.relpath(abs_path, root))
+        with open(abs_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        base_dir = os.path.dirname(abs_path)
+        for node in ast.walk(tree):
+            names = []
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names.append(node.module)
+            for name in names:
+                module_path = resolve_module(name, base_dir)
+                if module_path:
+                    visit(module_path)
+
+    visit(script_file)
+    return related
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    module_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "project")
+        cache_path = os.path.join(temp_dir, "graph.json")
+        make_project(root, module_count)
+        script = os.path.join(root, "train.py")
+
+        def cached_scan():
+            graph = ImportGraph(root, cache_path)
+            related = graph.dependencies(script)
+            graph.save()
+            return related, graph.parsed_count
+
+        legacy, legacy_ms = timed(lambda: legacy_dependencies(root, script))
+        (cold, cold_parsed), cold_ms = timed(cached_scan)
+        (warm, warm_parsed), warm_ms = timed(cached_scan)
+
+        os.utime(os.path.join(root, "pkg0", "mod5.py"))
+        (_, edit_parsed), edit_ms = timed(cached_scan)
+
+    assert legacy <= cold, "新实现应至少覆盖旧实现找到的依赖"
+    print(f"{len(cold)} 个依赖文件 (CPU 核数 {os.cpu_count()})")
+    print(f"旧实现        {legacy_ms:8.1f} ms")
+    print(f"冷缓存        {cold_ms:8.1f} ms (解析 {cold_parsed} 个文件)")
+    print(f"热缓存        {warm_ms:8.1f} ms (解析 {warm_parsed} 个文件)")
+    print(f"修改时间变化  {edit_ms:8.1f} ms (解析 {edit_parsed} 个文件，内容未变时只重新计算哈希)")
+
+
+if __name__ == "__main__":
+    main()
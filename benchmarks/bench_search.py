@@ -0,0 +1,102 @@
+"""
+实验搜索基准：对比旧的 LIKE '%x%' 全表扫描与 FTS5 全文索引的查询延迟
+
+用法: python benchmarks/bench_search.py [实验数] [每个查询的重复次数]
+
+生成由常见训练命令、参数、提交信息和日志片段组成的实验记录，
+模拟看板搜索框逐字输入时发出的查询（前缀、多词、带状态过滤）。
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot"))
+
+from labpilot.database import ExperimentDB  # noqa: E402
+from labpilot.search import match_query, search_cte  # noqa: E402
+
+MODELS = ["resnet18", "resnet50", "vit_base", "vit_large", "bert_base", "llama7b", "unet", "yolov8"]
+DATASETS = ["imagenet", "cifar10", "coco", "wikitext", "librispeech", "ade20k"]
+MESSAGES = ["fix data loader", "tune learning rate", "add warmup", "try mixed precision",
+            "修复数据加载", "调整学习率", "增加数据增强"]
+LOG_LINES = ["epoch 100/100 loss 0.231 acc 0.912", "CUDA out of memory", "NaN detected in loss",
+             "saved checkpoint", "early stopping triggered", "Traceback: KeyError 'label'"]
+STATUSES = ["success", "failed", "aborted"]
+
+QUERIES = ["r", "res", "resnet", "resnet50 cifar", "out of memory", "调整学习", "lr=0.001", "nonexistent"]
+
+BATCH_SIZE = 50000
+
+
+def generate(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        model, dataset = rng.choice(MODELS), rng.choice(DATASETS)
+        lr = rng.choice(["0.1", "0.01", "0.001", "0.0003"])
+        command = f"python train.py --model {model} --data {dataset} --lr {lr} --seed {i % 97}"
+        yield ("2025-01-01T00:00:00", f"gpu{i % 16:02d}", command, f"{i:07x}", rng.choice(MESSAGES),
+               f"model={model} lr={lr}", f"/ckpt/{model}/{i}.pt", rng.choice(STATUSES), rng.choice(LOG_LINES))
+
+
+def populate(db, count):
+    start = time.perf_counter()
+    rows = generate(count)
+    while True:
+        batch = [row for _, row in zip(range(BATCH_SIZE), rows)]
+        if not batch:
+            break
+        db.storage.executemany("""
+            INSERT INTO experiments (start_time, server, command, commit_hash, commit_message,
+                                     params, ckpt_path, status, log_snippet)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, batch)
+    return time.perf_counter() - start
+
+
+def like_search(db, text, limit=100):
+    term = f"%{text}%"
+    return db.storage.query("""
+        SELECT * FROM experiments
+        WHERE command LIKE ? OR log_snippet LIKE ? OR ckpt_path LIKE ?
+        ORDER BY start_ts DESC, id DESC LIMIT ?
+    """, (term, term, term, limit))
+
+
+def fts_search(db, text, limit=100):
+    return db.storage.query(search_cte([]) + """
+        SELECT experiments.* FROM hits JOIN experiments ON experiments.id = hits.rowid
+        ORDER BY hits.score, start_ts DESC, id DESC LIMIT ?
+    """, (match_query(text), 0, limit))
+
+
+def measure(search, db, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = search(db, text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, len(rows)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = ExperimentDB(os.path.join(temp_dir, "labpilot.db"))
+        elapsed = populate(db, count)
+        print(f"{count} 个实验，写入（含索引维护）{elapsed:.1f} s")
+        print(f"{'查询':16} {'LIKE':>10} {'FTS5':>10} {'FTS5 命中':>10}")
+        for text in QUERIES:
+            like_ms, _ = measure(like_search, db, text, repeat)
+            fts_ms, hits = measure(fts_search, db, text, repeat)
+            print(f"{text:16} {like_ms:8.1f}ms {fts_ms:8.1f}ms {hits:10d}")
+        db.storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
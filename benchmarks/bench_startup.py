@@ -0,0 +1,86 @@
+"""
+启动开销基准：测量 `labrun true` 的端到端耗时（取中位数），超出预算时返回非零退出码
+
+用法: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS] [--importtime]
+
+在临时目录中运行，使用独立的数据库并关闭 Git 快照和通知，只测量 labrun 自身的开销。
+--importtime 会额外打印 `python -X importtime` 中累计耗时最高的模块。
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "labpilot")
+
+LABRUN = "import sys; from labpilot.cli import main; sys.argv = ['labrun', 'true']; main()"
+
+BENCH_CONFIG = """\
+database:
+  path: "./labpilot.db"
+git:
+  auto_snapshot: false
+notification:
+  active: []
+telemetry:
+  enabled: false
+"""
+
+
+def run_once(cwd, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", LABRUN], cwd=cwd, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def top_imports(cwd, env, limit=15):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", LABRUN], cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式: "import time: self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="labrun 启动开销基准")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_DIR, env.get("PYTHONPATH")]))
+
+    with tempfile.TemporaryDirectory() as cwd:
+        with open(os.path.join(cwd, ".labpilot.yaml"), "w", encoding="utf-8") as f:
+            f.write(BENCH_CONFIG)
+
+        # 第一次运行会创建数据库并预热 .pyc，不计入结果
+        run_once(cwd, env)
+        timings = [run_once(cwd, env) for _ in range(args.runs)]
+
+        if args.importtime:
+            print("累计导入耗时最高的模块 (ms):")
+            for cumulative_us, name in top_imports(cwd, env):
+                print(f"  {cumulative_us / 1000:8.1f}  {name}")
+
+    median = statistics.median(timings)
+    print(f"labrun true: 中位数 {median:.0f} ms, 最小 {min(timings):.0f} ms, "
+          f"最大 {max(timings):.0f} ms ({args.runs} 次), 预算 {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        print("超出启动预算")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import sqlite3
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import functools
 import os
+import threading
+import time
 from datetime import datetime
 import json
-import yaml
+
+from labpilot.config import load_config
+from labpilot.database import ExperimentDB
+from labpilot.executor import DBExecutor, Overloaded, executor_from_config
+from labpilot.log_store import LogStore, default_log_dir
+from labpilot.metrics import lttb
+from labpilot.outbox import create_worker, run_leader
+from labpilot.pagination import KEYSET_CONDITION, decode_cursor, next_cursor, offset_cursor
+from labpilot.params import filter_conditions, parse_command
+from labpilot.response_cache import DEFAULT_MAX_ENTRIES, ResponseCache
+from labpilot.search import match_query, search_cte, search_window
 
 app = FastAPI(title="LabPilot API", description="API for managing ML experiments")
 
@@ -17,11 +31,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Database configuration
 DB_PATH = os.getenv("LABPILOT_DB_PATH", "./labpilot.db")
 
+# Maximum number of log lines returned by a single request
+MAX_LOG_LINES = 10000
+
+# recent_experiments counts a rolling 24h window, so the stats ETag also rolls over this often (seconds)
+STATS_MAX_AGE = 300
+
 # Pydantic models
 class Experiment(BaseModel):
     id: int
@@ -37,6 +58,8 @@ class Experiment(BaseModel):
     status: str
     log_snippet: Optional[str] = None
     exit_code: Optional[int] = None
+    start_ts: Optional[int] = None
+    end_ts: Optional[int] = None
 
 class ExperimentCreate(BaseModel):
     command: str
@@ -51,6 +74,20 @@ class ExperimentUpdate(BaseModel):
     exit_code: Optional[int] = None
     ckpt_path: Optional[str] = None
 
+class ExperimentLog(BaseModel):
+    experiment_id: int
+    start: int
+    end: int
+    total_lines: int
+    lines: List[str]
+
+class MetricSeries(BaseModel):
+    experiment_id: int
+    name: str
+    method: str
+    total_points: int
+    points: List[List[float]]
+
 class TokenPlanConfig(BaseModel):
     provider: str
     base_url: str
@@ -61,25 +98,60 @@ class TokenPlanConfig(BaseModel):
     has_api_key: bool
     api_key_source: str
 
-def get_db_connection():
-    """Get a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # This allows us to access columns by name
-    return conn
+_experiment_db = None
+
+def get_experiment_db() -> ExperimentDB:
+    """Get the shared database handle.
+
+    It uses the same storage layer as labrun: one long-lived WAL connection per worker
+    thread with busy retries, so dashboard reads never block concurrent writers.
+    """
+    global _experiment_db
+    if _experiment_db is None:
+        _experiment_db = ExperimentDB(DB_PATH)
+    return _experiment_db
+
+_db_executor = None
+
+def get_db_executor() -> DBExecutor:
+    """Get the executor that runs database work off the event loop.
+
+    Endpoints are async and await it: reads go to a bounded pool of reader threads,
+    writes to a single writer thread in submission order (see the api config section).
+    """
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = executor_from_config(load_labpilot_config())
+    return _db_executor
+
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get the per-process cache of rendered polling responses (api.cache_entries)."""
+    global _response_cache
+    if _response_cache is None:
+        api_config = load_labpilot_config().get("api", {}) or {}
+        _response_cache = ResponseCache(int(api_config.get("cache_entries", DEFAULT_MAX_ENTRIES)))
+    return _response_cache
+
+def get_api_workers() -> int:
+    """Number of uvicorn worker processes (LABPILOT_API_WORKERS or api.workers)."""
+    api_config = load_labpilot_config().get("api", {}) or {}
+    return int(os.getenv("LABPILOT_API_WORKERS") or api_config.get("workers", 1))
 
 def load_labpilot_config():
-    """Load LabPilot config without exposing secrets."""
-    config_paths = [
-        os.path.join(os.getcwd(), ".labpilot.yaml"),
-        os.path.expanduser("~/.labpilot.yaml"),
-        os.path.join(os.path.dirname(__file__), "..", "config.yaml"),
-    ]
-
-    for path in config_paths:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f) or {}
-    return {}
+    """Load LabPilot config without exposing secrets (cached by path and mtime)."""
+    return load_config()
+
+def get_log_store() -> LogStore:
+    """Get the full-log store that labrun writes segments into."""
+    config = load_labpilot_config()
+    log_dir = (
+        os.getenv("LABPILOT_LOG_DIR")
+        or config.get("logging", {}).get("dir")
+        or default_log_dir(DB_PATH)
+    )
+    return LogStore(log_dir, get_experiment_db())
 
 def get_minimax_token_plan_config() -> TokenPlanConfig:
     """Return sanitized MiniMax token-plan configuration."""
@@ -106,37 +178,44 @@ def get_minimax_token_plan_config() -> TokenPlanConfig:
         api_key_source=api_key_source,
     )
 
-def init_db():
-    """Initialize the database with the experiments table if it doesn't exist"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS experiments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            start_time TEXT NOT NULL,
-            end_time TEXT,
-            server TEXT,
-            command TEXT NOT NULL,
-            commit_hash TEXT,
-            commit_message TEXT,
-            params TEXT,
-            ckpt_path TEXT,
-            duration REAL,
-            status TEXT,
-            log_snippet TEXT,
-            exit_code INTEGER
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
+# Initialize database on startup (creates the schema shared with labrun and applies
+# pending migrations; old rows are backfilled in the background)
+get_experiment_db()
+
+# Background notification delivery (optional, see notification.outbox.api_worker)
+_outbox_stop = threading.Event()
+
+@app.on_event("startup")
+def start_outbox_worker():
+    """Deliver queued labrun notifications from the API process when enabled."""
+    config = load_labpilot_config()
+    outbox_config = config.get("notification", {}).get("outbox", {}) or {}
+    if not outbox_config.get("api_worker", False):
+        return
+    worker = create_worker(config, get_experiment_db())
+    # With several API workers only the one holding the outbox lock delivers
+    threading.Thread(target=run_leader, args=(worker, DB_PATH, _outbox_stop),
+                     name="labpilot-outbox", daemon=True).start()
 
-# Initialize database on startup
-init_db()
+@app.on_event("shutdown")
+def stop_outbox_worker():
+    _outbox_stop.set()
+
+@app.on_event("shutdown")
+def stop_db_executor():
+    global _db_executor
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed load instead of queueing without bound when the database pools are saturated."""
+    return JSONResponse(status_code=503, content={"detail": "Server busy, retry later"},
+                        headers={"Retry-After": "1"})
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to LabPilot API", "status": "running"}
 
 @app.get("/ai/token-plan", response_model=TokenPlanConfig)
@@ -146,22 +225,55 @@ def get_ai_token_plan():
     """
     return get_minimax_token_plan_config()
 
-@app.get("/experiments", response_model=List[Experiment])
-def get_experiments(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None),
-    server: Optional[str] = Query(None),
-    search: Optional[str] = Query(None)
-):
-    """
-    Get a list of experiments with optional filtering and pagination
+def _render(content) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Proxies that compress responses may weaken the tag to W/"..."
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+async def _conditional_get(request: Request, key: Hashable,
+                           render: Callable[[], Tuple[bytes, Dict[str, str]]],
+                           max_age: Optional[int] = None) -> Response:
+    """Serve a polled GET endpoint with an ETag derived from the experiments write sequence.
+
+    An unchanged poll costs one primary-key lookup: a matching If-None-Match gets 304, and
+    a client without the tag gets the cached rendered body. The version is read before the
+    data, so a write in between can only make a cached body newer than its tag.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    version = await get_db_executor().read(get_experiment_db().get_data_version)
+    if max_age:
+        version = f"{version}-{int(time.time() // max_age)}"
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cache = get_response_cache()
+    cached = cache.get(key, version)
+    if cached is None:
+        # Querying and serializing both happen on a reader thread
+        cached = await get_db_executor().read(render)
+        cache.put(key, version, cached)
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
+
+def _list_experiments(skip: int, limit: int, status: Optional[str], server: Optional[str],
+                      search: Optional[str], cursor: Optional[str], param: List[str]):
+    """Run the list query on a reader thread; returns (JSON body, headers)."""
+    position = None
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     
     # Build the query with optional filters
-    query = "SELECT * FROM experiments"
     conditions = []
     params = []
     
@@ -173,77 +285,248 @@ def get_experiments(
         conditions.append("server = ?")
         params.append(server)
     
-    if search:
-        conditions.append("(command LIKE ? OR log_snippet LIKE ? OR ckpt_path LIKE ?)")
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term, search_term])
-    
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    
-    query += " ORDER BY start_time DESC LIMIT ? OFFSET ?"
-    params.extend([limit, skip])
+    if param:
+        try:
+            filters, values = filter_conditions(get_experiment_db().storage, param)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        conditions.extend(filters)
+        params.extend(values)
     
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
+    if search:
+        # Full-text search over the FTS5 index. Filters apply before the candidate window is
+        # cut; within a window of recent matches the best matches come first.
+        match = match_query(search)
+        if match is None:
+            return _render([]), {}
+        # Relevance order has no stable key, so search pages are addressed by offset
+        if position is not None:
+            if 'o' not in position:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            skip = position['o']
+        window_offset, offset, page_limit = search_window(skip, limit)
+        query = search_cte(conditions) + """
+            SELECT experiments.* FROM hits JOIN experiments ON experiments.id = hits.rowid
+            ORDER BY hits.score, start_ts DESC, id DESC LIMIT ? OFFSET ?
+        """
+        rows = get_experiment_db().storage.query_dicts(
+            query, [match, *params, window_offset, page_limit, offset]
+        )
+        # A page never crosses a window, so a full page means more matches may follow
+        following = offset_cursor(skip + len(rows)) if len(rows) == page_limit else None
+    else:
+        if position is not None:
+            if 't' not in position:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append(KEYSET_CONDITION)
+            params.extend([position['t'], position['i']])
+        
+        query = "SELECT experiments.* FROM experiments"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        # Served by the (status|server, start_ts, id) indexes without a sort step
+        query += " ORDER BY start_ts DESC, id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, skip])
+        
+        rows = get_experiment_db().storage.query_dicts(query, params)
+        following = next_cursor(rows, limit)
+    
+    headers = {"X-Next-Cursor": following} if following else {}
+    return _render([Experiment(**row) for row in rows]), headers
+
+@app.get("/experiments", response_model=List[Experiment])
+async def get_experiments(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[str] = Query(None),
+    server: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    param: List[str] = Query([])
+):
+    """
+    Get a list of experiments with optional filtering and pagination.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one: pages are
+    addressed by (start_ts, id), so they cost the same at any depth and stay stable while
+    new runs are inserted. `skip` keeps working for offset pagination.
+
+    `param` filters on the structured hyperparameters parsed from the command and may be
+    repeated, e.g. `?param=lr=1e-4&param=batch_size>=64` (operators: = != > >= < <=).
+    Numbers compare numerically; every filter is answered from the params indexes.
+
+    With `search`, results come in windows of the SEARCH_CANDIDATES most recent matches
+    (after filtering), each ranked by relevance; keep following X-Next-Cursor to reach
+    older matches. A page never crosses a window, so it may hold fewer than `limit` rows.
+
+    Responses carry an ETag; polls with a matching If-None-Match get 304 until an
+    experiment is written.
+    """
+    key = ("experiments", skip, limit, status, server, search, cursor, tuple(param))
+    return await _conditional_get(request, key, functools.partial(
+        _list_experiments, skip, limit, status, server, search, cursor, param
+    ))
+
+def _experiment_stats():
+    stats = get_experiment_db().get_stats()
     
-    # Convert rows to Experiment objects
-    experiments = []
-    for row in rows:
-        experiment_data = {k: row[k] for k in row.keys()}
-        experiments.append(Experiment(**experiment_data))
+    return _render({
+        **stats,
+        "last_updated": datetime.now().isoformat()
+    }), {}
+
+@app.get("/experiments/stats")
+async def get_experiment_stats(request: Request):
+    """
+    Get statistics about experiments, read from the trigger-maintained rollup table.
+    Declared before /experiments/{experiment_id} so that route does not capture it.
+
+    The ETag changes on writes and every STATS_MAX_AGE seconds, since the 24h window moves.
+    """
+    return await _conditional_get(request, ("stats",), _experiment_stats, max_age=STATS_MAX_AGE)
+
+def _get_experiment(experiment_id: int) -> Experiment:
+    row = get_experiment_db().get_experiment(experiment_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Experiment not found")
     
-    return experiments
+    return Experiment(**row)
 
 @app.get("/experiments/{experiment_id}", response_model=Experiment)
-def get_experiment(experiment_id: int):
+async def get_experiment(experiment_id: int):
     """
     Get a specific experiment by ID
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM experiments WHERE id = ?", (experiment_id,))
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row is None:
+    return await get_db_executor().read(_get_experiment, experiment_id)
+
+def _get_experiment_params(experiment_id: int):
+    db = get_experiment_db()
+    if db.get_experiment(experiment_id) is None:
         raise HTTPException(status_code=404, detail="Experiment not found")
-    
-    experiment_data = {k: row[k] for k in row.keys()}
-    return Experiment(**experiment_data)
+    return {"experiment_id": experiment_id, "params": db.get_params(experiment_id)}
 
-@app.post("/experiments", response_model=Experiment)
-def create_experiment(experiment: ExperimentCreate):
+@app.get("/experiments/{experiment_id}/params")
+async def get_experiment_params(experiment_id: int):
     """
-    Create a new experiment record
+    Get the typed hyperparameters parsed from an experiment's command
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    return await get_db_executor().read(_get_experiment_params, experiment_id)
+
+def _read_experiment_log(experiment_id: int, start: int, end: int) -> ExperimentLog:
+    log_store = get_log_store()
+    total_lines = log_store.total_lines(experiment_id)
+    if total_lines == 0:
+        raise HTTPException(status_code=404, detail="Log not found")
+
+    lines = log_store.read_lines(experiment_id, start, end)
+    return ExperimentLog(
+        experiment_id=experiment_id,
+        start=start,
+        end=start + len(lines) - 1,
+        total_lines=total_lines,
+        lines=lines,
+    )
+
+@app.get("/experiments/{experiment_id}/log", response_model=ExperimentLog)
+async def get_experiment_log(
+    experiment_id: int,
+    start: int = Query(1, ge=1),
+    end: Optional[int] = Query(None, ge=1)
+):
+    """
+    Get a range of lines (1-based, inclusive) from an experiment's full log.
+    Only the compressed segments covering the range are decompressed.
+    """
+    if end is None:
+        end = start + MAX_LOG_LINES - 1
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be >= start")
+    if end - start + 1 > MAX_LOG_LINES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOG_LINES} lines per request")
+
+    # Decompression runs on a reader thread as well
+    return await get_db_executor().read(_read_experiment_log, experiment_id, start, end)
+
+@app.get("/experiments/{experiment_id}/metrics")
+async def get_experiment_metric_names(experiment_id: int):
+    """
+    List the metrics extracted from an experiment's output with their point counts
+    """
+    metrics = await get_db_executor().read(get_experiment_db().get_metric_names, experiment_id)
+    return {"experiment_id": experiment_id, "metrics": metrics}
+
+def _get_metric_series(experiment_id: int, name: str, width: int, method: str) -> MetricSeries:
+    db = get_experiment_db()
+    total_points = db.get_metric_names(experiment_id).get(name, 0)
+    if total_points == 0:
+        raise HTTPException(status_code=404, detail="Metric not found")
+
+    if method == "minmax":
+        points = db.get_metric_series(experiment_id, name, buckets=width)
+    else:
+        points = lttb(db.get_metric_series(experiment_id, name, buckets=width * 4), width)
+
+    return MetricSeries(
+        experiment_id=experiment_id,
+        name=name,
+        method=method,
+        total_points=total_points,
+        points=[[step, value] for step, value in points],
+    )
+
+@app.get("/experiments/{experiment_id}/metrics/{name}", response_model=MetricSeries)
+async def get_experiment_metric_series(
+    experiment_id: int,
+    name: str,
+    width: int = Query(800, ge=10, le=10000),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$")
+):
+    """
+    Get a metric series downsampled on the server for a chart `width` pixels wide.
+    `minmax` keeps the min and max point of each pixel bucket (computed in SQL);
+    `lttb` pre-reduces in SQL and then applies Largest-Triangle-Three-Buckets.
+    """
+    return await get_db_executor().read(_get_metric_series, experiment_id, name, width, method)
+
+@app.get("/experiments/{experiment_id}/telemetry")
+async def get_experiment_telemetry(experiment_id: int):
+    """
+    Get the resource samples (CPU, RSS, I/O, per-GPU utilization/memory) of an experiment,
+    decoded from the compact delta-encoded chunks into one array per field
+    """
+    series = await get_db_executor().read(get_experiment_db().get_telemetry, experiment_id)
+    if not series:
+        raise HTTPException(status_code=404, detail="Telemetry not found")
+    return {"experiment_id": experiment_id, "series": series}
+
+def _create_experiment(experiment: ExperimentCreate) -> Experiment:
     current_time = datetime.now().isoformat()
+    db = get_experiment_db()
     
-    cursor.execute("""
-        INSERT INTO experiments (start_time, command, commit_hash, params, status)
-        VALUES (?, ?, ?, ?, ?)
-    """, (current_time, experiment.command, experiment.commit_hash, experiment.params, "running"))
+    with db.storage.transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO experiments (start_time, command, commit_hash, params, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (current_time, experiment.command, experiment.commit_hash, experiment.params, "running"))
+        db.set_params(cursor.lastrowid, parse_command(experiment.command))
     
     new_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
     
     # Return the created experiment
-    return get_experiment(new_id)
+    return _get_experiment(new_id)
 
-@app.put("/experiments/{experiment_id}", response_model=Experiment)
-def update_experiment(experiment_id: int, experiment_update: ExperimentUpdate):
+@app.post("/experiments", response_model=Experiment)
+async def create_experiment(experiment: ExperimentCreate):
     """
-    Update an existing experiment
+    Create a new experiment record
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    created = await get_db_executor().write(_create_experiment, experiment)
+    get_response_cache().clear()
+    return created
+
+def _update_experiment(experiment_id: int, experiment_update: ExperimentUpdate) -> Experiment:
     # Build the update query dynamically based on provided fields
     update_fields = []
     params = []
@@ -259,74 +542,52 @@ def update_experiment(experiment_id: int, experiment_update: ExperimentUpdate):
     params.append(experiment_id)
     query = f"UPDATE experiments SET {', '.join(update_fields)} WHERE id = ?"
     
-    cursor.execute(query, params)
+    cursor = get_experiment_db().storage.execute(query, params)
     
     if cursor.rowcount == 0:
-        conn.close()
         raise HTTPException(status_code=404, detail="Experiment not found")
     
-    conn.commit()
-    conn.close()
-    
-    return get_experiment(experiment_id)
+    return _get_experiment(experiment_id)
 
-@app.get("/experiments/stats")
-def get_experiment_stats():
+@app.put("/experiments/{experiment_id}", response_model=Experiment)
+async def update_experiment(experiment_id: int, experiment_update: ExperimentUpdate):
     """
-    Get statistics about experiments
+    Update an existing experiment
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Total count
-    cursor.execute("SELECT COUNT(*) as count FROM experiments")
-    total = cursor.fetchone()["count"]
-    
-    # Count by status
-    cursor.execute("SELECT status, COUNT(*) as count FROM experiments GROUP BY status")
-    status_counts = {row["status"]: row["count"] for row in cursor.fetchall()}
-    
-    # Count by server
-    cursor.execute("SELECT server, COUNT(*) as count FROM experiments WHERE server IS NOT NULL GROUP BY server")
-    server_counts = {row["server"]: row["count"] for row in cursor.fetchall()}
-    
-    # Recent experiments (last 24 hours)
-    cursor.execute("""
-        SELECT COUNT(*) as count 
-        FROM experiments 
-        WHERE start_time >= datetime('now', '-1 day')
-    """)
-    recent = cursor.fetchone()["count"]
-    
-    conn.close()
+    updated = await get_db_executor().write(_update_experiment, experiment_id, experiment_update)
+    get_response_cache().clear()
+    return updated
+
+def _delete_experiment(experiment_id: int):
+    if not get_experiment_db().delete_experiment(experiment_id):
+        raise HTTPException(status_code=404, detail="Experiment not found")
     
-    return {
-        "total_experiments": total,
-        "status_counts": status_counts,
-        "server_counts": server_counts,
-        "recent_experiments": recent,
-        "last_updated": datetime.now().isoformat()
-    }
+    # Remove the run's full log, metric series, resource samples and AI cache stats as well
+    log_store = get_log_store()
+    log_store.delete(experiment_id)
+    log_store.db.delete_metrics(experiment_id)
+    log_store.db.delete_telemetry(experiment_id)
+    log_store.db.delete_ai_cache_stats(experiment_id)
 
 @app.delete("/experiments/{experiment_id}")
-def delete_experiment(experiment_id: int):
+async def delete_experiment(experiment_id: int):
     """
     Delete an experiment (soft delete by marking as deleted)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM experiments WHERE id = ?", (experiment_id,))
-    
-    if cursor.rowcount == 0:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Experiment not found")
-    
-    conn.commit()
-    conn.close()
+    await get_db_executor().write(_delete_experiment, experiment_id)
+    get_response_cache().clear()
     
     return {"message": "Experiment deleted successfully"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Several worker processes can share the SQLite database: every process uses WAL
+    # connections with busy retries, migrations re-check the schema version under the
+    # write lock, and only one process at a time runs the outbox worker.
+    workers = get_api_workers()
+    if workers > 1:
+        # Worker processes import the app by name, so point them at the directory holding api/
+        uvicorn.run("api.main:app", host="0.0.0.0", port=8000, workers=workers,
+                    app_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
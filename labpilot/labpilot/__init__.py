@@ -6,11 +6,13 @@ LabPilot Python 包
 __version__ = "2.0.6"
 __author__ = "LabPilot Team"
 
-# 这里可以定义包级别的常量和函数
-from . import cli
-from . import database
-from . import notify
-from . import git_utils
-
 # 定义包的公共接口
 __all__ = ["cli", "database", "notify", "git_utils"]
+
+
+def __getattr__(name):
+    """按需导入子模块，避免 import labpilot 时加载 requests、sqlite3 等重量级依赖"""
+    if name in __all__:
+        import importlib
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
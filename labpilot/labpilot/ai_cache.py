@@ -0,0 +1,109 @@
+"""
+LabPilot AI 结果缓存模块
+按内容寻址缓存 AI 生成的提交信息：相同的 diff、模型、语言和提示词版本直接复用结果，
+不再请求网络；缓存存放在数据库旁的独立 SQLite 文件中，超过容量时按最近最少使用淘汰
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# 默认缓存容量
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def default_cache_path(db_path: str) -> str:
+    """缓存文件默认与实验数据库放在同一目录"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "labpilot_ai_cache.db")
+
+
+def cache_key(*parts: str) -> str:
+    """由参与生成的全部输入计算缓存键"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = str(part).encode('utf-8')
+        # 写入长度前缀，避免不同切分方式拼接出相同的内容
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class AICache:
+    """AI 结果缓存，hits / misses 记录本进程（即本次运行）的命中情况"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # 生成结果的线程与主线程共用一个连接
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        # 缓存内容可随时丢弃，不需要每次提交都落盘
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_last_used ON ai_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM ai_cache WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE ai_cache SET last_used=? WHERE key=?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        size = len(key) + len(value.encode('utf-8'))
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO ai_cache (key, value, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, value, size, now, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """总大小超过容量时删除最久未使用的条目（调用方需持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM ai_cache ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM ai_cache WHERE key=?", victims)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+
+    def summary(self) -> str:
+        return f"AI 缓存命中 {self.hits} 次, 未命中 {self.misses} 次"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -5,41 +5,16 @@ LabPilot CLI 模块
 
 import sys
 import os
+import signal
 import subprocess
-import sqlite3
 import json
 import time
 import argparse
 from datetime import datetime
-import yaml
-import requests
-import tempfile
 import re
-from .git_utils import get_git_utils
-from .notify import get_notifier
 
-
-def load_config():
-    """加载配置文件 (仅用于 CLI 初始化其他组件，通知器内部自己加载)"""
-    # 这里其实可以使用 notify.py 中的 _load_config_data 逻辑，或者保留这个为了 database 等其他模块
-    # 为了减少代码重复，最好统一，但现在我们先保持 CLI 的独立性，只需确保配置路径逻辑一致
-    config_paths = [
-        os.path.join(os.getcwd(), ".labpilot.yaml"),
-        os.path.expanduser("~/.labpilot.yaml"),
-        os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-    ]
-    
-    config = {}
-    for path in config_paths:
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            break
-    
-    if not config:
-        config = {} # 返回空字典，让各模块使用默认值
-        
-    return config
+# 配置加载统一由 config 模块负责；其余模块在使用处延迟导入，加快 labrun 启动
+from .config import load_config
 
 
 def extract_params(args):
@@ -76,6 +51,20 @@ def extract_ckpt_path(log_content):
     return ""
 
 
+def kill_process_group(process):
+    """结束实验进程及其会话中的所有子进程
+
+    只 kill 直接子进程时，仍持有输出管道的孙进程会让日志转发线程一直读不到 EOF。
+    """
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+
 def parse_memory_str(mem_str):
     """解析显存大小字符串，返回 MB 整数"""
     mem_str = str(mem_str).lower().strip()
@@ -96,50 +85,47 @@ def parse_memory_str(mem_str):
         return 0
 
 
-def get_free_gpus(min_memory_mb):
+def get_free_gpus(min_memory_mb, max_util=None):
     """获取满足显存要求的空闲 GPU 索引列表"""
+    from .gpu_monitor import get_gpu_monitor
     try:
-        # 查询所有 GPU 的剩余显存
-        result = subprocess.run(
-            ['nvidia-smi', '--query-gpu=index,memory.free', '--format=csv,noheader,nounits'],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            return []
-            
-        gpus = []
-        for line in result.stdout.strip().split('\n'):
-            if not line:
-                continue
-            idx, free_mem = line.split(',')
-            if int(free_mem) >= min_memory_mb:
-                gpus.append(int(idx))
-                
-        return gpus
-    except FileNotFoundError:
-        # 没有 nvidia-smi，可能是非 GPU 机器
-        return []
+        return get_gpu_monitor().free_gpus(min_memory_mb, max_util)
     except Exception as e:
         print(f"[WARN] 检查 GPU 状态失败: {e}")
         return []
 
 
-def wait_for_gpu(wait_arg, notifier=None, server_name="unknown", command_str="", commit_hash=""):
+def wait_for_gpu(wait_arg, notifier=None, server_name="unknown", command_str="", commit_hash="",
+                 max_util=None, stable_seconds=0, gpu_config=None):
     """等待直到有合适的 GPU 可用"""
+    from .gpu_monitor import get_gpu_monitor, DEFAULT_POLL_INTERVAL
+    
+    gpu_config = gpu_config or {}
     min_mem = parse_memory_str(wait_arg)
-    print(f"[LabPilot] 正在等待可用 GPU (要求显存 > {min_mem} MB)...")
+    requirement = f"显存 > {min_mem} MB"
+    if max_util is not None:
+        requirement += f", 利用率 <= {max_util}%"
+    if stable_seconds:
+        requirement += f", 持续 {stable_seconds}s"
+    print(f"[LabPilot] 正在等待可用 GPU ({requirement})...")
+    
+    monitor = get_gpu_monitor(
+        gpu_config.get('backend', 'auto'),
+        float(gpu_config.get('poll_interval', DEFAULT_POLL_INTERVAL))
+    )
+    if monitor.backend is None:
+        print("[WARN] 未找到 NVML 或 nvidia-smi，无法检测 GPU 状态")
     
     spinner = ['|', '/', '-', '\\']
     idx = 0
     
     while True:
-        available_gpus = get_free_gpus(min_mem)
+        # 后端每次采样都会唤醒等待，这里的超时只用于刷新等待动画
+        chosen_gpu = monitor.wait_for(min_mem, max_util=max_util,
+                                      stable_seconds=stable_seconds, timeout=1.0)
         
-        if available_gpus:
-            # 找到可用 GPU
-            chosen_gpu = available_gpus[0]
+        if chosen_gpu is not None:
+            monitor.stop()
             print(f"\n[LabPilot] 资源就绪! 使用 GPU {chosen_gpu}")
             
             # 设置环境变量
@@ -159,8 +145,6 @@ def wait_for_gpu(wait_arg, notifier=None, server_name="unknown", command_str="",
         sys.stdout.write(f"\r[LabPilot] {spinner[idx]} 暂无满足要求的空闲显卡，等待中...")
         sys.stdout.flush()
         idx = (idx + 1) % len(spinner)
-        
-        time.sleep(30)
 
 
 def main():
@@ -171,6 +155,12 @@ def main():
                         help='实验超时时间（秒），0 表示无超时，默认为配置文件中的设置')
     parser.add_argument('--wait-gpu', type=str, default=None,
                         help='等待直到有显存满足要求的显卡可用 (例如: "12g", "10240m", "any")')
+    parser.add_argument('--gpu-max-util', type=int, default=None,
+                        help='与 --wait-gpu 配合使用：GPU 利用率不超过该百分比才视为空闲')
+    parser.add_argument('--gpu-stable', type=float, default=None,
+                        help='与 --wait-gpu 配合使用：GPU 需连续满足要求的秒数，避免抢到短暂释放显存的显卡')
+    parser.add_argument('--priority', type=int, default=None,
+                        help='通过 GPU 调度器排队时的优先级，数值越大越先分配')
     parser.add_argument('command', nargs='+', 
                         help='要执行的命令及参数')
     
@@ -185,8 +175,19 @@ def main():
     default_timeout = config.get('timeout', {}).get('default', 86400)  # 默认24小时
     timeout = args.timeout if args.timeout is not None else default_timeout
     
-    # 初始化数据库连接
+    # 延迟导入：labrun --help 或参数错误时无需加载这些模块
     from .database import get_db
+    from .git_utils import get_git_utils
+    from .notify import get_notifier, send_in_background
+    from .outbox import OutboxNotifier
+    from .log_pump import LogPump
+    from .log_store import LogStore, default_log_dir, DEFAULT_COMPRESS_LEVEL
+    from .metrics import MetricExtractor
+    from .progress import ProgressReporter
+    from .scheduler import SchedulerClient, DEFAULT_SOCKET_PATH
+    from . import telemetry
+    
+    # 初始化数据库连接
     db = get_db(db_path)
     
     # 获取命令参数
@@ -196,12 +197,64 @@ def main():
     # 初始化 Git 工具
     git_utils = get_git_utils()
     
-    # 初始化通知器
-    notifier = get_notifier()
+    # 初始化通知器：默认写入数据库发件箱，由后台投递进程发送，labrun 无需等待网络
+    outbox_config = config.get('notification', {}).get('outbox', {}) or {}
+    if outbox_config.get('enabled', True):
+        from .notify import build_channel_notifiers
+        channels = [channel.name for channel in build_channel_notifiers(config)]
+        notifier = OutboxNotifier(config, db, channels, spawn=True)
+    else:
+        notifier = get_notifier()
+    
+    # 提取参数
+    params = extract_params(command)
     
     # 自动排队/等待 GPU
+    experiment_id = None
+    scheduler_client = None
     if args.wait_gpu:
-        wait_for_gpu(args.wait_gpu)
+        gpu_config = config.get('gpu', {})
+        max_util = args.gpu_max_util if args.gpu_max_util is not None else gpu_config.get('max_util')
+        stable_seconds = args.gpu_stable if args.gpu_stable is not None else gpu_config.get('stable_seconds', 0)
+        
+        scheduler_config = config.get('scheduler', {})
+        socket_path = scheduler_config.get('socket') or DEFAULT_SOCKET_PATH
+        if scheduler_config.get('enabled', True) and SchedulerClient.available(socket_path):
+            # 通过本机调度器排队，排队期间实验以 queued 状态可见
+            experiment_id = db.insert_experiment(command_str, "", params, "queued")
+            scheduler_client = SchedulerClient(socket_path)
+            priority = args.priority if args.priority is not None else scheduler_config.get('priority', 0)
+            try:
+                chosen_gpu = scheduler_client.acquire(
+                    parse_memory_str(args.wait_gpu),
+                    max_util=max_util,
+                    stable_seconds=stable_seconds,
+                    priority=priority,
+                    experiment_id=experiment_id,
+                    command=command_str,
+                    on_queued=lambda msg: print(
+                        f"[LabPilot] 已提交到 GPU 调度器 (job {msg['job_id']}, 队列位置 {msg['position']})，等待分配..."
+                    )
+                )
+            except (KeyboardInterrupt, ConnectionError) as e:
+                exit_code = 130 if isinstance(e, KeyboardInterrupt) else 1
+                db.update_experiment(
+                    experiment_id, datetime.now().isoformat(), 0, "failed",
+                    "排队时被用户中断" if exit_code == 130 else f"调度器错误: {e}", exit_code
+                )
+                print("\n[LabPilot] 已退出 GPU 排队")
+                sys.exit(exit_code)
+            
+            os.environ['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
+            os.environ['CUDA_VISIBLE_DEVICES'] = str(chosen_gpu)
+            print(f"[LabPilot] 调度器分配 GPU {chosen_gpu}，设置 CUDA_VISIBLE_DEVICES={chosen_gpu}")
+        else:
+            wait_for_gpu(
+                args.wait_gpu,
+                max_util=max_util,
+                stable_seconds=stable_seconds,
+                gpu_config=gpu_config
+            )
     
     # 尝试提取脚本文件作为特定的提交文件
     specific_files = []
@@ -217,6 +270,9 @@ def main():
         specific_files = git_utils.get_related_dirty_files(script_file)
         if specific_files:
             print(f"[LabPilot] 将只自动提交入口脚本及关联改动: {', '.join(specific_files)}")
+    else:
+        # 没有入口脚本时不会自动提交，只需读取 HEAD，无需扫描工作区
+        git_utils.set_scope([])
     
     # 自动处理 Git 快照和检查
     try:
@@ -249,9 +305,6 @@ def main():
     commit_hash, _ = git_utils.get_git_info()
     commit_message = git_utils.get_commit_body()
     
-    # 提取参数
-    params = extract_params(command)
-    
     # 获取服务器信息
     # 优先从配置中读取
     server_name = config.get('server_name')
@@ -267,88 +320,197 @@ def main():
     if not server_name:
         server_name = 'unknown'
     
-    # 插入初始实验记录
-    experiment_id = db.insert_experiment(command_str, commit_hash, params, "running")
+    # 插入初始实验记录（经调度器排队的实验已有记录，只需标记为运行中）
+    if experiment_id is None:
+        experiment_id = db.insert_experiment(command_str, commit_hash, params, "running", commit_message)
+    else:
+        db.start_experiment(experiment_id, commit_hash, commit_message)
+    
+    # 快照先以临时信息提交，AI 提交信息在后台生成，完成后附加到提交并更新实验记录
+    ai_message_thread = git_utils.start_ai_message(
+        commit_hash, lambda message: db.update_commit_message(experiment_id, message)
+    )
     
     # 发送开始通知
-    notifier.send_start_notification(server_name, command_str, commit_hash)
+    notification_config = config.get('notification', {})
+    start_notice = None
+    if isinstance(notifier, OutboxNotifier):
+        # 写入发件箱只需一次本地提交，无需后台线程
+        notifier.event(f"{experiment_id}:start").send_start_notification(server_name, command_str, commit_hash)
+    elif notification_config.get('start_async', True):
+        # 后台发送，不阻塞子进程启动
+        start_notice = send_in_background(
+            notifier.send_start_notification, server_name, command_str, commit_hash
+        )
+    else:
+        notifier.send_start_notification(server_name, command_str, commit_hash)
     
     # 执行命令
     start_epoch = time.time()
-    log_content = ""
     exit_code = 0
+    error_text = ""
+    pump = None
+    sampler = None
+    progress = None
+    
+    # 流式提取模型路径，避免在结束时对完整日志做正则扫描
+    ckpt_tracker = {'path': ""}
+    
+    def track_ckpt(line):
+        path = extract_ckpt_path(line)
+        if path:
+            ckpt_tracker['path'] = path
+    
+    # 完整日志以压缩分段形式保存到日志目录
+    logging_config = config.get('logging', {})
+    log_store = LogStore(logging_config.get('dir') or default_log_dir(db_path), db)
+    log_writer = log_store.open_writer(
+        experiment_id,
+        segment_bytes=int(logging_config.get('segment_mb', 4) * 1024 * 1024),
+        compress_level=int(logging_config.get('compress_level', DEFAULT_COMPRESS_LEVEL))
+    )
+    
+    # 流式提取训练指标，按批写入 metrics 表
+    metrics_config = config.get('metrics', {})
+    metric_extractor = None
+    if metrics_config.get('enabled', True):
+        metric_extractor = MetricExtractor(
+            patterns=metrics_config.get('patterns'),
+            step_pattern=metrics_config.get('step_pattern'),
+            sink=lambda points: db.insert_metrics(experiment_id, points),
+            batch_size=metrics_config.get('batch_size', 1000)
+        )
     
     try:
-        # 使用临时文件捕获输出
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp_log:
-            temp_log_path = temp_log.name
-            
-            # 执行命令并捕获输出
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+        # 执行命令并以原始字节块转发输出
+        # 实验进程放在独立会话中，超时或中断时可以连同它的子进程一起结束
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            start_new_session=True
+        )
+        
+        pump = LogPump(process.stdout, sinks=[log_writer])
+        pump.add_line_handler(track_ckpt)
+        if metric_extractor is not None:
+            pump.add_line_handler(metric_extractor.feed_line)
+        
+        # 运行期间的进度通知：在独立线程中从日志尾部识别进度并发送
+        progress_config = notification_config.get('progress', {}) or {}
+        if progress_config.get('enabled', True):
+            def send_progress(snapshot):
+                if isinstance(notifier, OutboxNotifier):
+                    notifier.event(f"{experiment_id}:progress:{snapshot['seq']}")
+                notifier.send_progress_notification(
+                    server_name, command_str, commit_hash, snapshot['elapsed'],
+                    snapshot['progress'], snapshot['metrics'], snapshot['tail']
+                )
             
-            # 实时读取输出并写入临时文件和标准输出
-            timed_out = False
-            while True:
-                # 检查是否超时
-                if timeout > 0:
-                    elapsed = time.time() - start_epoch
-                    if elapsed > timeout:
-                        process.kill()
-                        timed_out = True
-                        log_content += f"\n\n实验超时 ({timeout}秒) 被终止\n"
-                        break
-                
-                # 读取输出
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
-                    break
-                if line:
-                    print(line, end='')
-                    temp_log.write(line)
-                    log_content += line
-                else:
-                    # 没有输出，短暂休眠避免CPU占用过高
-                    time.sleep(0.1)
+            def latest_metrics():
+                # 复制后再遍历，转发线程可能同时更新
+                return {name: value for name, (_, value) in dict(metric_extractor.latest).items()}
             
-            # 等待进程完成
+            progress = ProgressReporter(
+                send_progress,
+                tail=pump.tail_text,
+                metrics=latest_metrics if metric_extractor is not None else None,
+                interval=float(progress_config.get('interval', 6 * 3600)),
+                min_interval=float(progress_config.get('min_interval', 1800)),
+                milestone_percent=float(progress_config.get('milestone_percent', 10)),
+                tail_lines=int(progress_config.get('tail_lines', 5)),
+                total_epochs=progress_config.get('total_epochs'),
+                epoch_pattern=progress_config.get('epoch_pattern')
+            )
+        pump.start()
+        if progress is not None:
+            progress.start()
+        
+        # 后台采样子进程树与可见 GPU 的资源占用
+        telemetry_config = config.get('telemetry', {})
+        if telemetry_config.get('enabled', True):
+            from .gpu_monitor import create_backend, GPUMonitor
+            interval = float(telemetry_config.get('interval', telemetry.DEFAULT_INTERVAL))
+            gpu_backend = create_backend(config.get('gpu', {}).get('backend', 'auto'), interval)
+            sampler = telemetry.TelemetrySampler(
+                process.pid,
+                sink=lambda seq, start, fields, count, data: db.insert_telemetry_chunk(
+                    experiment_id, seq, start, fields, count, data),
+                gpu_monitor=GPUMonitor(gpu_backend) if gpu_backend is not None else None,
+                gpu_indices=telemetry.visible_gpu_indices(),
+                interval=interval,
+                max_overhead=float(telemetry_config.get('max_overhead', telemetry.DEFAULT_MAX_OVERHEAD)),
+                chunk_samples=int(telemetry_config.get('chunk_samples', telemetry.DEFAULT_CHUNK_SAMPLES))
+            )
+            sampler.start()
+        
+        # 等待进程结束或超时
+        timed_out = False
+        try:
+            process.wait(timeout=timeout if timeout > 0 else None)
+        except subprocess.TimeoutExpired:
+            kill_process_group(process)
             process.wait()
-            exit_code = process.returncode
-            
-            if timed_out:
-                exit_code = 124  # 使用124表示超时（参考timeout命令）
+            timed_out = True
+        
+        # 子进程的后台子进程可能仍持有管道，最多再等待片刻；
+        # 未结束时转发线程仍可能写入日志，日志写入器自身加锁，之后的说明与关闭不会与之冲突
+        if not pump.join(timeout=5):
+            print("[WARN] 实验的后台子进程仍持有输出管道，之后的输出不再保证完整保存")
+        exit_code = process.returncode
+        
+        if timed_out:
+            pump.write_note(f"\n\n实验超时 ({timeout}秒) 被终止\n")
+            exit_code = 124  # 使用124表示超时（参考timeout命令）
             
     except KeyboardInterrupt:
-        if 'process' in locals() and process.poll() is None:
-            try:
-                process.kill()
-            except:
-                pass
+        if 'process' in locals():
+            # 实验进程在独立会话中收不到终端的 Ctrl+C，由这里结束整个进程组
+            kill_process_group(process)
+            process.wait()
         exit_code = 130
-        log_content += "\n\n实验被用户中断 (Ctrl+C)\n"
+        if pump is not None:
+            pump.join(timeout=1)
+            pump.write_note("\n\n实验被用户中断 (Ctrl+C)\n")
         print("\n[LabPilot] 实验被用户中断...")
         
     except Exception as e:
         exit_code = 1
-        log_content = str(e)
+        error_text = str(e)
+    
+    if progress is not None:
+        # 先停止进度通知，保证结束通知是最后一条
+        progress.stop(timeout=notification_config.get('deadline', 10))
+    
+    if sampler is not None:
+        sampler.stop()
+        print(f"[LabPilot] {sampler.summary()}")
+    
+    # 子进程已退出，立即归还 GPU 租约
+    if scheduler_client is not None:
+        scheduler_client.release()
     
     end_epoch = time.time()
     end_time = datetime.now().isoformat()
     duration = end_epoch - start_epoch
     
-    # 获取日志片段
+    log_writer.close()
+    if metric_extractor is not None:
+        metric_extractor.flush()
+    if pump is not None and pump.bytes_total:
+        print(f"[LabPilot] {pump.summary()}")
+        print(f"[LabPilot] 完整日志已保存至 {log_store.experiment_dir(experiment_id)} "
+              f"(压缩比 {log_writer.compression_ratio():.1f}x)")
+    
+    # 获取日志片段（仅来自有界的尾部缓冲区）
+    log_content = error_text or (pump.tail_text() if pump is not None else "")
     log_lines = log_content.split('\n')
     log_snippet = '\n'.join(log_lines[-config.get('logging', {}).get('max_log_lines', 20):])
     log_snippet = log_snippet[:500]  # 限制长度
     
-    # 提取模型路径
-    ckpt_path = extract_ckpt_path(log_content)
+    # 模型路径在转发过程中已逐行提取
+    ckpt_path = ckpt_tracker['path']
     
     # 确定状态
     status = "success" if exit_code == 0 else "failed"
@@ -362,6 +524,13 @@ def main():
     # 格式化时长
     duration_hms = f"{int(duration//3600)}h {int((duration%3600)//60)}m {int(duration%60)}s"
     
+    # 保证开始通知先于结束通知发出（短实验时开始通知可能仍在发送）
+    if start_notice is not None:
+        start_notice.join(timeout=notification_config.get('deadline', 10))
+    
+    if isinstance(notifier, OutboxNotifier):
+        notifier.event(f"{experiment_id}:end")
+    
     # 发送结束通知
     if exit_code == 0:
         notifier.send_success_notification(
@@ -378,9 +547,122 @@ def main():
             server_name, command_str, commit_hash, exit_code, duration_hms, error_snippet
         )
     
+    # 实验很短时 AI 提交信息可能仍在生成，有限等待其完成
+    if ai_message_thread is not None and ai_message_thread.is_alive():
+        ai_wait = config.get('git', {}).get('ai_message_wait', 60)
+        print("[LabPilot] 等待 AI 提交信息生成...")
+        ai_message_thread.join(timeout=ai_wait)
+    
+    ai_cache = git_utils.get_ai_cache(create=False)
+    if ai_cache is not None and (ai_cache.hits or ai_cache.misses):
+        db.record_ai_cache_stats(experiment_id, ai_cache.hits, ai_cache.misses)
+        print(f"[LabPilot] {ai_cache.summary()}")
+    
+    from .http_client import http_client_if_created
+    http_client = http_client_if_created()
+    if http_client is not None and http_client.stats():
+        print(f"[LabPilot] {http_client.summary()}")
+    
     # 退出码
     sys.exit(exit_code)
 
 
+def logs_main(argv=None):
+    """labpilot logs 子命令：按行号查看实验的完整日志"""
+    parser = argparse.ArgumentParser(prog='labpilot logs', description='查看实验的完整日志')
+    parser.add_argument('experiment_id', type=int, help='实验 ID')
+    parser.add_argument('--start', type=int, default=1, help='起始行号（从 1 开始）')
+    parser.add_argument('--end', type=int, default=None, help='结束行号（包含），默认到日志末尾')
+    args = parser.parse_args(argv)
+    
+    config = load_config()
+    db_path = config.get('database', {}).get('path', './labpilot.db')
+    
+    from .database import get_db
+    from .log_store import LogStore, default_log_dir
+    db = get_db(db_path)
+    log_store = LogStore(config.get('logging', {}).get('dir') or default_log_dir(db_path), db)
+    
+    for line in log_store.iter_lines(args.experiment_id, args.start, args.end):
+        print(line)
+
+
+def scheduler_main(argv=None):
+    """labpilot scheduler 子命令：在本机运行 GPU 调度守护进程，或查看队列"""
+    parser = argparse.ArgumentParser(prog='labpilot scheduler', description='本机 GPU 调度守护进程')
+    parser.add_argument('--socket', type=str, default=None, help='Unix socket 路径')
+    parser.add_argument('--status', action='store_true', help='查看排队中的任务和已分配的 GPU')
+    args = parser.parse_args(argv)
+    
+    from .gpu_monitor import get_gpu_monitor, DEFAULT_POLL_INTERVAL
+    from .scheduler import SchedulerClient, SchedulerDaemon, DEFAULT_SOCKET_PATH
+    
+    config = load_config()
+    scheduler_config = config.get('scheduler', {})
+    gpu_config = config.get('gpu', {})
+    socket_path = args.socket or scheduler_config.get('socket') or DEFAULT_SOCKET_PATH
+    
+    if args.status:
+        if not SchedulerClient.available(socket_path):
+            print(f"[LabPilot] 调度器未运行: {socket_path}")
+            sys.exit(1)
+        print(json.dumps(SchedulerClient(socket_path).status(), ensure_ascii=False, indent=2))
+        return
+    
+    monitor = get_gpu_monitor(
+        gpu_config.get('backend', 'auto'),
+        float(gpu_config.get('poll_interval', DEFAULT_POLL_INTERVAL))
+    )
+    if monitor.backend is None:
+        print("[ERROR] 未找到 NVML 或 nvidia-smi，无法启动 GPU 调度器")
+        sys.exit(1)
+    
+    daemon = SchedulerDaemon(monitor, socket_path, float(gpu_config.get('stable_seconds', 0)))
+    print(f"[LabPilot] GPU 调度器已启动: {socket_path} (后端: {monitor.backend.name})")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[LabPilot] GPU 调度器已停止")
+
+
+def outbox_main(argv=None):
+    """labpilot outbox 子命令：查看发件箱状态，或在前台持续投递通知"""
+    from .outbox import outbox_main as run_outbox
+    return run_outbox(argv)
+
+
+def stats_main(argv=None):
+    """labpilot stats 子命令：查看实验统计，或由实验表重建统计汇总表"""
+    parser = argparse.ArgumentParser(prog='labpilot stats', description='查看实验统计')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='由实验表重新生成统计汇总表（汇总表与实验表不一致时使用）')
+    args = parser.parse_args(argv)
+    
+    config = load_config()
+    from .database import get_db
+    db = get_db(config.get('database', {}).get('path', './labpilot.db'))
+    
+    if args.rebuild:
+        rows = db.rebuild_stats()
+        print(f"[LabPilot] 统计汇总表已重建: {rows} 行")
+    print(json.dumps(db.get_stats(), ensure_ascii=False, indent=2))
+
+
+# labpilot 命令支持的子命令，其余参数按 labrun 处理
+SUBCOMMANDS = {
+    'logs': logs_main,
+    'scheduler': scheduler_main,
+    'outbox': outbox_main,
+    'stats': stats_main,
+}
+
+
+def labpilot_main():
+    """labpilot 命令的入口点"""
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+    return main()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,63 @@
+"""
+LabPilot 配置模块
+CLI、通知器、Git 工具和 API 共用的配置加载逻辑，每个进程只解析一次并按路径和修改时间缓存
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+# 已解析的配置：路径 -> (mtime_ns, size, 配置)
+_config_cache: Dict[str, Tuple[int, int, dict]] = {}
+
+
+def config_paths(config_path: Optional[str] = None) -> List[str]:
+    """按优先级返回候选配置文件路径"""
+    paths = []
+    if config_path:
+        paths.append(config_path)
+    paths.extend([
+        os.path.join(os.getcwd(), ".labpilot.yaml"),
+        os.path.expanduser("~/.labpilot.yaml"),
+        os.path.join(os.path.dirname(__file__), "..", "config.yaml")
+    ])
+    return paths
+
+
+def find_config_path(config_path: Optional[str] = None) -> Optional[str]:
+    """返回第一个存在的配置文件路径"""
+    for path in config_paths(config_path):
+        if os.path.exists(path):
+            return os.path.abspath(path)
+    return None
+
+
+def load_config(config_path: Optional[str] = None) -> dict:
+    """加载配置文件，找不到时返回空字典
+
+    返回的字典在进程内共享，调用方不应修改它。
+    """
+    path = find_config_path(config_path)
+    if path is None:
+        return {}
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+
+    cached = _config_cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    import yaml  # 延迟导入，缓存命中时无需加载 yaml
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    _config_cache[path] = (stat.st_mtime_ns, stat.st_size, config)
+    return config
+
+
+def clear_config_cache():
+    """清空配置缓存（主要用于测试）"""
+    _config_cache.clear()
@@ -3,155 +3,402 @@ LabPilot 数据库模块
 处理实验数据的存储和检索
 """
 
-import sqlite3
 import os
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from .migrations import (BUMP_DATA_VERSION, RESET_STATS, backfill_stats, migrate, needs_backfill,
+                         start_backfill)
+from .pagination import KEYSET_CONDITION, decode_cursor
+from .params import INSERT_PARAMS, ParamValue, decode_value, filter_conditions, param_rows, parse_command
+from .storage import get_storage
 
 
 class ExperimentDB:
     def __init__(self, db_path: str = None):
         # 如果没有提供路径，从配置中获取或使用默认值
         if db_path is None:
-            from .cli import load_config
+            from .config import load_config
             config = load_config()
             db_path = config.get('database', {}).get('path', './labpilot.db')
         self.db_path = db_path
+        # 同一数据库文件在进程内共享按线程复用的连接
+        self.storage = get_storage(db_path)
         self.init_db()
     
     def init_db(self):
-        """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS experiments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                server TEXT,
-                command TEXT NOT NULL,
-                commit_hash TEXT,
-                commit_message TEXT,
-                params TEXT,
-                ckpt_path TEXT,
-                duration REAL,
-                status TEXT,
-                log_snippet TEXT,
-                exit_code INTEGER
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        """初始化数据库表并执行尚未应用的迁移；旧记录的时间戳在后台线程中分批回填"""
+        migrate(self.storage)
+        self.backfill_thread = None
+        if needs_backfill(self.storage):
+            self.backfill_thread = start_backfill(self.storage)
     
     def insert_experiment(self, command: str, commit_hash: str = "", 
-                         params: str = "", status: str = "running") -> int:
+                         params: str = "", status: str = "running",
+                         commit_message: str = "") -> int:
         """插入新的实验记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         start_time = datetime.now().isoformat()
         server = os.uname().nodename if hasattr(os, 'uname') else 'unknown'
         
-        cursor.execute("""
-            INSERT INTO experiments (start_time, server, command, commit_hash, params, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (start_time, server, command, commit_hash, params, status))
-        
-        experiment_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.storage.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO experiments (start_time, server, command, commit_hash, commit_message, params, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (start_time, server, command, commit_hash, commit_message, params, status))
+            # 同时写入从命令解析出的结构化超参数
+            self.set_params(cursor.lastrowid, parse_command(command))
         
-        return experiment_id
+        return cursor.lastrowid
     
     def update_experiment(self, experiment_id: int, end_time: str, duration: float, 
                          status: str, log_snippet: str, exit_code: int, 
                          ckpt_path: str = ""):
         """更新实验记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.storage.execute("""
             UPDATE experiments 
             SET end_time=?, duration=?, status=?, log_snippet=?, exit_code=?, ckpt_path=?
             WHERE id=?
         """, (end_time, duration, status, log_snippet, exit_code, ckpt_path, experiment_id))
-        
-        conn.commit()
-        conn.close()
+    
+    def start_experiment(self, experiment_id: int, commit_hash: str = "",
+                         commit_message: str = ""):
+        """将排队中的实验标记为运行中，并以实际开始运行的时间作为开始时间"""
+        self.storage.execute("""
+            UPDATE experiments SET start_time=?, commit_hash=?, commit_message=?, status='running'
+            WHERE id=?
+        """, (datetime.now().isoformat(), commit_hash, commit_message, experiment_id))
+    
+    def update_commit_message(self, experiment_id: int, commit_message: str):
+        """实验开始后补写最终的提交信息（AI 在后台生成完成时调用）"""
+        self.storage.execute("UPDATE experiments SET commit_message=? WHERE id=?",
+                             (commit_message, experiment_id))
     
     def get_experiment(self, experiment_id: int) -> Optional[Dict]:
         """获取单个实验记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM experiments WHERE id = ?", (experiment_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            columns = [
-                'id', 'start_time', 'end_time', 'server', 'command', 
-                'commit_hash', 'commit_message', 'params', 'ckpt_path', 
-                'duration', 'status', 'log_snippet', 'exit_code'
-            ]
-            return dict(zip(columns, row))
-        return None
+        rows = self.storage.query_dicts("SELECT * FROM experiments WHERE id = ?", (experiment_id,))
+        return rows[0] if rows else None
     
     def get_experiments(self, limit: int = 100, offset: int = 0, 
-                       status: Optional[str] = None) -> List[Dict]:
-        """获取实验列表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+                       status: Optional[str] = None, cursor: Optional[str] = None,
+                       param_filters: Optional[List[str]] = None) -> List[Dict]:
+        """获取实验列表，按开始时间倒序
+
+        cursor 为上一页 next_cursor() 返回的游标时从该位置之后继续读取（忽略 offset）；
+        param_filters 为超参数筛选条件，如 ["lr=1e-4", "batch_size>=64"]，全部满足才返回。
+        游标或筛选条件格式不正确时抛出 ValueError。
+        """
         query = "SELECT * FROM experiments"
+        conditions = []
         params = []
         
         if status:
-            query += " WHERE status = ?"
+            conditions.append("status = ?")
             params.append(status)
         
-        query += " ORDER BY start_time DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        if param_filters:
+            filters, values = filter_conditions(self.storage, param_filters, "id")
+            conditions.extend(filters)
+            params.extend(values)
+        
+        if cursor:
+            position = decode_cursor(cursor)
+            if 't' not in position:
+                raise ValueError(f"无效的分页游标: {cursor!r}")
+            conditions.append(KEYSET_CONDITION)
+            params.extend([position['t'], position['i']])
+            offset = 0
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
         
-        columns = [
-            'id', 'start_time', 'end_time', 'server', 'command', 
-            'commit_hash', 'commit_message', 'params', 'ckpt_path', 
-            'duration', 'status', 'log_snippet', 'exit_code'
-        ]
+        query += " ORDER BY start_ts DESC, id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
         
-        return [dict(zip(columns, row)) for row in rows]
+        return self.storage.query_dicts(query, params)
     
-    def get_stats(self) -> Dict:
-        """获取实验统计信息"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def set_params(self, experiment_id: int, params: List[Tuple[str, ParamValue]]):
+        """替换实验的结构化超参数"""
+        with self.storage.transaction() as conn:
+            conn.execute("DELETE FROM experiment_params WHERE experiment_id = ?", (experiment_id,))
+            conn.executemany(INSERT_PARAMS, param_rows(experiment_id, params))
+            conn.execute(BUMP_DATA_VERSION)
+    
+    def get_params(self, experiment_id: int) -> Dict[str, ParamValue]:
+        """获取实验的结构化超参数 {key: 带类型的值}"""
+        rows = self.storage.query("""
+            SELECT key, kind, num_value, text_value FROM experiment_params WHERE experiment_id = ?
+        """, (experiment_id,))
+        return {key: decode_value(kind, num_value, text_value) for key, kind, num_value, text_value in rows}
+    
+    def delete_experiment(self, experiment_id: int) -> bool:
+        """删除实验记录，返回记录是否存在"""
+        cursor = self.storage.execute("DELETE FROM experiments WHERE id = ?", (experiment_id,))
+        return cursor.rowcount > 0
+    
+    def insert_log_segment(self, experiment_id: int, seq: int, path: str,
+                           first_line: int, line_count: int, byte_offset: int,
+                           raw_bytes: int, stored_bytes: int):
+        """记录一个日志分段的索引"""
+        self.storage.execute("""
+            INSERT OR REPLACE INTO log_segments
+            (experiment_id, seq, path, first_line, line_count, byte_offset, raw_bytes, stored_bytes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (experiment_id, seq, path, first_line, line_count, byte_offset, raw_bytes, stored_bytes))
+    
+    def get_log_segments(self, experiment_id: int, start_line: int = 1) -> List[Dict]:
+        """获取包含 start_line（从 1 开始）及其之后的日志分段索引"""
+        # 定位包含起始行的分段，再顺序读取其后的分段
+        row = self.storage.query_one("""
+            SELECT seq FROM log_segments
+            WHERE experiment_id = ? AND first_line < ?
+            ORDER BY first_line DESC LIMIT 1
+        """, (experiment_id, start_line))
+        first_seq = row[0] if row else 0
         
-        # 总实验数
-        cursor.execute("SELECT COUNT(*) FROM experiments")
-        total = cursor.fetchone()[0]
+        return self.storage.query_dicts("""
+            SELECT seq, path, first_line, line_count, byte_offset, raw_bytes, stored_bytes
+            FROM log_segments
+            WHERE experiment_id = ? AND seq >= ?
+            ORDER BY seq
+        """, (experiment_id, first_seq))
+    
+    def delete_log_segments(self, experiment_id: int):
+        """删除实验的日志分段索引"""
+        self.storage.execute("DELETE FROM log_segments WHERE experiment_id = ?", (experiment_id,))
+    
+    def insert_metrics(self, experiment_id: int, points: List[Tuple[int, str, float]]):
+        """批量写入指标点 (step, name, value)，同一 step 重复上报时保留最后一次"""
+        if not points:
+            return
+        self.storage.executemany("""
+            INSERT OR REPLACE INTO metrics (experiment_id, name, step, value)
+            VALUES (?, ?, ?, ?)
+        """, [(experiment_id, name, step, value) for step, name, value in points])
+    
+    def get_metric_names(self, experiment_id: int) -> Dict[str, int]:
+        """获取实验的指标名称及各自的点数"""
+        return dict(self.storage.query("""
+            SELECT name, COUNT(*) FROM metrics WHERE experiment_id = ? GROUP BY name
+        """, (experiment_id,)))
+    
+    def get_metric_series(self, experiment_id: int, name: str,
+                          buckets: Optional[int] = None) -> List[Tuple[int, float]]:
+        """获取指标序列；指定 buckets 时在 SQL 中按 step 分桶，每桶只取最小值和最大值两个点"""
+        first_step, last_step, count = self.storage.query_one("""
+            SELECT MIN(step), MAX(step), COUNT(*) FROM metrics
+            WHERE experiment_id = ? AND name = ?
+        """, (experiment_id, name))
         
-        # 按状态统计
-        cursor.execute("SELECT status, COUNT(*) FROM experiments GROUP BY status")
-        status_counts = dict(cursor.fetchall())
+        if not count:
+            return []
         
-        # 按服务器统计
-        cursor.execute("SELECT server, COUNT(*) FROM experiments WHERE server IS NOT NULL GROUP BY server")
-        server_counts = dict(cursor.fetchall())
+        if not buckets or count <= buckets * 2:
+            return self.storage.query("""
+                SELECT step, value FROM metrics
+                WHERE experiment_id = ? AND name = ?
+                ORDER BY step
+            """, (experiment_id, name))
         
-        # 最近24小时实验数
-        cursor.execute("""
-            SELECT COUNT(*) FROM experiments 
-            WHERE start_time >= datetime('now', '-1 day')
-        """)
-        recent = cursor.fetchone()[0]
+        # SQLite 中与 MIN()/MAX() 同时查询的裸列取自极值所在的行
+        width = (last_step - first_step) // buckets + 1
+        points = set()
+        for func in ('MIN', 'MAX'):
+            points.update(self.storage.query(f"""
+                SELECT step, {func}(value) FROM metrics
+                WHERE experiment_id = ? AND name = ?
+                GROUP BY (step - ?) / ?
+            """, (experiment_id, name, first_step, width)))
+        
+        return sorted(points)
+    
+    def delete_metrics(self, experiment_id: int):
+        """删除实验的全部指标点"""
+        self.storage.execute("DELETE FROM metrics WHERE experiment_id = ?", (experiment_id,))
+    
+    def insert_telemetry_chunk(self, experiment_id: int, seq: int, start_time: float,
+                               fields: List[str], sample_count: int, data: bytes):
+        """写入一个资源采样数据块"""
+        self.storage.execute("""
+            INSERT OR REPLACE INTO telemetry (experiment_id, seq, start_time, fields, sample_count, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (experiment_id, seq, start_time, ','.join(fields), sample_count, data))
+    
+    def get_telemetry(self, experiment_id: int) -> Dict[str, List[int]]:
+        """读取并解码实验的全部资源采样数据，按列返回"""
+        from .telemetry import decode_chunk
         
-        conn.close()
+        rows = self.storage.query("""
+            SELECT fields, sample_count, data FROM telemetry
+            WHERE experiment_id = ? ORDER BY seq
+        """, (experiment_id,))
+        
+        series: Dict[str, List[int]] = {}
+        for fields, sample_count, data in rows:
+            fields = fields.split(',')
+            for name, column in zip(fields, decode_chunk(data, len(fields), sample_count)):
+                series.setdefault(name, []).extend(column)
+        return series
+    
+    def delete_telemetry(self, experiment_id: int):
+        """删除实验的资源采样数据"""
+        self.storage.execute("DELETE FROM telemetry WHERE experiment_id = ?", (experiment_id,))
+    
+    def record_ai_cache_stats(self, experiment_id: int, hits: int, misses: int):
+        """记录一次运行的 AI 缓存命中/未命中次数"""
+        self.storage.execute("""
+            INSERT OR REPLACE INTO ai_cache_stats (experiment_id, hits, misses)
+            VALUES (?, ?, ?)
+        """, (experiment_id, hits, misses))
+    
+    def get_ai_cache_stats(self, experiment_id: int) -> Optional[Dict[str, int]]:
+        row = self.storage.query_one(
+            "SELECT hits, misses FROM ai_cache_stats WHERE experiment_id=?", (experiment_id,)
+        )
+        if row is None:
+            return None
+        return {'hits': row[0], 'misses': row[1]}
+    
+    def delete_ai_cache_stats(self, experiment_id: int):
+        """删除实验的 AI 缓存命中统计"""
+        self.storage.execute("DELETE FROM ai_cache_stats WHERE experiment_id = ?", (experiment_id,))
+    
+    def enqueue_notification(self, dedupe_key: str, channel: str, title: str, message: str,
+                             tags: str = "", priority: str = "default") -> bool:
+        """写入一条待发送通知；相同 dedupe_key 的通知只保留一条，返回是否新写入"""
+        now = time.time()
+        cursor = self.storage.execute("""
+            INSERT OR IGNORE INTO notification_outbox
+                (dedupe_key, channel, title, message, tags, priority, next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (dedupe_key, channel, title, message, tags, priority, now, now))
+        return cursor.rowcount > 0
+    
+    def _claim(self, conn, select_sql: str, params, lease_seconds: float) -> List[Dict]:
+        """在写事务中选出通知并加租约"""
+        now = time.time()
+        cursor = conn.execute(select_sql, params)
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.executemany(
+            "UPDATE notification_outbox SET status='sending', lease_until=? WHERE id=?",
+            [(now + lease_seconds, row['id']) for row in rows]
+        )
+        return rows
+    
+    def claim_notifications(self, limit: int = 20, lease_seconds: float = 60) -> List[Dict]:
+        """领取到期的待发送通知并加租约，多个投递进程并存时同一条通知只会被一个进程领取
+
+        租约过期（投递进程中途退出）的通知会被重新领取。
+        """
+        now = time.time()
+        return self.storage.write(lambda conn: self._claim(conn, """
+            SELECT * FROM notification_outbox
+            WHERE (status = 'pending' AND next_attempt_at <= ?)
+               OR (status = 'sending' AND lease_until < ?)
+            ORDER BY id
+            LIMIT ?
+        """, (now, now, limit), lease_seconds))
+    
+    def complete_notification(self, notification_id: int):
+        """标记通知已发送"""
+        self.storage.execute("""
+            UPDATE notification_outbox
+            SET status='sent', sent_at=?, lease_until=NULL, attempts=attempts + 1
+            WHERE id=?
+        """, (time.time(), notification_id))
+    
+    def retry_notification(self, notification_id: int, next_attempt_at: Optional[float], error: str):
+        """记录一次失败的投递；next_attempt_at 为 None 时不再重试"""
+        self.storage.execute("""
+            UPDATE notification_outbox
+            SET status=?, attempts=attempts + 1, next_attempt_at=COALESCE(?, next_attempt_at),
+                lease_until=NULL, last_error=?
+            WHERE id=?
+        """, ('failed' if next_attempt_at is None else 'pending', next_attempt_at, error, notification_id))
+    
+    def defer_notifications(self, notification_ids: List[int], next_attempt_at: float):
+        """超出渠道限额的通知留待合并为汇总消息，next_attempt_at 为最早的汇总时间"""
+        self.storage.executemany("""
+            UPDATE notification_outbox
+            SET status='digest', next_attempt_at=?, lease_until=NULL
+            WHERE id=?
+        """, [(next_attempt_at, notification_id) for notification_id in notification_ids])
+    
+    def claim_digests(self, lease_seconds: float = 60) -> List[Dict]:
+        """领取到汇总时间的渠道下所有待汇总通知（以该渠道最早的一条为准）"""
+        now = time.time()
+        return self.storage.write(lambda conn: self._claim(conn, """
+            SELECT * FROM notification_outbox
+            WHERE status = 'digest' AND channel IN (
+                SELECT channel FROM notification_outbox
+                WHERE status = 'digest'
+                GROUP BY channel
+                HAVING MIN(next_attempt_at) <= ?
+            )
+            ORDER BY id
+        """, (now,), lease_seconds))
+    
+    def take_rate_token(self, channel: str, take) -> float:
+        """在写事务中读取并更新渠道的令牌桶，take(tokens, updated_at, now) 返回 (新令牌数, 等待秒数)"""
+        def update(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM notification_rate_limits WHERE channel=?", (channel,)
+            ).fetchone()
+            tokens, wait = take(row[0] if row else None, row[1] if row else None, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO notification_rate_limits (channel, tokens, updated_at) VALUES (?, ?, ?)",
+                (channel, tokens, now)
+            )
+            return wait
+        return self.storage.write(update)
+    
+    def get_outbox_stats(self) -> Dict:
+        """各状态的通知数量，以及最早一条待发送通知的计划时间"""
+        counts = dict(self.storage.query("SELECT status, COUNT(*) FROM notification_outbox GROUP BY status"))
+        next_attempt_at = self.storage.query_one("""
+            SELECT MIN(next_attempt_at) FROM notification_outbox
+            WHERE status IN ('pending', 'sending', 'digest')
+        """)[0]
+        
+        return {
+            'pending': counts.get('pending', 0) + counts.get('sending', 0) + counts.get('digest', 0),
+            'digest': counts.get('digest', 0),
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0),
+            'next_attempt_at': next_attempt_at,
+        }
+    
+    def get_data_version(self) -> str:
+        """实验表的版本号，任何进程插入、更新或删除实验后都会变化（一次主键查询）"""
+        return self.storage.query_one("""
+            SELECT (SELECT value FROM schema_meta WHERE key = 'instance') || '-' ||
+                   (SELECT value FROM schema_meta WHERE key = 'data_version')
+        """)[0]
+    
+    def get_stats(self) -> Dict:
+        """获取实验统计信息（读取由触发器维护的汇总表，耗时与实验数无关）"""
+        total = 0
+        status_counts: Dict[Optional[str], int] = {}
+        server_counts: Dict[str, int] = {}
+        for status, server, count in self.storage.query("SELECT status, server, count FROM experiment_stats"):
+            total += count
+            status = status or None
+            status_counts[status] = status_counts.get(status, 0) + count
+            if server:
+                server_counts[server] = server_counts.get(server, 0) + count
+        
+        # 最近24小时实验数：完整落在窗口内的小时直接累加，窗口起点所在的小时按 start_ts 精确计数
+        cutoff = int((time.time() - 86400) * 1000)
+        cutoff_hour = cutoff // 3600000
+        recent = self.storage.query_one(
+            "SELECT COALESCE(SUM(count), 0) FROM experiment_stats_hourly WHERE hour > ?", (cutoff_hour,)
+        )[0]
+        recent += self.storage.query_one(
+            "SELECT COUNT(*) FROM experiments WHERE start_ts >= ? AND start_ts < ?",
+            (cutoff, (cutoff_hour + 1) * 3600000)
+        )[0]
         
         return {
             'total_experiments': total,
@@ -159,6 +406,20 @@ class ExperimentDB:
             'server_counts': server_counts,
             'recent_experiments': recent
         }
+    
+    def rebuild_stats(self) -> int:
+        """由实验表重新生成统计汇总表，返回汇总行数
+
+        分批累加，每批是一个短写事务，重建期间其他进程可以正常写入（统计值逐步补全）。
+        """
+        def reset(conn):
+            for statement in RESET_STATS:
+                conn.execute(statement)
+        self.storage.write(reset)
+        backfill_stats(self.storage, pause=0)
+        return self.storage.query_one("""
+            SELECT (SELECT COUNT(*) FROM experiment_stats) + (SELECT COUNT(*) FROM experiment_stats_hourly)
+        """)[0]
 
 
 # 全局数据库实例
@@ -170,4 +431,4 @@ def get_db(db_path: str = "./labpilot.db") -> ExperimentDB:
     global _db_instance
     if _db_instance is None:
         _db_instance = ExperimentDB(db_path)
-    return _db_instance
\ No newline at end of file
+    return _db_instance
@@ -0,0 +1,75 @@
+"""
+LabPilot 数据库执行器
+API 的异步接口不在事件循环上访问 SQLite：读操作交给固定大小的读线程池，
+写操作进入只有一个线程的写队列按顺序执行；排队的请求超过上限时立即拒绝，而不是无限堆积
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+# 每个进程的读线程数（WAL 模式下多个读连接互不阻塞）
+DEFAULT_READERS = 8
+
+# 每个进程同时排队和执行中的数据库请求上限
+DEFAULT_MAX_PENDING = 256
+
+
+class Overloaded(Exception):
+    """排队的数据库请求已达上限"""
+
+
+class DBExecutor:
+    """有界读线程池 + 单写线程
+
+    - 读线程各自持有 Storage 的线程本地连接，慢查询最多占用 readers 个线程，
+      不会阻塞事件循环上的其他请求
+    - 同一进程内的写操作在唯一的写线程上串行执行，进程内不会互相争抢写锁；
+      与其他进程（labrun、其他 API 工作进程）之间仍由 BEGIN IMMEDIATE 和忙重试协调
+    - 排队加执行中的请求超过 max_pending 时抛出 Overloaded，由 API 返回 503
+    """
+
+    def __init__(self, readers: int = DEFAULT_READERS, max_pending: int = DEFAULT_MAX_PENDING):
+        self.readers = readers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._read_pool = ThreadPoolExecutor(readers, thread_name_prefix='labpilot-db-read')
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix='labpilot-db-write')
+
+    async def read(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在读线程池中执行只读操作"""
+        return await self._submit(self._read_pool, func, args, kwargs)
+
+    async def write(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在写线程中执行写操作，同一进程的写操作按提交顺序执行"""
+        return await self._submit(self._write_pool, func, args, kwargs)
+
+    async def _submit(self, pool: ThreadPoolExecutor, func, args, kwargs):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise Overloaded(f"数据库请求排队已达上限 ({self.max_pending})")
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        self._read_pool.shutdown(wait=wait)
+        self._write_pool.shutdown(wait=wait)
+
+
+def executor_from_config(config: Optional[dict]) -> DBExecutor:
+    """按配置文件中的 api 段创建执行器"""
+    api_config = (config or {}).get('api', {}) or {}
+    return DBExecutor(
+        readers=int(api_config.get('readers', DEFAULT_READERS)),
+        max_pending=int(api_config.get('max_pending', DEFAULT_MAX_PENDING)),
+    )
@@ -5,39 +5,197 @@ LabPilot Git 工具模块
 
 import subprocess
 import os
-import yaml
-import requests
 import json
-import ast
-from typing import Tuple, Optional, List, Set
+import re
+import threading
+from typing import Callable, Dict, Tuple, Optional, List, Set
 
 import time
 
+from .ai_cache import cache_key
+from .config import load_config
+
+
+# 提示词版本，修改提示词后递增，使旧的缓存结果失效
+PROMPT_VERSION = 2
+
+# 小 diff 直接生成提交信息
+COMMIT_PROMPT = """
+        {lang_instruction}
+        请根据以下入口脚本及其关联脚本的 git diff，生成一个简洁明了的 git commit message。
+        格式要求：
+        1. 第一行：简短总结，不超过 50 个字符，建议使用 conventional commit 风格
+        2. 第二行：空行
+        3. 第三行开始：总结脚本行为或实验逻辑的关键变动
+        
+        代码变动：
+        {diff}
+        """
+
+# 大 diff 的 map 阶段：总结单个文件（或其中一段 hunk）的改动
+CHUNK_PROMPT = """
+        {lang_instruction}
+        以下是文件 {path} 的一段 git diff，请用一到两句话总结其中脚本行为或实验逻辑的变动，不要输出其他内容。
+        
+        代码变动：
+        {diff}
+        """
+
+# 大 diff 的 reduce 阶段：合并各文件的总结
+REDUCE_PROMPT = """
+        {lang_instruction}
+        以下是本次改动中各文件的变动总结，请据此生成一个简洁明了的 git commit message。
+        格式要求：
+        1. 第一行：简短总结，不超过 50 个字符，建议使用 conventional commit 风格
+        2. 第二行：空行
+        3. 第三行开始：总结脚本行为或实验逻辑的关键变动
+        
+        各文件变动：
+        {summaries}
+        """
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计 token 数（代码约每 4 个字符一个 token）"""
+    return len(text) // 4 + 1
+
+
+def split_diff(diff: str, max_chars: int) -> List[Tuple[str, str]]:
+    """把 diff 按文件切分，超长文件再按 hunk 切分，返回 [(文件路径, 切块)]
+
+    每个 hunk 切块都带上文件头；单个 hunk 仍超长时截断。
+    """
+    files = []
+    for block in re.split(r'(?m)^(?=diff --git )', diff):
+        if not block.strip():
+            continue
+        header_match = re.match(r'diff --git a/(.*?) b/(.*)', block)
+        path = header_match.group(2) if header_match else "unknown"
+        files.append((path, block))
+
+    chunks = []
+    for path, block in files:
+        if len(block) <= max_chars:
+            chunks.append((path, block))
+            continue
+        parts = re.split(r'(?m)^(?=@@ )', block)
+        header, hunks = parts[0], parts[1:]
+        current = ""
+        for hunk in hunks or [block[len(header):]]:
+            if len(hunk) + len(header) > max_chars:
+                hunk = hunk[:max(max_chars - len(header), 0)] + "\n... (truncated)\n"
+            if current and len(header) + len(current) + len(hunk) > max_chars:
+                chunks.append((path, header + current))
+                current = ""
+            current += hunk
+        if current or not hunks:
+            chunks.append((path, header + current))
+    return chunks
+
+
+# 排除所有路径的 pathspec：只读取 HEAD 信息时让 git status 跳过工作区扫描
+HEAD_ONLY_PATHSPEC = [':(exclude,top)*']
+
+
+class GitState:
+    """一次启动内的 Git 状态快照
+
+    由一次 `git status --porcelain=v2 --branch -z`（可按 pathspec 限定范围）
+    加一次 `git log -1` 构成，取代原先分散在各方法中的十来次 git 调用。
+    """
+
+    def __init__(self, is_repo: bool, head: Optional[str] = None, branch: Optional[str] = None,
+                 message: str = "", dirty_files: Optional[List[str]] = None):
+        self.is_repo = is_repo
+        self.head = head
+        self.branch = branch
+        self.message = message
+        self.dirty_files = dirty_files or []
+
+    @property
+    def subject(self) -> str:
+        return self.message.split('\n', 1)[0].strip()
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.dirty_files)
+
+    @classmethod
+    def probe(cls, pathspec: Optional[List[str]] = None, cwd: Optional[str] = None) -> 'GitState':
+        """读取 Git 状态；pathspec 为 None 时扫描整个工作区"""
+        cwd = cwd or os.getcwd()
+        cmd = ['git', 'status', '--porcelain=v2', '--branch', '-z']
+        if pathspec:
+            cmd.extend(['--untracked-files=all', '--'])
+            cmd.extend(pathspec)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd)
+        except Exception:
+            return cls(False)
+        if result.returncode != 0:
+            return cls(False)
+
+        head, branch, dirty_files = cls._parse_status(result.stdout)
+
+        message = ""
+        if head:
+            try:
+                result = subprocess.run(
+                    ['git', 'log', '-1', '--pretty=%B', head],
+                    capture_output=True,
+                    text=True,
+                    cwd=cwd
+                )
+                if result.returncode == 0:
+                    message = result.stdout.strip()
+            except Exception:
+                pass
+
+        return cls(True, head, branch, message, dirty_files)
+
+    @staticmethod
+    def _parse_status(output: str) -> Tuple[Optional[str], Optional[str], List[str]]:
+        head = branch = None
+        files = []
+        fields = output.split('\0')
+        i = 0
+        while i < len(fields):
+            entry = fields[i]
+            i += 1
+            if not entry:
+                continue
+            if entry.startswith('# branch.oid '):
+                oid = entry[len('# branch.oid '):]
+                head = None if oid == '(initial)' else oid
+            elif entry.startswith('# branch.head '):
+                branch = entry[len('# branch.head '):]
+            elif entry.startswith('1 '):
+                files.append(entry.split(' ', 8)[8])
+            elif entry.startswith('2 '):
+                files.append(entry.split(' ', 9)[9])
+                i += 1  # 重命名条目后紧跟原路径
+            elif entry.startswith('u '):
+                files.append(entry.split(' ', 10)[10])
+            elif entry.startswith('? '):
+                files.append(entry[2:])
+        return head, branch, [path.replace('\\', '/') for path in files]
+
+
 class GitUtils:
     def __init__(self, config_path: Optional[str] = None):
         self.config = self._load_config(config_path)
         self.git_config = self.config.get('git', {})
         self.ai_config = self.config.get('ai', {})
+        # 异步模式下，已提交临时快照、等待 AI 生成提交信息的 diff
+        self.pending_ai_diff = None
+        # Git 状态只关心的路径范围（入口脚本的依赖集合），None 表示整个工作区
+        self.scope: Optional[List[str]] = None
+        self._states = {}
+        self._ai_cache = None
 
     def _load_config(self, config_path: Optional[str] = None):
         """加载配置文件"""
-        config_paths = []
-        
-        if config_path:
-            config_paths.append(config_path)
-        
-        config_paths.extend([
-            os.path.join(os.getcwd(), ".labpilot.yaml"),
-            os.path.expanduser("~/.labpilot.yaml"),
-            os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-        ])
-        
-        config = {}
-        for path in config_paths:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                break
+        config = load_config(config_path)
         
         # 设置默认值
         if not config:
@@ -50,156 +208,69 @@ class GitUtils:
         
         return config
     
+    def get_state(self) -> GitState:
+        """返回当前范围内的 Git 状态，同一次启动内缓存，直到提交后失效"""
+        key = None if self.scope is None else tuple(self.scope)
+        state = self._states.get(key)
+        if state is None:
+            pathspec = self.scope
+            if pathspec is not None:
+                pathspec = [f':(literal){path}' for path in pathspec] or HEAD_ONLY_PATHSPEC
+            state = GitState.probe(pathspec)
+            self._states[key] = state
+        return state
+
+    def set_scope(self, paths: Optional[List[str]]):
+        """限定后续 Git 状态查询的路径范围；空列表表示只关心 HEAD"""
+        self.scope = None if paths is None else sorted(paths)
+
+    def invalidate_state(self):
+        self._states.clear()
+
     def is_git_repo(self) -> bool:
         """检查当前目录是否为 Git 仓库"""
-        try:
-            result = subprocess.run(
-                ['git', 'rev-parse', '--git-dir'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return self.get_state().is_repo
     
     def get_git_info(self) -> Tuple[str, str]:
         """获取 Git 信息 (commit_hash, commit_message)"""
-        if not self.is_git_repo():
+        state = self.get_state()
+        if not state.is_repo:
             return "not-a-git-repo", "not-a-git-repo"
-        
-        try:
-            # 获取当前 commit hash
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            commit_hash = result.stdout.strip() if result.returncode == 0 else "unknown"
-            
-            # 获取 commit message
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=%s'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            commit_message = result.stdout.strip() if result.returncode == 0 else "unknown"
-            
-            return commit_hash, commit_message
-        except Exception:
-            return "unknown", "unknown"
+        return state.head or "unknown", state.subject or "unknown"
     
     def is_dirty(self) -> bool:
-        """检查 Git 仓库是否有未提交的更改"""
-        if not self.is_git_repo():
-            return False
-        
-        try:
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            return len(result.stdout.strip()) > 0
-        except Exception:
-            return False
+        """检查 Git 仓库（当前范围内）是否有未提交的更改"""
+        state = self.get_state()
+        return state.is_repo and state.is_dirty
 
     def get_dirty_files(self) -> List[str]:
-        """获取当前 Git 工作区中有改动的文件路径。"""
-        if not self.is_git_repo():
-            return []
-
-        try:
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            if result.returncode != 0:
-                return []
-
-            files = []
-            for line in result.stdout.splitlines():
-                if not line.strip():
-                    continue
-                path = line[3:].strip()
-                if ' -> ' in path:
-                    path = path.split(' -> ', 1)[1].strip()
-                if path:
-                    files.append(path.replace('\\', '/'))
-            return files
-        except Exception:
-            return []
+        """获取当前 Git 工作区（当前范围内）中有改动的文件路径。"""
+        return list(self.get_state().dirty_files)
 
     def get_related_dirty_files(self, script_file: str) -> List[str]:
-        """只返回入口脚本及其本地 Python 依赖中已修改的文件。"""
-        dirty_files = set(self.get_dirty_files())
-        if not dirty_files:
-            return []
+        """只返回入口脚本及其本地 Python 依赖中已修改的文件。
 
+        之后的 Git 状态查询都限定在该依赖集合内，大仓库中无需扫描整个工作区。
+        """
         related_files = self._collect_local_python_dependencies(script_file)
         related_files.add(os.path.relpath(script_file, os.getcwd()).replace('\\', '/'))
+        self.set_scope(related_files)
+
+        dirty_files = set(self.get_dirty_files())
         return sorted(path for path in related_files if path in dirty_files)
 
     def _collect_local_python_dependencies(self, script_file: str) -> Set[str]:
-        """静态解析入口脚本导入的本地 Python 文件。"""
-        root = os.getcwd()
-        visited = set()
-        related = set()
-
-        def relpath(path: str) -> str:
-            return os.path.relpath(path, root).replace('\\', '/')
-
-        def resolve_module(module_name: str, base_dir: str) -> Optional[str]:
-            if not module_name:
-                return None
-
-            parts = module_name.split('.')
-            candidates = [
-                os.path.join(base_dir, *parts) + '.py',
-                os.path.join(root, *parts) + '.py',
-                os.path.join(base_dir, *parts, '__init__.py'),
-                os.path.join(root, *parts, '__init__.py'),
-            ]
-            root_abs = os.path.abspath(root)
-            for candidate in candidates:
-                candidate_abs = os.path.abspath(candidate)
-                if os.path.exists(candidate_abs) and os.path.commonpath([root_abs, candidate_abs]) == root_abs:
-                    return candidate_abs
-            return None
+        """静态解析入口脚本导入的本地 Python 文件（解析结果持久化缓存，只重新解析变化的文件）。"""
+        from .import_graph import ImportGraph, default_cache_path
 
-        def visit(path: str):
-            abs_path = os.path.abspath(path)
-            if abs_path in visited or not abs_path.endswith('.py') or not os.path.exists(abs_path):
-                return
-
-            visited.add(abs_path)
-            related.add(relpath(abs_path))
-
-            try:
-                with open(abs_path, 'r', encoding='utf-8') as f:
-                    tree = ast.parse(f.read())
-            except Exception:
-                return
-
-            base_dir = os.path.dirname(abs_path)
-            for node in ast.walk(tree):
-                module_names = []
-                if isinstance(node, ast.Import):
-                    module_names.extend(alias.name for alias in node.names)
-                elif isinstance(node, ast.ImportFrom) and node.module:
-                    module_names.append(node.module)
-
-                for module_name in module_names:
-                    module_path = resolve_module(module_name, base_dir)
-                    if module_path:
-                        visit(module_path)
+        root = os.getcwd()
+        cache_path = None
+        if self.git_config.get('import_cache', True):
+            cache_path = default_cache_path(root, self.git_config.get('import_cache_dir'))
 
-        visit(script_file)
+        graph = ImportGraph(root, cache_path)
+        related = graph.dependencies(script_file)
+        graph.save()
         return related
     
     def get_diff(self, specific_files: Optional[list] = None) -> str:
@@ -244,40 +315,127 @@ class GitUtils:
             return ""
 
     def generate_ai_commit_message(self, diff: str) -> Optional[str]:
-        """使用 AI 生成提交信息"""
+        """使用 AI 生成提交信息（相同输入的结果从本地缓存读取）
+
+        diff 不超过 max_diff_chars 时直接总结；否则按文件和 hunk 切块，
+        并发总结每一块后再合并为最终的提交信息。
+        """
         if not diff or not self.ai_config:
             return None
             
         api_key = self._get_ai_setting('api_key', env_names=['LABPILOT_AI_API_KEY', 'MINIMAX_API_KEY'])
-        base_url = self._get_ai_setting('base_url', 'https://api.minimaxi.com/v1')
-        model = self._get_ai_setting('model', 'MiniMax-M2.7-highspeed')
         
         if not api_key:
             return None
             
-        # 限制 Diff 长度，防止超过 token 限制
         max_len = int(self._get_ai_setting('max_diff_chars', 3000))
         if len(diff) > max_len:
-            diff = diff[:max_len] + "\n... (truncated)"
-            
-        # 获取超时设置，默认为 120 秒
-        timeout = self._get_ai_setting('timeout', 120)
+            return self._map_reduce_commit_message(diff, max_len)
         
-        # 获取语言设置，默认为中文
+        return self._cached_completion(COMMIT_PROMPT.format(
+            lang_instruction=self._lang_instruction(), diff=diff
+        ))
+
+    def _map_reduce_commit_message(self, diff: str, max_len: int) -> Optional[str]:
+        """大 diff：map 阶段并发总结每个切块，reduce 阶段合并，整个过程受总时限约束"""
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        deadline = time.monotonic() + float(self._get_ai_setting('deadline', 90))
+        max_workers = int(self._get_ai_setting('max_workers', 4))
+        token_budget = int(self._get_ai_setting('token_budget', 32000))
+        lang_instruction = self._lang_instruction()
+        # 在启动工作线程前打开缓存，避免并发创建
+        self.get_ai_cache()
+
+        # 按 token 预算选择要总结的切块，超出预算的文件只列出文件名
+        chunks, skipped_files = [], []
+        used_tokens = 0
+        for path, chunk in split_diff(diff, max_len):
+            tokens = estimate_tokens(chunk)
+            if used_tokens + tokens > token_budget:
+                if path not in skipped_files:
+                    skipped_files.append(path)
+                continue
+            used_tokens += tokens
+            chunks.append((path, chunk))
+
+        summaries: List[Optional[str]] = [None] * len(chunks)
+        pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="labpilot-ai-map")
+        futures = {
+            pool.submit(self._cached_completion,
+                        CHUNK_PROMPT.format(lang_instruction=lang_instruction, path=path, diff=chunk),
+                        deadline): i
+            for i, (path, chunk) in enumerate(chunks)
+        }
+        done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        # 超时未完成的请求不再等待：取消尚未开始的切块（shutdown 的 cancel_futures 需要 Python 3.9），
+        # 已在进行中的请求会在各自的超时后结束
+        for future in not_done:
+            future.cancel()
+        pool.shutdown(wait=False)
+        for future in done:
+            if future.exception() is None:
+                summaries[futures[future]] = future.result()
+        if not_done:
+            print(f"[WARN] AI 总结超时，{len(not_done)} 个切块未完成")
+
+        # 同一文件的多个切块合并为一条
+        file_summaries: Dict[str, List[str]] = {}
+        for (path, _), summary in zip(chunks, summaries):
+            if summary:
+                file_summaries.setdefault(path, []).append(summary)
+        if not file_summaries:
+            return None
+
+        summary_text = "\n".join(f"- {path}: {' '.join(parts)}" for path, parts in file_summaries.items())
+        if skipped_files:
+            summary_text += f"\n- 另有 {len(skipped_files)} 个文件改动未详细总结: {', '.join(skipped_files)}"
+
+        message = self._cached_completion(
+            REDUCE_PROMPT.format(lang_instruction=lang_instruction, summaries=summary_text), deadline
+        )
+        if message:
+            return message
+
+        # reduce 失败或超时：直接用各文件的总结拼出提交信息
+        return f"chore: update {len(file_summaries) + len(skipped_files)} files\n\n{summary_text}"
+
+    def _lang_instruction(self) -> str:
         language = self._get_ai_setting('language', 'zh-CN')
-        lang_instruction = "请使用简体中文回复。" if language == 'zh-CN' else f"Please respond in {language}."
+        return "请使用简体中文回复。" if language == 'zh-CN' else f"Please respond in {language}."
 
-        prompt = f"""
-        {lang_instruction}
-        请根据以下入口脚本及其关联脚本的 git diff，生成一个简洁明了的 git commit message。
-        格式要求：
-        1. 第一行：简短总结，不超过 50 个字符，建议使用 conventional commit 风格
-        2. 第二行：空行
-        3. 第三行开始：总结脚本行为或实验逻辑的关键变动
-        
-        代码变动：
-        {diff}
+    def _cached_completion(self, prompt: str, deadline: Optional[float] = None) -> Optional[str]:
+        """带缓存的单次总结；缓存键包含提示词全文（其中已含 diff 与语言）、模型和提示词版本"""
+        model = self._get_ai_setting('model', 'MiniMax-M2.7-highspeed')
+        cache = self.get_ai_cache()
+        key = cache_key(prompt, model, PROMPT_VERSION) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        message = self._chat_completion([
+            {"role": "system", "content": "你是一个专业的代码提交助手。"},
+            {"role": "user", "content": prompt}
+        ], deadline=deadline)
+        if message and key is not None:
+            cache.put(key, message)
+        return message
+
+    def _chat_completion(self, messages: List[dict], deadline: Optional[float] = None) -> Optional[str]:
+        """调用 OpenAI 兼容的 /chat/completions 接口，返回回复内容
+
+        deadline 为 time.monotonic() 时刻，单次请求超时和重试等待都不会超过它。
         """
+        import requests  # 延迟导入，只有真正调用 AI 时才需要
+        from .http_client import get_http_client
+
+        api_key = self._get_ai_setting('api_key', env_names=['LABPILOT_AI_API_KEY', 'MINIMAX_API_KEY'])
+        base_url = self._get_ai_setting('base_url', 'https://api.minimaxi.com/v1')
+        model = self._get_ai_setting('model', 'MiniMax-M2.7-highspeed')
+        
+        # 获取超时设置，默认为 120 秒
+        timeout = float(self._get_ai_setting('timeout', 120))
         
         headers = {
             "Content-Type": "application/json",
@@ -286,10 +444,7 @@ class GitUtils:
         
         payload = {
             "model": model,
-            "messages": [
-                {"role": "system", "content": "你是一个专业的代码提交助手。"},
-                {"role": "user", "content": prompt}
-            ],
+            "messages": messages,
             "temperature": 0.7
         }
         
@@ -308,15 +463,20 @@ class GitUtils:
             retry_delay = 2  # 初始等待2秒
             
             for attempt in range(max_retries):
+                request_timeout = timeout
+                if deadline is not None:
+                    request_timeout = min(timeout, deadline - time.monotonic())
+                    if request_timeout <= 0:
+                        return None
                 try:
-                    response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+                    response = get_http_client().post(url, headers=headers, json=payload, timeout=request_timeout)
                     
                     if response.status_code == 200:
                         result = response.json()
                         content = result['choices'][0]['message']['content']
                         return content.strip()
                     elif response.status_code == 429:
-                        if attempt < max_retries - 1:
+                        if attempt < max_retries - 1 and self._can_wait(retry_delay, deadline):
                             print(f"[WARN] AI API Rate Limit (429). Retrying in {retry_delay}s...")
                             time.sleep(retry_delay)
                             retry_delay *= 2  # 指数退避
@@ -328,7 +488,7 @@ class GitUtils:
                         print(f"[ERROR] AI API Error: {response.status_code} - {response.text}")
                         return None
                 except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-                    if attempt < max_retries - 1:
+                    if attempt < max_retries - 1 and self._can_wait(retry_delay, deadline):
                         print(f"[WARN] AI API Network Error ({type(e).__name__}). Retrying in {retry_delay}s...")
                         time.sleep(retry_delay)
                         retry_delay *= 2
@@ -341,6 +501,10 @@ class GitUtils:
             print(f"[WARN] AI Request Failed (timeout={timeout}s): {e}")
             return None
 
+    @staticmethod
+    def _can_wait(delay: float, deadline: Optional[float]) -> bool:
+        return deadline is None or time.monotonic() + delay < deadline
+
     def _get_ai_setting(self, key: str, default=None, env_names: Optional[List[str]] = None):
         """从环境变量或配置文件读取 AI 设置，环境变量优先。"""
         for env_name in env_names or []:
@@ -365,6 +529,9 @@ class GitUtils:
             commit_hash, _ = self.get_git_info()
             return commit_hash
         
+        # 异步模式下提交成功后才交给 start_ai_message，提交失败时不能把 AI 信息附加到无关的 HEAD 上
+        pending_diff = None
+        
         # 如果未指定消息，尝试使用 AI 生成
         if message is None:
             # 1. 添加更改到暂存区，以便获取完整的 diff
@@ -379,15 +546,12 @@ class GitUtils:
             # 2. 获取 Diff
             diff = self.get_diff(specific_files=specific_files)
             
-            # 3. 尝试生成 AI 消息
-            ai_message = self.generate_ai_commit_message(diff)
-            
-            if ai_message:
-                message = ai_message
+            # 3. 异步模式先用临时信息提交，实验无需等待 AI 返回；否则同步生成 AI 消息
+            if self.ai_message_mode() == 'async' and diff and self.ai_config:
+                pending_diff = diff
+                message = self._provisional_message()
             else:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                message = f"Auto-snapshot before experiment run [labpilot-{timestamp}]"
+                message = self.generate_ai_commit_message(diff) or self._provisional_message()
         
         try:
             # 确保再次添加（如果之前没添加成功，或者防止某些情况）
@@ -402,16 +566,75 @@ class GitUtils:
                 commit_cmd.extend(['--only', '--'])
                 commit_cmd.extend(specific_files)
             subprocess.run(commit_cmd, check=True, cwd=os.getcwd())
-            
-            # 获取新 commit hash
-            commit_hash, _ = self.get_git_info()
-            
-            return commit_hash
+            self.pending_ai_diff = pending_diff
         except subprocess.CalledProcessError:
             # 如果提交失败，返回当前 commit hash
-            commit_hash, _ = self.get_git_info()
-            return commit_hash
+            pass
+        
+        # HEAD 与工作区状态已变化，重新读取
+        self.invalidate_state()
+        commit_hash, _ = self.get_git_info()
+        return commit_hash
     
+    def ai_message_mode(self) -> str:
+        """AI 提交信息的生成方式：sync（默认，提交前同步生成）或 async（后台生成）"""
+        return str(self.git_config.get('ai_message', 'sync')).lower()
+
+    def get_ai_cache(self, create: bool = True):
+        """AI 结果缓存，默认放在实验数据库旁；ai.cache 为 false 时返回 None"""
+        if self._ai_cache is None and create and self.ai_config.get('cache', True):
+            from .ai_cache import AICache, DEFAULT_MAX_BYTES, default_cache_path
+            db_path = self.config.get('database', {}).get('path', './labpilot.db')
+            path = self.ai_config.get('cache_path') or default_cache_path(db_path)
+            max_bytes = int(self.ai_config.get('cache_max_mb', DEFAULT_MAX_BYTES // (1024 * 1024)) * 1024 * 1024)
+            try:
+                self._ai_cache = AICache(path, max_bytes)
+            except Exception as e:
+                print(f"[WARN] AI 缓存不可用: {e}")
+                self.ai_config = dict(self.ai_config, cache=False)
+        return self._ai_cache
+
+    def _provisional_message(self) -> str:
+        from datetime import datetime
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return f"Auto-snapshot before experiment run [labpilot-{timestamp}]"
+
+    def add_commit_note(self, commit_hash: str, message: str) -> bool:
+        """以 git notes 的形式把信息附加到提交上，不改写提交本身（hash 保持不变）"""
+        try:
+            result = subprocess.run(
+                ['git', 'notes', 'add', '-f', '-m', message, commit_hash],
+                capture_output=True,
+                text=True,
+                cwd=os.getcwd()
+            )
+            return result.returncode == 0
+        except Exception:
+            return False
+
+    def start_ai_message(self, commit_hash: str,
+                         on_message: Optional[Callable[[str], None]] = None) -> Optional[threading.Thread]:
+        """在后台线程中为临时快照生成 AI 提交信息
+
+        生成后作为 git note 附加到快照提交上，并回调 on_message；没有待处理的快照时返回 None。
+        """
+        diff, self.pending_ai_diff = self.pending_ai_diff, None
+        if not diff:
+            return None
+
+        def run():
+            message = self.generate_ai_commit_message(diff)
+            if not message:
+                return
+            if not self.add_commit_note(commit_hash, message):
+                print("[WARN] 无法将 AI 提交信息附加到快照提交")
+            if on_message:
+                on_message(message)
+
+        thread = threading.Thread(target=run, name="labpilot-ai-message", daemon=True)
+        thread.start()
+        return thread
+
     def check_and_handle_repo(self, specific_files: Optional[list] = None) -> str:
         """检查并处理仓库状态"""
         if not self.is_git_repo():
@@ -430,20 +653,10 @@ class GitUtils:
     
     def get_commit_body(self) -> str:
         """获取完整的 commit message"""
-        if not self.is_git_repo():
+        state = self.get_state()
+        if not state.is_repo:
             return "not-a-git-repo"
-        
-        try:
-            # 获取完整 commit message (subject + body)
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=%B'],
-                capture_output=True,
-                text=True,
-                cwd=os.getcwd()
-            )
-            return result.stdout.strip() if result.returncode == 0 else "unknown"
-        except Exception:
-            return "unknown"
+        return state.message or "unknown"
 
 
 # 全局 Git 工具实例
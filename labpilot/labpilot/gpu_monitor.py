@@ -0,0 +1,321 @@
+"""
+LabPilot GPU 监控模块
+在进程内持续采样 GPU 状态（NVML 或常驻的 nvidia-smi），空闲显卡出现时立即唤醒等待者
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional
+
+
+# memory_free / memory_total 单位为 MB，utilization 为百分比
+GPUInfo = namedtuple('GPUInfo', ['index', 'memory_free', 'memory_total', 'utilization'])
+
+# 默认采样间隔（秒），决定显存释放后等待者被唤醒的延迟
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+class GPUBackend:
+    """GPU 状态后端基类：在后台持续采样并通过 publish 回调发布快照"""
+    name = "base"
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self._publish = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, publish: Callable[[List[GPUInfo]], None]):
+        # 停止后再次启动：等上一个采样线程退出后再复用停止标志
+        if self._thread is not None and self._stop.is_set():
+            self._thread.join()
+        self._stop.clear()
+        self._publish = publish
+        self._thread = threading.Thread(target=self._run, name=f"labpilot-gpu-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class NVMLBackend(GPUBackend):
+    """通过 NVML 在进程内查询，不需要 fork 任何子进程"""
+    name = "nvml"
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(interval)
+        import pynvml
+        self._nvml = pynvml
+        self._open()
+
+    def _open(self):
+        self._nvml.nvmlInit()
+        self._handles = [
+            self._nvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(self._nvml.nvmlDeviceGetCount())
+        ]
+
+    def start(self, publish: Callable[[List[GPUInfo]], None]):
+        # stop() 已调用 nvmlShutdown，重新启动时需要重新初始化
+        if self._stop.is_set():
+            self._open()
+        super().start(publish)
+
+    def sample(self) -> List[GPUInfo]:
+        gpus = []
+        for index, handle in enumerate(self._handles):
+            memory = self._nvml.nvmlDeviceGetMemoryInfo(handle)
+            utilization = self._nvml.nvmlDeviceGetUtilizationRates(handle)
+            gpus.append(GPUInfo(
+                index,
+                memory.free // (1024 * 1024),
+                memory.total // (1024 * 1024),
+                utilization.gpu
+            ))
+        return gpus
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._publish(self.sample())
+            except Exception as e:
+                print(f"[WARN] NVML 查询失败: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        super().stop()
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class NvidiaSmiLoopBackend(GPUBackend):
+    """常驻的 nvidia-smi --loop-ms 进程，整个等待期间只 fork 一次"""
+    name = "nvidia-smi"
+
+    QUERY = 'index,memory.free,memory.total,utilization.gpu'
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(interval)
+        self._process = None
+        self.gpu_count = len(self.query_once())
+
+    def query_once(self) -> List[GPUInfo]:
+        result = subprocess.run(
+            ['nvidia-smi', f'--query-gpu={self.QUERY}', '--format=csv,noheader,nounits'],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "nvidia-smi failed")
+        return [gpu for gpu in map(parse_smi_line, result.stdout.splitlines()) if gpu]
+
+    def _run(self):
+        self._process = subprocess.Popen(
+            ['nvidia-smi', f'--query-gpu={self.QUERY}', '--format=csv,noheader,nounits',
+             f'--loop-ms={max(int(self.interval * 1000), 100)}'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        batch = []
+        for line in self._process.stdout:
+            if self._stop.is_set():
+                break
+            gpu = parse_smi_line(line)
+            if gpu is None:
+                continue
+            batch.append(gpu)
+            # 每轮输出 gpu_count 行，凑齐一轮即发布
+            if len(batch) >= self.gpu_count:
+                self._publish(batch)
+                batch = []
+
+    def stop(self):
+        super().stop()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+
+
+class FakeBackend(GPUBackend):
+    """测试用后端：由调用方通过 set_gpus 手动发布状态"""
+    name = "fake"
+
+    def __init__(self, gpus: Optional[List[GPUInfo]] = None):
+        super().__init__()
+        self._gpus = list(gpus or [])
+
+    def start(self, publish: Callable[[List[GPUInfo]], None]):
+        self._publish = publish
+        if self._gpus:
+            publish(self._gpus)
+
+    def set_gpus(self, gpus: List[GPUInfo]):
+        self._gpus = list(gpus)
+        if self._publish is not None:
+            self._publish(self._gpus)
+
+
+def parse_smi_line(line: str) -> Optional[GPUInfo]:
+    """解析一行 nvidia-smi CSV 输出"""
+    parts = [part.strip() for part in line.split(',')]
+    if len(parts) < 4:
+        return None
+    try:
+        index, free, total = int(parts[0]), int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    try:
+        utilization = int(parts[3])
+    except ValueError:
+        # 部分显卡不支持利用率查询，输出 [N/A]
+        utilization = 0
+    return GPUInfo(index, free, total, utilization)
+
+
+def create_backend(name: str = "auto", interval: float = DEFAULT_POLL_INTERVAL) -> Optional[GPUBackend]:
+    """按名称创建后端；auto 依次尝试 NVML 和 nvidia-smi，都不可用时返回 None"""
+    if name in ("auto", "nvml"):
+        try:
+            return NVMLBackend(interval)
+        except Exception:
+            if name == "nvml":
+                raise
+    if name in ("auto", "nvidia-smi"):
+        if shutil.which('nvidia-smi'):
+            try:
+                return NvidiaSmiLoopBackend(interval)
+            except Exception:
+                if name == "nvidia-smi":
+                    raise
+    if name == "fake":
+        return FakeBackend()
+    return None
+
+
+class GPUMonitor:
+    """GPU 状态监控器
+
+    后端每发布一次快照就唤醒所有等待者；等待者按显存、利用率阈值
+    和稳定窗口挑选显卡，避免抢到只是短暂释放显存的 GPU。
+    """
+
+    def __init__(self, backend: Optional[GPUBackend]):
+        self.backend = backend
+        self.gpus: List[GPUInfo] = []
+        self.updated_at = None
+        self._cond = threading.Condition()
+        self._started = False
+        self._listeners: List[Callable[[List[GPUInfo]], None]] = []
+
+    def start(self, first_sample_timeout: float = 5.0):
+        """启动后端，并等待第一份快照"""
+        if self._started or self.backend is None:
+            return
+        self._started = True
+        self.backend.start(self._on_sample)
+        with self._cond:
+            self._cond.wait_for(lambda: self.updated_at is not None, timeout=first_sample_timeout)
+
+    def stop(self):
+        """停止后端采样；之后再查询时会重新启动并等待新的快照"""
+        if self.backend is not None:
+            self.backend.stop()
+        with self._cond:
+            self._started = False
+            self.updated_at = None
+            self.gpus = []
+
+    def add_listener(self, listener: Callable[[List[GPUInfo]], None]):
+        """注册快照回调，每次采样后在后端线程中调用"""
+        self._listeners.append(listener)
+
+    def _on_sample(self, gpus: List[GPUInfo]):
+        with self._cond:
+            # 停止前已在途的采样不再发布
+            if not self._started:
+                return
+            self.gpus = list(gpus)
+            self.updated_at = time.time()
+            self._cond.notify_all()
+        for listener in self._listeners:
+            listener(list(gpus))
+
+    def snapshot(self) -> List[GPUInfo]:
+        self.start()
+        with self._cond:
+            return list(self.gpus)
+
+    @staticmethod
+    def _eligible(gpu: GPUInfo, min_memory_mb: int, max_util: Optional[int]) -> bool:
+        if gpu.memory_free < min_memory_mb:
+            return False
+        return max_util is None or gpu.utilization <= max_util
+
+    def free_gpus(self, min_memory_mb: int, max_util: Optional[int] = None,
+                  exclude: Iterable[int] = ()) -> List[int]:
+        """当前满足要求的 GPU 索引列表"""
+        excluded = set(exclude)
+        return [
+            gpu.index for gpu in self.snapshot()
+            if gpu.index not in excluded and self._eligible(gpu, min_memory_mb, max_util)
+        ]
+
+    def wait_for(self, min_memory_mb: int, max_util: Optional[int] = None,
+                 stable_seconds: float = 0, timeout: Optional[float] = None,
+                 exclude: Iterable[int] = ()) -> Optional[int]:
+        """阻塞直到某块 GPU 连续 stable_seconds 秒满足要求，超时返回 None"""
+        self.start()
+        excluded = set(exclude)
+        deadline = None if timeout is None else time.time() + timeout
+        eligible_since = {}
+        seen_at = None
+
+        with self._cond:
+            while True:
+                now = time.time()
+                if self.updated_at != seen_at:
+                    seen_at = self.updated_at
+                    current = {
+                        gpu.index for gpu in self.gpus
+                        if gpu.index not in excluded and self._eligible(gpu, min_memory_mb, max_util)
+                    }
+                    eligible_since = {index: eligible_since.get(index, now) for index in current}
+
+                stable = [
+                    index for index, since in eligible_since.items()
+                    if now - since >= stable_seconds
+                ]
+                if stable:
+                    return min(stable)
+
+                # 等待下一份快照，或等到候选 GPU 的稳定窗口结束
+                wait = None
+                if eligible_since:
+                    wait = min(since + stable_seconds for since in eligible_since.values()) - now
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+
+# 全局监控器实例
+_monitor_instance = None
+
+
+def get_gpu_monitor(backend: str = "auto", interval: float = DEFAULT_POLL_INTERVAL) -> GPUMonitor:
+    """获取 GPU 监控器实例"""
+    global _monitor_instance
+    if _monitor_instance is None:
+        _monitor_instance = GPUMonitor(create_backend(backend, interval))
+    return _monitor_instance
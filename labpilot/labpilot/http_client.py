@@ -0,0 +1,172 @@
+"""
+LabPilot HTTP 客户端模块
+进程内共享的 HTTP 会话：按主机保持长连接池、可配置的重试策略、连接/总超时，
+并记录每个主机的请求延迟，供通知器和 AI 客户端共用
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# 默认连接超时（秒）
+DEFAULT_CONNECT_TIMEOUT = 3.05
+
+# 默认请求总超时（秒），调用方未指定 timeout 时使用
+DEFAULT_TOTAL_TIMEOUT = 30
+
+# 每个主机保留的最近延迟样本数
+LATENCY_SAMPLES = 256
+
+
+class HostStats:
+    """单个主机的请求统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.recent = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float, error: bool):
+        self.requests += 1
+        self.errors += int(error)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.recent.append(seconds)
+
+    def to_dict(self) -> dict:
+        recent = sorted(self.recent)
+        p50 = recent[len(recent) // 2] if recent else 0.0
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0.0,
+            'p50_ms': round(p50 * 1000, 1),
+            'max_ms': round(self.max_seconds * 1000, 1),
+        }
+
+
+class HTTPClient:
+    """共享的 HTTP 客户端
+
+    - 同一主机的请求复用 keep-alive 连接，开始和结束通知只需一次 TCP/TLS 握手
+    - 默认只对连接失败重试（此时请求尚未发出，重试不会导致重复通知），
+      状态码重试需显式配置
+    - timeout 参数表示单次请求的总时限，连接阶段另受 connect_timeout 约束
+    """
+
+    def __init__(self, pool_maxsize: int = 10, connect_retries: int = 2, read_retries: int = 0,
+                 status_retries: int = 0, backoff_factor: float = 0.5,
+                 status_forcelist=(429, 502, 503, 504),
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 total_timeout: float = DEFAULT_TOTAL_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import ReadTimeoutError
+        from urllib3.util.retry import Retry
+
+        self._requests = requests
+        self._read_timeout_error = ReadTimeoutError
+        self.connect_timeout = connect_timeout
+        self.total_timeout = total_timeout
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=None,
+            connect=connect_retries,
+            read=read_retries,
+            status=status_retries,
+            other=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist if status_retries else (),
+            # 通知和 AI 接口都是 POST，只有显式配置时才会因读超时或状态码重试
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _timeout(self, timeout: Optional[float]):
+        from urllib3.util.timeout import Timeout
+
+        total = float(timeout) if timeout is not None else self.total_timeout
+        return Timeout(connect=min(self.connect_timeout, total), read=total, total=total)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs):
+        host = urlsplit(url).netloc
+        started = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(method, url, timeout=self._timeout(timeout), **kwargs)
+            error = response.status_code >= 400
+            return response
+        except self._requests.exceptions.ConnectionError as e:
+            # 配置了重试适配器后，读超时会被包装为 MaxRetryError -> ConnectionError，这里还原为超时异常
+            reason = getattr(e.args[0], 'reason', None) if e.args else None
+            if isinstance(reason, self._read_timeout_error):
+                raise self._requests.exceptions.ReadTimeout(e, request=e.request) from e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats.setdefault(host, HostStats()).record(elapsed, error)
+
+    def post(self, url: str, timeout: Optional[float] = None, **kwargs):
+        return self.request('POST', url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs):
+        return self.request('GET', url, timeout=timeout, **kwargs)
+
+    def stats(self) -> Dict[str, dict]:
+        """每个主机的请求数、失败数和延迟（毫秒）"""
+        with self._lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    def summary(self) -> str:
+        parts = [
+            f"{host} {s['requests']} 次 (失败 {s['errors']}, 平均 {s['avg_ms']:.0f} ms, 最大 {s['max_ms']:.0f} ms)"
+            for host, s in self.stats().items()
+        ]
+        return "HTTP 请求: " + "; ".join(parts)
+
+    def close(self):
+        self.session.close()
+
+
+# 全局 HTTP 客户端实例
+_http_client_instance = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client(config: Optional[dict] = None) -> HTTPClient:
+    """获取进程内共享的 HTTP 客户端，首次调用时按配置文件的 http 段创建"""
+    global _http_client_instance
+    if _http_client_instance is None:
+        with _http_client_lock:
+            if _http_client_instance is None:
+                if config is None:
+                    from .config import load_config
+                    config = load_config()
+                http_config = config.get('http', {}) or {}
+                retry_config = http_config.get('retry', {}) or {}
+                _http_client_instance = HTTPClient(
+                    pool_maxsize=int(http_config.get('pool_maxsize', 10)),
+                    connect_retries=int(retry_config.get('connect', 2)),
+                    read_retries=int(retry_config.get('read', 0)),
+                    status_retries=int(retry_config.get('status', 0)),
+                    backoff_factor=float(retry_config.get('backoff_factor', 0.5)),
+                    connect_timeout=float(http_config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+                    total_timeout=float(http_config.get('timeout', DEFAULT_TOTAL_TIMEOUT)),
+                )
+    return _http_client_instance
+
+
+def http_client_if_created() -> Optional[HTTPClient]:
+    """已创建的共享客户端；本进程没有发出过 HTTP 请求时返回 None"""
+    return _http_client_instance
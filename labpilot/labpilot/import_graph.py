@@ -0,0 +1,291 @@
+"""
+LabPilot 导入图缓存模块
+静态解析入口脚本依赖的本地 Python 文件；解析结果和模块索引持久化到磁盘，
+按文件路径、大小、修改时间和内容哈希判断是否需要重新解析
+"""
+
+import ast
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+# 缓存格式版本，结构变化时递增以丢弃旧缓存
+CACHE_VERSION = 1
+
+# 默认缓存目录，每个项目根目录一个缓存文件
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "labpilot")
+
+# 待解析文件数不少于该值时使用多进程并行解析
+PARALLEL_THRESHOLD = 64
+
+# 建立模块索引时跳过的目录
+SKIP_DIRS = {'__pycache__', 'node_modules', 'site-packages', 'venv', 'env'}
+
+# 单条导入记录: [模块名, 相对导入层级, from 导入的名称列表]
+ImportRecord = List
+
+
+def parse_imports(source: bytes) -> List[ImportRecord]:
+    """提取源码中的所有导入语句（包括函数内部的导入）"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([alias.name, 0, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.module or "", node.level, [alias.name for alias in node.names]])
+    return imports
+
+
+def _parse_file(path: str) -> Tuple[str, Optional[List[ImportRecord]]]:
+    """读取并解析单个文件，返回 (内容哈希, 导入记录)；供进程池调用"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return "", None
+    return _content_hash(data), parse_imports(data)
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def default_cache_path(root: str, cache_dir: Optional[str] = None) -> str:
+    """项目根目录对应的缓存文件路径"""
+    key = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"import_graph_{key}.json")
+
+
+class ImportGraph:
+    """项目内的本地导入图
+
+    - files: 相对路径 -> {size, mtime_ns, hash, imports}，未变化的文件直接复用解析结果
+    - dirs: 目录相对路径 -> (mtime_ns, 目录下的 .py 文件和子目录)，目录修改时间变化时才重新列举，
+      由此得到的 .py 文件集合即模块索引，解析导入时只做集合查找而不再探测文件系统
+    """
+
+    def __init__(self, root: str, cache_path: Optional[str] = None,
+                 parallel_threshold: int = PARALLEL_THRESHOLD):
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path
+        self.parallel_threshold = parallel_threshold
+
+        self.files: Dict[str, dict] = {}
+        self.dirs: Dict[str, list] = {}
+        self.modules: Set[str] = set()
+        self.parsed_count = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != CACHE_VERSION or data.get('root') != self.root:
+            return
+        self.files = data.get('files', {})
+        self.dirs = data.get('dirs', {})
+
+    def save(self):
+        """有变化时原子地写回缓存文件"""
+        if not self.cache_path or not self._dirty:
+            return
+        data = {'version': CACHE_VERSION, 'root': self.root, 'files': self.files, 'dirs': self.dirs}
+        directory = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"[WARN] 无法写入导入图缓存: {e}")
+
+    def refresh_index(self):
+        """按目录修改时间增量更新模块索引"""
+        seen = set()
+        modules = set()
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            seen.add(rel_dir)
+            abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+
+            cached = self.dirs.get(rel_dir)
+            if cached is None or cached[0] != mtime_ns:
+                cached = [mtime_ns, self._list_dir(abs_dir)]
+                self.dirs[rel_dir] = cached
+                self._dirty = True
+
+            for name in cached[1]:
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if name.endswith('/'):
+                    stack.append(rel_path[:-1])
+                else:
+                    modules.add(rel_path)
+
+        for rel_dir in set(self.dirs) - seen:
+            del self.dirs[rel_dir]
+            self._dirty = True
+        self.modules = modules
+
+    @staticmethod
+    def _list_dir(abs_dir: str) -> List[str]:
+        """目录下的 .py 文件和需要继续遍历的子目录（以 / 结尾）"""
+        entries = []
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name.startswith('.') or name in SKIP_DIRS \
+                                or os.path.exists(os.path.join(entry.path, 'pyvenv.cfg')):
+                            continue
+                        entries.append(name + '/')
+                    elif name.endswith('.py'):
+                        entries.append(name)
+        except OSError:
+            pass
+        return sorted(entries)
+
+    def _module_path(self, base: str, parts: List[str]) -> Optional[str]:
+        """在索引中查找 base 目录下的模块或包，返回相对路径"""
+        stem = '/'.join(filter(None, [base] + parts))
+        for candidate in (stem + '.py', stem + '/__init__.py' if stem else '__init__.py'):
+            if candidate in self.modules:
+                return candidate
+        return None
+
+    def _resolve(self, rel_path: str, record: ImportRecord) -> List[str]:
+        """把一条导入记录解析为本地文件的相对路径"""
+        module, level, names = record
+        parts = module.split('.') if module else []
+        base_dir = os.path.dirname(rel_path).replace('\\', '/')
+
+        if level:
+            # 相对导入：从当前文件所在包向上 level - 1 层
+            package = base_dir.split('/') if base_dir else []
+            if level - 1 > len(package):
+                return []
+            package = package[:len(package) - (level - 1)]
+            bases = ['/'.join(package)]
+        else:
+            # 与旧实现一致：先在导入文件所在目录查找，再在项目根目录查找
+            bases = [base_dir, ''] if base_dir else ['']
+
+        resolved = []
+        for base in bases:
+            target = self._module_path(base, parts)
+            # from package import submodule：名称本身可能是子模块
+            for name in names:
+                submodule = self._module_path(base, parts + [name])
+                if submodule:
+                    resolved.append(submodule)
+            if target:
+                resolved.append(target)
+            if resolved:
+                break
+        return resolved
+
+    def _stale_files(self, rel_paths: List[str]) -> Dict[str, os.stat_result]:
+        """返回大小或修改时间与缓存不一致的文件"""
+        stale = {}
+        for rel_path in rel_paths:
+            try:
+                stat = os.stat(os.path.join(self.root, rel_path))
+            except OSError:
+                continue
+            entry = self.files.get(rel_path)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                stale[rel_path] = stat
+        return stale
+
+    def _update(self, stale: Dict[str, os.stat_result]):
+        """重新读取变化的文件；内容哈希未变时复用旧的解析结果"""
+        if not stale:
+            return
+        paths = list(stale)
+        abs_paths = [os.path.join(self.root, path) for path in paths]
+        if len(paths) >= self.parallel_threshold and (os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(_parse_file, abs_paths, chunksize=16))
+        else:
+            results = []
+            for abs_path, rel_path in zip(abs_paths, paths):
+                entry = self.files.get(rel_path)
+                try:
+                    with open(abs_path, 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    results.append(("", None))
+                    continue
+                content_hash = _content_hash(data)
+                if entry is not None and entry['hash'] == content_hash:
+                    results.append((content_hash, entry['imports']))
+                else:
+                    results.append((content_hash, parse_imports(data)))
+
+        for rel_path, (content_hash, imports) in zip(paths, results):
+            if imports is None:
+                continue
+            entry = self.files.get(rel_path)
+            if entry is None or entry['hash'] != content_hash:
+                self.parsed_count += 1
+            stat = stale[rel_path]
+            self.files[rel_path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'hash': content_hash,
+                'imports': imports,
+            }
+        self._dirty = True
+
+    def dependencies(self, script_file: str) -> Set[str]:
+        """入口脚本及其传递依赖的本地 Python 文件（相对项目根目录的路径）"""
+        self.refresh_index()
+        abs_script = os.path.abspath(script_file)
+        if not abs_script.endswith('.py') or os.path.commonpath([self.root, abs_script]) != self.root:
+            return set()
+        start = os.path.relpath(abs_script, self.root).replace('\\', '/')
+        if start not in self.modules and not os.path.exists(abs_script):
+            return set()
+
+        visited = {start}
+        frontier = [start]
+        while frontier:
+            # 按层遍历，每层中变化的文件一起（必要时并行）解析
+            self._update(self._stale_files(frontier))
+            next_frontier = []
+            for rel_path in frontier:
+                entry = self.files.get(rel_path)
+                if entry is None:
+                    continue
+                for record in entry['imports']:
+                    for dependency in self._resolve(rel_path, record):
+                        if dependency not in visited:
+                            visited.add(dependency)
+                            next_frontier.append(dependency)
+            frontier = next_frontier
+
+        # 删除已不存在的文件条目，避免缓存无限增长
+        for rel_path in [path for path in self.files if path not in self.modules]:
+            del self.files[rel_path]
+            self._dirty = True
+        return visited
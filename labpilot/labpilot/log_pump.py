@@ -0,0 +1,184 @@
+"""
+LabPilot 日志转发模块
+按块读取子进程输出，同时转发到终端和日志文件，内存占用与输出量无关
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+
+# 单次 os.read 的块大小
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# 尾部缓冲区大小（用于生成 log_snippet）
+DEFAULT_TAIL_BYTES = 64 * 1024
+
+# 单行最大长度，超过后强制切分，避免没有换行符的输出（如进度条）撑爆内存
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class LogPump:
+    """子进程输出转发器
+
+    在后台线程中以原始字节块读取输出流，写入终端和各个 sink，
+    只保留一个有界的尾部环形缓冲区，并统计吞吐量。
+    """
+
+    def __init__(self, stream, sinks: Optional[list] = None, echo: bool = True,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 tail_bytes: int = DEFAULT_TAIL_BYTES):
+        self.stream = stream
+        self.sinks = list(sinks or [])
+        self.echo = echo
+        self.chunk_size = chunk_size
+        self.tail_bytes = tail_bytes
+
+        self.bytes_total = 0
+        self.start_time = None
+        self.end_time = None
+
+        self._tail = deque()
+        self._tail_size = 0
+        self._partial = b""
+        self._line_handlers: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_line_handler(self, handler: Callable[[str], None]):
+        """注册逐行回调，回调在转发线程中执行，应尽量轻量"""
+        self._line_handlers.append(handler)
+
+    def start(self):
+        """启动后台转发线程"""
+        self.start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="labpilot-log-pump", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """等待转发结束，返回是否已读到 EOF"""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def run(self):
+        """在当前线程中同步转发直到 EOF"""
+        self.start_time = time.time()
+        self._run()
+
+    def _run(self):
+        fd = self.stream.fileno()
+        out = self._terminal_buffer() if self.echo else None
+        try:
+            while True:
+                try:
+                    chunk = os.read(fd, self.chunk_size)
+                except InterruptedError:
+                    continue
+                except OSError:
+                    break
+                if not chunk:
+                    break
+
+                if out is not None:
+                    try:
+                        out.write(chunk)
+                        out.flush()
+                    except Exception:
+                        out = None
+                self.feed(chunk)
+        finally:
+            self._flush_partial()
+            self.end_time = time.time()
+
+    def feed(self, chunk: bytes, dispatch: bool = True):
+        """处理一块输出：写入 sink、更新尾部缓冲、分发完整的行"""
+        self.bytes_total += len(chunk)
+        for sink in self.sinks:
+            sink.write(chunk)
+
+        with self._lock:
+            self._tail.append(chunk)
+            self._tail_size += len(chunk)
+            while self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+                self._tail_size -= len(self._tail.popleft())
+
+        if dispatch and self._line_handlers:
+            self._dispatch_lines(chunk)
+
+    def write_note(self, text: str):
+        """追加一段由 LabPilot 产生的说明（如超时、中断），不回显到终端也不触发行回调"""
+        self.feed(text.encode("utf-8"), dispatch=False)
+
+    def _dispatch_lines(self, chunk: bytes):
+        data = self._partial + chunk if self._partial else chunk
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self._partial = data
+            if len(data) > MAX_LINE_BYTES:
+                self._flush_partial()
+            return
+
+        self._partial = data[cut + 1:]
+        # 整块解码一次再切分，比逐行解码快得多；按换行符切分不会截断 UTF-8 字符
+        lines = data[:cut].decode("utf-8", errors="replace").split("\n")
+        for handler in self._line_handlers:
+            try:
+                for line in lines:
+                    handler(line)
+            except Exception as e:
+                print(f"[WARN] 日志行处理失败: {e}")
+
+    def _flush_partial(self):
+        if self._partial and self._line_handlers:
+            line = self._partial.decode("utf-8", errors="replace")
+            for handler in self._line_handlers:
+                try:
+                    handler(line)
+                except Exception as e:
+                    print(f"[WARN] 日志行处理失败: {e}")
+        self._partial = b""
+
+    def tail_text(self) -> str:
+        """返回尾部缓冲区的文本内容"""
+        with self._lock:
+            data = b"".join(self._tail)
+        if len(data) > self.tail_bytes:
+            data = data[-self.tail_bytes:]
+        return data.decode("utf-8", errors="replace")
+
+    @property
+    def elapsed(self) -> float:
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else time.time()
+        return max(end - self.start_time, 1e-9)
+
+    def throughput_mbps(self) -> float:
+        """平均吞吐量（MB/s）"""
+        return self.bytes_total / (1024 * 1024) / self.elapsed
+
+    def summary(self) -> str:
+        return (f"共转发 {self.bytes_total / (1024 * 1024):.2f} MB 输出, "
+                f"平均 {self.throughput_mbps():.1f} MB/s")
+
+    @staticmethod
+    def _terminal_buffer():
+        return getattr(sys.stdout, "buffer", None) or _TextWriter(sys.stdout)
+
+
+class _TextWriter:
+    """为没有 .buffer 的 stdout（如被测试框架替换时）提供字节写入接口"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        self.stream.write(data.decode("utf-8", errors="replace"))
+
+    def flush(self):
+        self.stream.flush()
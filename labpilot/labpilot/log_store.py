@@ -0,0 +1,157 @@
+"""
+LabPilot 日志存储模块
+将每次实验的完整输出保存为定长的压缩分段，并在数据库中记录行号/字节偏移索引
+"""
+
+import gzip
+import os
+import shutil
+import threading
+from typing import Iterator, List, Optional
+
+
+# 每个分段的原始大小（压缩前）
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+
+# 压缩等级：日志文本在低等级下也有很高的压缩比，较低等级可避免拖慢日志转发
+DEFAULT_COMPRESS_LEVEL = 3
+
+
+def default_log_dir(db_path: str) -> str:
+    """默认日志目录：与数据库文件放在同一目录下"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "labpilot_logs")
+
+
+class LogSegmentWriter:
+    """分段写入器，可直接作为 LogPump 的 sink 使用
+
+    在内存中最多缓存一个分段，达到大小后在最后一个换行处切分、压缩并写盘，
+    每个分段的起始行号与字节偏移记录到数据库。写入与关闭互斥：转发线程未结束时
+    主线程仍可以追加说明并关闭，不会有两个分段使用同一个序号。
+    """
+
+    def __init__(self, store: "LogStore", experiment_id: int,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 compress_level: int = DEFAULT_COMPRESS_LEVEL):
+        self.store = store
+        self.experiment_id = experiment_id
+        self.segment_bytes = segment_bytes
+        self.compress_level = compress_level
+
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.line_count = 0
+        self.segment_count = 0
+
+        self._buffer = bytearray()
+        self._closed = False
+        self._lock = threading.Lock()
+        os.makedirs(self.store.experiment_dir(experiment_id), exist_ok=True)
+
+    def write(self, chunk: bytes):
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer += chunk
+            while len(self._buffer) >= self.segment_bytes:
+                cut = self._buffer.rfind(b"\n", 0, self.segment_bytes * 2) + 1
+                if cut <= 0:
+                    # 超长的单行，只能硬切分
+                    cut = self.segment_bytes
+                self._write_segment(bytes(self._buffer[:cut]))
+                del self._buffer[:cut]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """写出剩余内容"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._buffer:
+                self._write_segment(bytes(self._buffer))
+                self._buffer = bytearray()
+            self._closed = True
+
+    def _write_segment(self, data: bytes):
+        rel_path = self.store.segment_path(self.experiment_id, self.segment_count)
+        compressed = gzip.compress(data, compresslevel=self.compress_level)
+        with open(os.path.join(self.store.log_dir, rel_path), "wb") as f:
+            f.write(compressed)
+
+        lines = data.count(b"\n")
+        self.store.db.insert_log_segment(
+            self.experiment_id, self.segment_count, rel_path,
+            self.line_count, lines, self.raw_bytes, len(data), len(compressed)
+        )
+
+        self.segment_count += 1
+        self.line_count += lines
+        self.raw_bytes += len(data)
+        self.stored_bytes += len(compressed)
+
+    def compression_ratio(self) -> float:
+        if not self.stored_bytes:
+            return 0.0
+        return self.raw_bytes / self.stored_bytes
+
+
+class LogStore:
+    """实验完整日志的存储与按行检索"""
+
+    def __init__(self, log_dir: str, db):
+        self.log_dir = log_dir
+        self.db = db
+
+    def experiment_dir(self, experiment_id: int) -> str:
+        return os.path.join(self.log_dir, str(experiment_id))
+
+    @staticmethod
+    def segment_path(experiment_id: int, seq: int) -> str:
+        return f"{experiment_id}/{seq:06d}.log.gz"
+
+    def open_writer(self, experiment_id: int, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                    compress_level: int = DEFAULT_COMPRESS_LEVEL) -> LogSegmentWriter:
+        return LogSegmentWriter(self, experiment_id, segment_bytes, compress_level)
+
+    def _read_segment(self, segment: dict) -> str:
+        with open(os.path.join(self.log_dir, segment['path']), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8", errors="replace")
+
+    def iter_lines(self, experiment_id: int, start: int = 1,
+                   end: Optional[int] = None) -> Iterator[str]:
+        """按行号（从 1 开始，包含 end）读取日志，只解压覆盖该区间的分段"""
+        start = max(start, 1)
+        line_no = None
+        carry = ""
+        for segment in self.db.get_log_segments(experiment_id, start_line=start):
+            if line_no is None:
+                line_no = segment['first_line'] + 1
+            text = carry + self._read_segment(segment)
+            lines = text.split("\n")
+            carry = lines.pop()
+            for line in lines:
+                if line_no >= start:
+                    if end is not None and line_no > end:
+                        return
+                    yield line
+                line_no += 1
+        if carry and line_no is not None and line_no >= start and (end is None or line_no <= end):
+            yield carry
+
+    def read_lines(self, experiment_id: int, start: int = 1,
+                   end: Optional[int] = None) -> List[str]:
+        return list(self.iter_lines(experiment_id, start, end))
+
+    def total_lines(self, experiment_id: int) -> int:
+        segments = self.db.get_log_segments(experiment_id)
+        if not segments:
+            return 0
+        last = segments[-1]
+        return last['first_line'] + last['line_count']
+
+    def delete(self, experiment_id: int):
+        """删除实验的日志文件和索引"""
+        shutil.rmtree(self.experiment_dir(experiment_id), ignore_errors=True)
+        self.db.delete_log_segments(experiment_id)
@@ -0,0 +1,131 @@
+"""
+LabPilot 指标提取模块
+逐行从实验输出中提取 (step, name, value) 指标点，并提供曲线降采样
+"""
+
+import re
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+_NUMBER = r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+
+# 默认指标规则：名称 -> 正则（第一个捕获组为数值）
+DEFAULT_METRIC_PATTERNS = {
+    'loss': r'\bloss\s*[=:]\s*' + _NUMBER,
+    'acc': r'\bacc(?:uracy)?\s*[=:]\s*' + _NUMBER,
+    'lr': r'\blr\s*[=:]\s*' + _NUMBER,
+}
+
+# 默认 step 规则，匹配 "step 100"、"step=100"、"iter: 100" 等
+DEFAULT_STEP_PATTERN = r'\b(?:step|iter(?:ation)?)\s*[=:]?\s*(\d+)'
+
+Point = Tuple[int, str, float]
+
+
+class MetricExtractor:
+    """流式指标提取器
+
+    作为 LogPump 的行回调使用，每行只做一次正则匹配，
+    提取出的指标点先缓存，再按批次交给 sink 写入数据库。
+    """
+
+    def __init__(self, patterns: Optional[Dict[str, str]] = None,
+                 step_pattern: Optional[str] = None,
+                 sink: Optional[Callable[[List[Point]], None]] = None,
+                 batch_size: int = 1000, flush_interval: float = 5.0):
+        patterns = patterns or DEFAULT_METRIC_PATTERNS
+        self.patterns = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in patterns.items()]
+        self.step_pattern = re.compile(step_pattern or DEFAULT_STEP_PATTERN, re.IGNORECASE)
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.step = None
+        self.latest: Dict[str, Tuple[int, float]] = {}
+        self.points_total = 0
+
+        self._counters: Dict[str, int] = {}
+        self._pending: List[Point] = []
+        self._last_flush = time.time()
+
+    def feed_line(self, line: str) -> List[Point]:
+        """处理一行输出，返回本行提取出的指标点"""
+        match = self.step_pattern.search(line)
+        if match:
+            self.step = int(match.group(1))
+
+        points = []
+        for name, pattern in self.patterns:
+            match = pattern.search(line)
+            if not match:
+                continue
+            try:
+                value = float(match.group(1))
+            except (TypeError, ValueError):
+                continue
+
+            if self.step is not None:
+                step = self.step
+            else:
+                # 日志中没有 step 时按该指标出现的次数计数
+                step = self._counters.get(name, 0)
+                self._counters[name] = step + 1
+
+            points.append((step, name, value))
+            self.latest[name] = (step, value)
+
+        if points:
+            self.points_total += len(points)
+            self._pending.extend(points)
+            if (len(self._pending) >= self.batch_size
+                    or time.time() - self._last_flush >= self.flush_interval):
+                self.flush()
+        return points
+
+    def flush(self):
+        """将缓存的指标点写入 sink"""
+        self._last_flush = time.time()
+        if not self._pending or self.sink is None:
+            self._pending = []
+            return
+        pending, self._pending = self._pending, []
+        self.sink(pending)
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[Tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets 降采样，保留曲线的视觉形状"""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        # 当前桶中与前一个选中点、下一个桶平均点构成最大三角形的点
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
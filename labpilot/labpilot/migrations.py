@@ -0,0 +1,517 @@
+"""
+LabPilot 数据库迁移模块
+以 PRAGMA user_version 记录数据库结构版本，打开数据库时按顺序执行尚未应用的迁移；
+耗时的数据回填在迁移之后分批进行，不会长时间占用写锁
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from .params import INSERT_PARAMS, param_rows, parse_command
+
+# 版本 1：引入迁移之前的全部表（均为 CREATE ... IF NOT EXISTS，可在已有数据库上重复执行）
+BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS experiments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_time TEXT NOT NULL,
+        end_time TEXT,
+        server TEXT,
+        command TEXT NOT NULL,
+        commit_hash TEXT,
+        commit_message TEXT,
+        params TEXT,
+        ckpt_path TEXT,
+        duration REAL,
+        status TEXT,
+        log_snippet TEXT,
+        exit_code INTEGER
+    );
+
+    -- 完整日志分段索引：每个分段的起始行号与原始字节偏移
+    CREATE TABLE IF NOT EXISTS log_segments (
+        experiment_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        first_line INTEGER NOT NULL,
+        line_count INTEGER NOT NULL,
+        byte_offset INTEGER NOT NULL,
+        raw_bytes INTEGER NOT NULL,
+        stored_bytes INTEGER NOT NULL,
+        PRIMARY KEY (experiment_id, seq)
+    );
+    CREATE INDEX IF NOT EXISTS idx_log_segments_line
+    ON log_segments (experiment_id, first_line);
+
+    -- 从实验输出中流式提取的指标时间序列
+    CREATE TABLE IF NOT EXISTS metrics (
+        experiment_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        step INTEGER NOT NULL,
+        value REAL,
+        PRIMARY KEY (experiment_id, name, step)
+    ) WITHOUT ROWID;
+
+    -- 资源采样数据：每行是一个按列差分编码并压缩的样本块
+    CREATE TABLE IF NOT EXISTS telemetry (
+        experiment_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        start_time REAL NOT NULL,
+        fields TEXT NOT NULL,
+        sample_count INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (experiment_id, seq)
+    );
+
+    -- 通知发件箱：labrun 只负责写入，由后台进程投递并在失败时退避重试
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dedupe_key TEXT NOT NULL UNIQUE,
+        channel TEXT NOT NULL,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        tags TEXT,
+        priority TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        lease_until REAL,
+        created_at REAL NOT NULL,
+        sent_at REAL,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_due
+    ON notification_outbox (status, next_attempt_at);
+
+    -- 各通知渠道的令牌桶状态，由所有 labrun 和投递进程共享
+    CREATE TABLE IF NOT EXISTS notification_rate_limits (
+        channel TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+
+    -- 每次运行的 AI 提交信息缓存命中统计
+    CREATE TABLE IF NOT EXISTS ai_cache_stats (
+        experiment_id INTEGER PRIMARY KEY,
+        hits INTEGER NOT NULL,
+        misses INTEGER NOT NULL
+    );
+"""
+
+# start_time / end_time 是本地时间的 ISO 文本，'utc' 修饰符按本机时区换算为 Unix 毫秒时间戳
+_EPOCH_MS = "CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+# 版本 2：整数时间戳列（由触发器维护，任何写入方只需写 ISO 时间）与覆盖列表筛选、排序和统计的复合索引
+SCHEMA_V2 = f"""
+    ALTER TABLE experiments ADD COLUMN start_ts INTEGER;
+    ALTER TABLE experiments ADD COLUMN end_ts INTEGER;
+
+    CREATE TRIGGER IF NOT EXISTS experiments_ts_insert
+    AFTER INSERT ON experiments
+    BEGIN
+        UPDATE experiments
+        SET start_ts = COALESCE({_EPOCH_MS.format(column='NEW.start_time')}, 0),
+            end_ts = {_EPOCH_MS.format(column='NEW.end_time')}
+        WHERE id = NEW.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiments_ts_update
+    AFTER UPDATE OF start_time, end_time ON experiments
+    BEGIN
+        UPDATE experiments
+        SET start_ts = COALESCE({_EPOCH_MS.format(column='NEW.start_time')}, 0),
+            end_ts = {_EPOCH_MS.format(column='NEW.end_time')}
+        WHERE id = NEW.id;
+    END;
+
+    -- 列表按时间倒序分页，id 用于区分同一毫秒开始的实验
+    CREATE INDEX IF NOT EXISTS idx_experiments_start ON experiments (start_ts, id);
+    CREATE INDEX IF NOT EXISTS idx_experiments_status_start ON experiments (status, start_ts, id);
+    CREATE INDEX IF NOT EXISTS idx_experiments_server_start ON experiments (server, start_ts, id);
+"""
+
+_FTS_COLUMNS = "command, params, log_snippet, commit_message, ckpt_path"
+_FTS_NEW = "NEW.command, NEW.params, NEW.log_snippet, NEW.commit_message, NEW.ckpt_path"
+_FTS_OLD = "OLD.command, OLD.params, OLD.log_snippet, OLD.commit_message, OLD.ckpt_path"
+
+# 记录迁移状态和后台回填进度的键值表，多个版本都可能先用到它
+_SCHEMA_META = """
+    CREATE TABLE IF NOT EXISTS schema_meta (
+        key TEXT PRIMARY KEY,
+        value
+    );"""
+
+# 全文索引只包含 id 不小于 schema_meta.fts_backfill_before 的实验（没有该记录时包含全部实验）；
+# 更早的实验由后台回填建立索引，触发器不处理它们，以免对尚未索引的行执行 'delete'
+_FTS_INDEXED = "{row}.id >= COALESCE((SELECT value FROM schema_meta WHERE key = 'fts_backfill_before'), 0)"
+
+# 版本 3：实验全文索引（外部内容表，不重复存储文本），由触发器随 experiments 的增删改同步；
+# 1~3 个字符的前缀索引让搜索框输入前几个字符时无需展开大量词项。
+# 已有实验不在迁移事务中重建索引（百万行约需 25 秒，超过其他写入方的 busy_timeout），而是在后台分批回填
+SCHEMA_V3 = f"""{_SCHEMA_META}
+    INSERT OR REPLACE INTO schema_meta (key, value)
+    SELECT 'fts_backfill_before', MAX(id) + 1 FROM experiments HAVING COUNT(*) > 0;
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS experiments_fts USING fts5(
+        {_FTS_COLUMNS},
+        content='experiments', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='1 2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS experiments_fts_insert
+    AFTER INSERT ON experiments WHEN {_FTS_INDEXED.format(row='NEW')}
+    BEGIN
+        INSERT INTO experiments_fts (rowid, {_FTS_COLUMNS}) VALUES (NEW.id, {_FTS_NEW});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiments_fts_delete
+    AFTER DELETE ON experiments WHEN {_FTS_INDEXED.format(row='OLD')}
+    BEGIN
+        INSERT INTO experiments_fts (experiments_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', OLD.id, {_FTS_OLD});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiments_fts_update
+    AFTER UPDATE OF {_FTS_COLUMNS} ON experiments WHEN {_FTS_INDEXED.format(row='OLD')}
+    BEGIN
+        INSERT INTO experiments_fts (experiments_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', OLD.id, {_FTS_OLD});
+        INSERT INTO experiments_fts (rowid, {_FTS_COLUMNS}) VALUES (NEW.id, {_FTS_NEW});
+    END;
+"""
+
+# 实验开始时间所在的小时（Unix 时间戳 / 3600），start_time 无法解析时记为 0
+_HOUR = "COALESCE(CAST((julianday({column}, 'utc') - 2440587.5) * 24 AS INTEGER), 0)"
+
+_STATS_ADD = """
+        INSERT INTO experiment_stats (status, server, count)
+        VALUES (IFNULL({row}.status, ''), IFNULL({row}.server, ''), 1)
+        ON CONFLICT (status, server) DO UPDATE SET count = count + 1;"""
+
+_STATS_REMOVE = """
+        UPDATE experiment_stats SET count = count - 1
+        WHERE status = IFNULL({row}.status, '') AND server = IFNULL({row}.server, '');
+        DELETE FROM experiment_stats
+        WHERE status = IFNULL({row}.status, '') AND server = IFNULL({row}.server, '') AND count <= 0;"""
+
+_HOURLY_ADD = """
+        INSERT INTO experiment_stats_hourly (hour, count) VALUES ({hour}, 1)
+        ON CONFLICT (hour) DO UPDATE SET count = count + 1;"""
+
+_HOURLY_REMOVE = """
+        UPDATE experiment_stats_hourly SET count = count - 1 WHERE hour = {hour};
+        DELETE FROM experiment_stats_hourly WHERE hour = {hour} AND count <= 0;"""
+
+_NEW_HOUR = _HOUR.format(column='NEW.start_time')
+_OLD_HOUR = _HOUR.format(column='OLD.start_time')
+
+# 统计表只汇总 id 不小于 schema_meta.stats_backfill_before 的实验（没有该记录时汇总全部实验），
+# 更早的实验由后台分批累加，触发器不处理它们
+_STATS_COUNTED = "{row}.id >= COALESCE((SELECT value FROM schema_meta WHERE key = 'stats_backfill_before'), 0)"
+
+# 清空统计表并从最新的实验起重新累加，迁移和 labpilot stats --rebuild 共用；
+# 全表汇总不在一个写事务中完成，由 backfill_stats 分批进行
+RESET_STATS = [
+    "DELETE FROM experiment_stats",
+    "DELETE FROM experiment_stats_hourly",
+    """
+    INSERT OR REPLACE INTO schema_meta (key, value)
+    SELECT 'stats_backfill_before', MAX(id) + 1 FROM experiments HAVING COUNT(*) > 0
+    """,
+]
+
+_RESET_STATS_SCRIPT = "".join(f"{statement.strip()};\n" for statement in RESET_STATS)
+
+_STATS_TRIGGERS = f"""
+    CREATE TRIGGER IF NOT EXISTS experiment_stats_insert
+    AFTER INSERT ON experiments WHEN {_STATS_COUNTED.format(row='NEW')}
+    BEGIN{_STATS_ADD.format(row='NEW')}{_HOURLY_ADD.format(hour=_NEW_HOUR)}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiment_stats_delete
+    AFTER DELETE ON experiments WHEN {_STATS_COUNTED.format(row='OLD')}
+    BEGIN{_STATS_REMOVE.format(row='OLD')}{_HOURLY_REMOVE.format(hour=_OLD_HOUR)}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiment_stats_update
+    AFTER UPDATE OF status, server ON experiments WHEN {_STATS_COUNTED.format(row='OLD')}
+    BEGIN{_STATS_REMOVE.format(row='OLD')}{_STATS_ADD.format(row='NEW')}
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS experiment_stats_hourly_update
+    AFTER UPDATE OF start_time ON experiments WHEN {_STATS_COUNTED.format(row='OLD')}
+    BEGIN{_HOURLY_REMOVE.format(hour=_OLD_HOUR)}{_HOURLY_ADD.format(hour=_NEW_HOUR)}
+    END;
+"""
+
+# 版本 4：由触发器在写入实验时同步更新的统计汇总表，统计接口只读汇总表而不扫描实验表。
+# experiment_stats 按 (状态, 服务器) 计数（NULL 记为空字符串），
+# experiment_stats_hourly 按开始时间所在的小时计数，用于最近 24 小时的统计
+SCHEMA_V4 = f"""{_SCHEMA_META}
+
+    CREATE TABLE IF NOT EXISTS experiment_stats (
+        status TEXT NOT NULL,
+        server TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (status, server)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS experiment_stats_hourly (
+        hour INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL
+    );
+
+{_STATS_TRIGGERS}
+    {_RESET_STATS_SCRIPT}
+"""
+
+# 版本 5：按键值保存的结构化超参数（由命令解析得到），数值和文本分列并各自建索引，
+# 可以直接按 lr=1e-4、batch_size>=64 等条件定位实验。迁移前的实验在后台从 command 列解析回填，
+# schema_meta 中记录回填进度：id 小于该值的实验尚未回填
+SCHEMA_V5 = f"""
+    CREATE TABLE IF NOT EXISTS experiment_params (
+        experiment_id INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        num_value REAL,
+        text_value TEXT NOT NULL,
+        PRIMARY KEY (experiment_id, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_experiment_params_num ON experiment_params (key, num_value);
+    CREATE INDEX IF NOT EXISTS idx_experiment_params_text ON experiment_params (key, text_value);
+
+    CREATE TRIGGER IF NOT EXISTS experiment_params_delete
+    AFTER DELETE ON experiments
+    BEGIN
+        DELETE FROM experiment_params WHERE experiment_id = OLD.id;
+    END;
+
+    {_SCHEMA_META}
+    INSERT OR REPLACE INTO schema_meta (key, value)
+    SELECT 'params_backfill_before', MAX(id) + 1 FROM experiments HAVING COUNT(*) > 0;
+"""
+
+# 递增写入序号。实验表由触发器递增；只写 experiment_params 的操作（参数回填、set_params）
+# 也会改变列表接口的结果，需在同一事务中执行该语句
+BUMP_DATA_VERSION = "UPDATE schema_meta SET value = value + 1 WHERE key = 'data_version'"
+
+_BUMP_DATA_VERSION = f"""
+    BEGIN
+        {BUMP_DATA_VERSION};
+    END;"""
+
+# 版本 6：实验表的写入序号。每次插入、更新、删除实验时由触发器加一，随写入事务一起提交，
+# 所有连接和进程看到的值一致（PRAGMA data_version 是每个连接各自的计数，不能跨连接比较）。
+# API 由 (instance, data_version) 生成 ETag；instance 区分重建或替换后的数据库文件
+SCHEMA_V6 = f"""
+    INSERT OR IGNORE INTO schema_meta (key, value) VALUES ('data_version', 0);
+    INSERT OR IGNORE INTO schema_meta (key, value) VALUES ('instance', lower(hex(randomblob(8))));
+
+    CREATE TRIGGER IF NOT EXISTS experiments_data_version_insert
+    AFTER INSERT ON experiments{_BUMP_DATA_VERSION}
+
+    CREATE TRIGGER IF NOT EXISTS experiments_data_version_update
+    AFTER UPDATE ON experiments{_BUMP_DATA_VERSION}
+
+    CREATE TRIGGER IF NOT EXISTS experiments_data_version_delete
+    AFTER DELETE ON experiments{_BUMP_DATA_VERSION}
+"""
+
+# 版本 7：统计触发器改为只处理已汇总的实验（见 _STATS_COUNTED），
+# 在早先创建的数据库上执行 labpilot stats --rebuild 时也能分批重建而不重复计数
+SCHEMA_V7 = f"""
+    DROP TRIGGER IF EXISTS experiment_stats_insert;
+    DROP TRIGGER IF EXISTS experiment_stats_delete;
+    DROP TRIGGER IF EXISTS experiment_stats_update;
+    DROP TRIGGER IF EXISTS experiment_stats_hourly_update;
+{_STATS_TRIGGERS}
+"""
+
+# 每批回填的行数；每批是一个独立的短事务，其间其他进程可以正常写入
+BACKFILL_BATCH_SIZE = 5000
+
+# 迁移列表: (版本号, 建表脚本)，版本号从 1 开始连续递增
+MIGRATIONS: List[Tuple[int, str]] = [
+    (1, BASE_SCHEMA),
+    (2, SCHEMA_V2),
+    (3, SCHEMA_V3),
+    (4, SCHEMA_V4),
+    (5, SCHEMA_V5),
+    (6, SCHEMA_V6),
+    (7, SCHEMA_V7),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def split_statements(script: str) -> List[str]:
+    """把脚本切分为单条语句（触发器体内的分号不会被切开）"""
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        if not buffer and (not line.strip() or line.strip().startswith('--')):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def schema_version(storage) -> int:
+    return storage.query_one("PRAGMA user_version")[0]
+
+
+def migrate(storage) -> int:
+    """执行尚未应用的迁移，返回迁移后的版本号
+
+    每个版本在一个写事务中执行并更新 user_version，多个进程同时打开数据库时
+    只有先拿到写锁的进程执行迁移，其他进程在事务内重新读取版本后跳过。
+    """
+    version = schema_version(storage)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    for target, script in MIGRATIONS:
+        if target <= version:
+            continue
+
+        def apply(conn, target=target, script=script):
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current >= target:
+                return current
+            for statement in split_statements(script):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+            return target
+
+        version = storage.write(apply)
+    return version
+
+
+def backfill_timestamps(storage, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.01) -> int:
+    """为迁移前写入的实验回填 start_ts / end_ts，返回回填的行数
+
+    从最新的实验开始回填，看板首页最先得到正确的排序；
+    每批之间短暂让出写锁，回填期间 labrun 的写入不会被阻塞。
+    """
+    total = 0
+    while True:
+        cursor = storage.execute(f"""
+            UPDATE experiments
+            SET start_ts = COALESCE({_EPOCH_MS.format(column='start_time')}, 0),
+                end_ts = {_EPOCH_MS.format(column='end_time')}
+            WHERE id IN (
+                SELECT id FROM experiments WHERE start_ts IS NULL ORDER BY id DESC LIMIT ?
+            )
+        """, (batch_size,))
+        total += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return total
+        time.sleep(pause)
+
+
+def _backfill_below(storage, key: str, fill: Callable, batch_size: int, pause: float) -> int:
+    """按 schema_meta 中 key 记录的位置从新到旧分批回填，返回处理的实验数
+
+    id 小于该值的实验尚未回填；每批在一个短写事务中调用 fill(conn, low, high) 处理
+    low <= id < high 的实验并下移位置，全部完成后删除该记录。
+    """
+    def step(conn):
+        row = conn.execute("SELECT value FROM schema_meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0
+        low, count = conn.execute(
+            "SELECT MIN(id), COUNT(*) FROM (SELECT id FROM experiments WHERE id < ? ORDER BY id DESC LIMIT ?)",
+            (row[0], batch_size)
+        ).fetchone()
+        if not count:
+            conn.execute("DELETE FROM schema_meta WHERE key = ?", (key,))
+            return 0
+        fill(conn, low, row[0])
+        conn.execute("UPDATE schema_meta SET value = ? WHERE key = ?", (low, key))
+        # 回填改变了列表和搜索的结果
+        conn.execute(BUMP_DATA_VERSION)
+        return count
+
+    total = 0
+    while True:
+        count = storage.write(step)
+        if not count:
+            return total
+        total += count
+        time.sleep(pause)
+
+
+def backfill_fts(storage, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.01) -> int:
+    """为迁移前写入的实验建立全文索引，返回处理的实验数（从最新的实验开始）"""
+    def fill(conn, low, high):
+        conn.execute(f"""
+            INSERT INTO experiments_fts (rowid, {_FTS_COLUMNS})
+            SELECT id, {_FTS_COLUMNS} FROM experiments WHERE id >= ? AND id < ?
+        """, (low, high))
+
+    return _backfill_below(storage, 'fts_backfill_before', fill, batch_size, pause)
+
+
+def backfill_stats(storage, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.01) -> int:
+    """把迁移或重建前写入的实验累加到统计表，返回处理的实验数"""
+    def fill(conn, low, high):
+        conn.execute("""
+            INSERT INTO experiment_stats (status, server, count)
+            SELECT IFNULL(status, ''), IFNULL(server, ''), COUNT(*) FROM experiments
+            WHERE id >= ? AND id < ? GROUP BY 1, 2
+            ON CONFLICT (status, server) DO UPDATE SET count = count + excluded.count
+        """, (low, high))
+        conn.execute(f"""
+            INSERT INTO experiment_stats_hourly (hour, count)
+            SELECT {_HOUR.format(column='start_time')}, COUNT(*) FROM experiments
+            WHERE id >= ? AND id < ? GROUP BY 1
+            ON CONFLICT (hour) DO UPDATE SET count = count + excluded.count
+        """, (low, high))
+
+    return _backfill_below(storage, 'stats_backfill_before', fill, batch_size, pause)
+
+
+def backfill_params(storage, batch_size: int = 1000, pause: float = 0.01) -> int:
+    """为迁移前写入的实验解析并回填结构化超参数，返回处理的实验数（同样从最新的实验开始）"""
+    def fill(conn, low, high):
+        rows = conn.execute("SELECT id, command FROM experiments WHERE id >= ? AND id < ?", (low, high)).fetchall()
+        for experiment_id, command in rows:
+            conn.executemany(INSERT_PARAMS, param_rows(experiment_id, parse_command(command or "")))
+
+    return _backfill_below(storage, 'params_backfill_before', fill, batch_size, pause)
+
+
+# 后台回填的进度记录
+BACKFILL_KEYS = ('stats_backfill_before', 'fts_backfill_before', 'params_backfill_before')
+
+
+def needs_backfill(storage) -> bool:
+    return (
+        storage.query_one("SELECT 1 FROM experiments WHERE start_ts IS NULL LIMIT 1") is not None
+        or storage.query_one(
+            f"SELECT 1 FROM schema_meta WHERE key IN ({', '.join('?' * len(BACKFILL_KEYS))})", BACKFILL_KEYS
+        ) is not None
+    )
+
+
+def start_backfill(storage, on_error: Callable[[Exception], None] = None) -> threading.Thread:
+    """在后台线程中回填时间戳、统计表、全文索引和结构化超参数"""
+    def run():
+        try:
+            backfill_timestamps(storage)
+            backfill_stats(storage)
+            backfill_fts(storage)
+            backfill_params(storage)
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                print(f"[WARN] 回填实验数据失败: {e}")
+
+    thread = threading.Thread(target=run, name="labpilot-backfill", daemon=True)
+    thread.start()
+    return thread
@@ -3,18 +3,44 @@ LabPilot 通知模块
 支持钉钉群聊机器人和 ntfy 通知
 """
 
-import requests
-import yaml
-import os
 import hmac
 import hashlib
 import base64
+import threading
 import time
-from typing import Optional, Union
+from typing import Dict, List, Optional
+
+from .config import load_config
+from .http_client import get_http_client
+
+# 多渠道并发发送时的整体时限（秒）
+DEFAULT_DEADLINE = 10
+
+# 各渠道每分钟最多发送的消息数（钉钉、企业微信机器人 20 条/分钟，飞书 100 条/分钟）
+DEFAULT_RATE_LIMITS = {'dingtalk': 20, 'wecom': 20, 'feishu': 100, 'ntfy': 60}
+
+# 汇总消息中逐条列出的通知数
+DIGEST_MAX_ITEMS = 10
+
+# 通知 tags 对应的汇总类别
+DIGEST_KINDS = {
+    'hourglass_done': 'started',
+    'white_check_mark': 'ok',
+    'x': 'failed',
+    'no_entry_sign': 'aborted',
+    'chart_with_upwards_trend': 'progress',
+}
+
+
+def _post(url: str, **kwargs):
+    """通过进程内共享的 HTTP 客户端发送，同一 webhook 的多次通知复用连接"""
+    return get_http_client().post(url, **kwargs)
 
 
 class BaseNotifier:
     """通知器基类"""
+    name = 'base'
+
     def __init__(self, config=None):
         self.config = config or {}
 
@@ -51,6 +77,23 @@ class BaseNotifier:
         
         return self.send_notification(title, message, "x", "high")
 
+    def send_progress_notification(self, server: str, command: str, commit_hash: str,
+                                   elapsed: str, progress: str = "", metrics: Optional[Dict[str, float]] = None,
+                                   log_tail: str = "") -> bool:
+        title = "📈 实验进行中"
+        message = f"[{server}] {command}\nCommit: {commit_hash[:7]}\nElapsed: {elapsed}"
+        
+        if progress:
+            message += f"\nProgress: {progress}"
+        
+        if metrics:
+            message += "\nMetrics: " + ", ".join(f"{name}={value:.4g}" for name, value in metrics.items())
+        
+        if log_tail:
+            message += f"\nLog:\n{log_tail[-500:]}"
+        
+        return self.send_notification(title, message, "chart_with_upwards_trend", "low")
+
     def send_abort_notification(self, server: str, command: str, commit_hash: str, 
                                 duration: str, log_snippet: str = "") -> bool:
         title = "🚫 实验中断"
@@ -69,6 +112,8 @@ class BaseNotifier:
 
 class DingTalkNotifier(BaseNotifier):
     """钉钉群聊机器人通知器"""
+    name = 'dingtalk'
+
     def __init__(self, config):
         super().__init__(config)
         self.dingtalk_config = self.config.get('notification', {}).get('dingtalk', {})
@@ -109,7 +154,7 @@ class DingTalkNotifier(BaseNotifier):
         headers = {"Content-Type": "application/json"}
         
         try:
-            response = requests.post(
+            response = _post(
                 final_url,
                 json=payload,
                 headers=headers,
@@ -129,6 +174,8 @@ class DingTalkNotifier(BaseNotifier):
 
 class FeishuNotifier(BaseNotifier):
     """飞书自定义机器人通知器"""
+    name = 'feishu'
+
     def __init__(self, config):
         super().__init__(config)
         self.feishu_config = self.config.get('notification', {}).get('feishu', {})
@@ -173,7 +220,7 @@ class FeishuNotifier(BaseNotifier):
             payload["sign"] = base64.b64encode(hmac_code).decode('utf-8')
 
         try:
-            response = requests.post(
+            response = _post(
                 webhook_url,
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -192,6 +239,8 @@ class FeishuNotifier(BaseNotifier):
 
 class WeComNotifier(BaseNotifier):
     """企业微信/微信机器人通知器"""
+    name = 'wecom'
+
     def __init__(self, config):
         super().__init__(config)
         notification_config = self.config.get('notification', {})
@@ -214,7 +263,7 @@ class WeComNotifier(BaseNotifier):
         }
 
         try:
-            response = requests.post(
+            response = _post(
                 webhook_url,
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -233,6 +282,8 @@ class WeComNotifier(BaseNotifier):
 
 class NtfyNotifier(BaseNotifier):
     """ntfy 通知器"""
+    name = 'ntfy'
+
     def __init__(self, config):
         super().__init__(config)
         self.ntfy_config = self.config.get('notification', {}).get('ntfy', {})
@@ -264,7 +315,7 @@ class NtfyNotifier(BaseNotifier):
             auth = (username, password)
             
         try:
-            response = requests.post(
+            response = _post(
                 url,
                 data=message.encode('utf-8'),
                 headers=headers,
@@ -284,37 +335,149 @@ class NtfyNotifier(BaseNotifier):
 
 
 class MultiNotifier(BaseNotifier):
-    """组合通知器，支持同时发送多种通知"""
-    def __init__(self, config, notifiers):
+    """组合通知器，支持同时发送多种通知
+
+    各渠道在独立线程中并发发送，整体受 deadline（秒）约束：某个 webhook 无响应时
+    不会拖慢其他渠道，也不会让调用方等待超过 deadline。
+    每个渠道的结果记录在 last_results 中，True/False 为发送结果，None 表示超时未完成。
+    """
+    name = 'multi'
+
+    def __init__(self, config, notifiers, deadline: Optional[float] = None):
         super().__init__(config)
         self.notifiers = notifiers
+        if deadline is None:
+            deadline = self.config.get('notification', {}).get('deadline', DEFAULT_DEADLINE)
+        self.deadline = float(deadline)
+        self.last_results: Dict[str, Optional[bool]] = {}
 
     def send_notification(self, title: str, message: str, tags: str = "", priority: str = "default") -> bool:
-        results = []
-        for notifier in self.notifiers:
-            results.append(notifier.send_notification(title, message, tags, priority))
-        return any(results)
+        results: Dict[str, Optional[bool]] = {notifier.name: None for notifier in self.notifiers}
+
+        def send(notifier):
+            try:
+                results[notifier.name] = notifier.send_notification(title, message, tags, priority)
+            except Exception as e:
+                print(f"[ERROR] {notifier.name} 通知发送异常: {e}")
+                results[notifier.name] = False
+
+        # 守护线程：超过 deadline 仍未返回的渠道不会阻塞进程退出
+        threads = [
+            threading.Thread(target=send, args=(notifier,), name=f"labpilot-notify-{notifier.name}", daemon=True)
+            for notifier in self.notifiers
+        ]
+        for thread in threads:
+            thread.start()
+        end = time.monotonic() + self.deadline
+        for thread in threads:
+            thread.join(timeout=max(end - time.monotonic(), 0))
+
+        timed_out = [name for name, result in results.items() if result is None]
+        if timed_out:
+            print(f"[WARN] 通知超过 {self.deadline:g}s 未完成: {', '.join(timed_out)}")
+        self.last_results = dict(results)
+        return any(results.values())
+
+
+class TokenBucket:
+    """令牌桶：容量为 burst，每秒补充 rate 个令牌
+
+    桶的状态（剩余令牌数、上次更新时间）由调用方保存，这里只负责计算，
+    因此多个进程可以通过数据库共享同一个桶。
+    任意 60 秒窗口内最多发送 burst + rate * 60 条，默认取 burst 和每分钟补充量各为上限的一半，
+    保证即使桶满时突发也不会超过渠道的每分钟限制。
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        per_minute = float(per_minute)
+        self.burst = float(burst) if burst is not None else max(per_minute // 2, 1.0)
+        self.rate = max(per_minute - self.burst, 1.0) / 60.0
+
+    def take(self, tokens: Optional[float], updated_at: Optional[float], now: float):
+        """尝试取出一个令牌，返回 (新的令牌数, 需要等待的秒数)；等待 0 秒表示已取得令牌"""
+        if tokens is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, tokens + max(now - updated_at, 0.0) * self.rate)
+        if tokens >= 1.0:
+            return tokens - 1.0, 0.0
+        return tokens, (1.0 - tokens) / self.rate
+
+
+class RateLimiter:
+    """按渠道限流，桶的状态保存在数据库中，并发运行的 labrun 和投递进程共享同一份配额"""
+
+    def __init__(self, db, buckets: Dict[str, TokenBucket]):
+        self.db = db
+        self.buckets = buckets
+
+    @classmethod
+    def from_config(cls, config: dict, db) -> Optional['RateLimiter']:
+        """按 notification.rate_limit 创建限流器，未启用时返回 None"""
+        rate_config = config.get('notification', {}).get('rate_limit', {}) or {}
+        if not rate_config.get('enabled', True):
+            return None
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(rate_config.get('per_minute', {}) or {})
+        burst = rate_config.get('burst', {}) or {}
+        buckets = {
+            channel: TokenBucket(per_minute, burst.get(channel))
+            for channel, per_minute in limits.items() if per_minute
+        }
+        return cls(db, buckets)
+
+    def acquire(self, channel: str) -> float:
+        """为渠道取一个令牌；返回 0 表示可以立即发送，否则为需要等待的秒数"""
+        bucket = self.buckets.get(channel)
+        if bucket is None:
+            return 0.0
+        return self.db.take_rate_token(channel, bucket.take)
+
+
+def build_digest(rows: List[dict]):
+    """把超出限额的多条通知合并为一条汇总消息，返回 (title, message, tags, priority)"""
+    counts = {'started': 0, 'ok': 0, 'failed': 0, 'aborted': 0, 'progress': 0, 'other': 0}
+    for row in rows:
+        counts[DIGEST_KINDS.get(row.get('tags') or '', 'other')] += 1
+
+    lines = []
+    finished = counts['ok'] + counts['failed'] + counts['aborted']
+    if finished:
+        parts = [f"{counts['ok']} 成功"]
+        if counts['failed']:
+            parts.append(f"{counts['failed']} 失败")
+        if counts['aborted']:
+            parts.append(f"{counts['aborted']} 中断")
+        lines.append(f"{finished} 个实验结束: {', '.join(parts)}")
+    if counts['started']:
+        lines.append(f"{counts['started']} 个实验开始")
+    if counts['progress']:
+        lines.append(f"进度更新 {counts['progress']} 条")
+    if counts['other']:
+        lines.append(f"其他通知 {counts['other']} 条")
+
+    lines.append("")
+    for row in rows[:DIGEST_MAX_ITEMS]:
+        first_line = (row.get('message') or '').split('\n', 1)[0]
+        lines.append(f"- {row.get('title', '')} {first_line}")
+    if len(rows) > DIGEST_MAX_ITEMS:
+        lines.append(f"- ... 以及其他 {len(rows) - DIGEST_MAX_ITEMS} 条")
+
+    title = f"📬 通知汇总 ({len(rows)} 条)"
+    priority = "high" if counts['failed'] or counts['aborted'] else "default"
+    return title, "\n".join(lines), "inbox_tray", priority
+
+
+def send_in_background(send, *args) -> threading.Thread:
+    """在后台守护线程中发送通知（例如开始通知），调用方无需等待网络请求"""
+    thread = threading.Thread(target=send, args=args, name="labpilot-notify", daemon=True)
+    thread.start()
+    return thread
 
 
 def _load_config_data(config_path: Optional[str] = None):
     """加载配置文件数据"""
-    config_paths = []
-    
-    if config_path:
-        config_paths.append(config_path)
-    
-    config_paths.extend([
-        os.path.join(os.getcwd(), ".labpilot.yaml"),
-        os.path.expanduser("~/.labpilot.yaml"),
-        os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-    ])
-    
-    config = {}
-    for path in config_paths:
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            break
+    config = load_config(config_path)
             
     if not config:
         config = {
@@ -330,36 +493,42 @@ def _load_config_data(config_path: Optional[str] = None):
 _notifier_instance = None
 
 
+def build_channel_notifiers(config: dict) -> List[BaseNotifier]:
+    """按 notification.active 创建各渠道的通知器"""
+    notification_config = config.get('notification', {})
+    active_providers = notification_config.get('active', ['dingtalk'])
+    
+    # 兼容旧配置：如果没有 active 字段，检查 dingtalk webhook 是否存在
+    if 'active' not in notification_config:
+        if notification_config.get('dingtalk', {}).get('webhook_url'):
+            active_providers = ['dingtalk']
+        elif notification_config.get('ntfy', {}).get('topic'):
+            active_providers = ['ntfy']
+        else:
+            active_providers = []
+
+    # 如果 active 是字符串，转换为列表
+    if isinstance(active_providers, str):
+        active_providers = [active_providers]
+
+    notifiers = []
+    if 'dingtalk' in active_providers:
+        notifiers.append(DingTalkNotifier(config))
+    if 'ntfy' in active_providers:
+        notifiers.append(NtfyNotifier(config))
+    if 'feishu' in active_providers or 'lark' in active_providers:
+        notifiers.append(FeishuNotifier(config))
+    if 'wecom' in active_providers or 'wechat' in active_providers:
+        notifiers.append(WeComNotifier(config))
+    return notifiers
+
+
 def get_notifier(config_path: Optional[str] = None) -> BaseNotifier:
     """获取通知器实例"""
     global _notifier_instance
     if _notifier_instance is None:
         config = _load_config_data(config_path)
-        notification_config = config.get('notification', {})
-        active_providers = notification_config.get('active', ['dingtalk'])
-        
-        # 兼容旧配置：如果没有 active 字段，检查 dingtalk webhook 是否存在
-        if 'active' not in notification_config:
-            if notification_config.get('dingtalk', {}).get('webhook_url'):
-                active_providers = ['dingtalk']
-            elif notification_config.get('ntfy', {}).get('topic'):
-                active_providers = ['ntfy']
-            else:
-                active_providers = []
-
-        # 如果 active 是字符串，转换为列表
-        if isinstance(active_providers, str):
-            active_providers = [active_providers]
-
-        notifiers = []
-        if 'dingtalk' in active_providers:
-            notifiers.append(DingTalkNotifier(config))
-        if 'ntfy' in active_providers:
-            notifiers.append(NtfyNotifier(config))
-        if 'feishu' in active_providers or 'lark' in active_providers:
-            notifiers.append(FeishuNotifier(config))
-        if 'wecom' in active_providers or 'wechat' in active_providers:
-            notifiers.append(WeComNotifier(config))
+        notifiers = build_channel_notifiers(config)
             
         if len(notifiers) == 1:
             _notifier_instance = notifiers[0]
@@ -368,5 +537,5 @@ def get_notifier(config_path: Optional[str] = None) -> BaseNotifier:
         else:
             # 默认返回 DingTalkNotifier 以保持行为一致（即使没配置，打印错误也好）
             _notifier_instance = DingTalkNotifier(config)
-            
+    
     return _notifier_instance
@@ -0,0 +1,320 @@
+"""
+LabPilot 通知发件箱模块
+labrun 把通知写入数据库的发件箱表后即可退出，由后台投递进程（或 API 服务）负责发送；
+发送失败按指数退避重试，网络短暂不可用时通知不会丢失
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .notify import BaseNotifier, RateLimiter, build_digest
+
+# 首次重试的等待时间（秒），之后每次翻倍
+DEFAULT_BASE_DELAY = 5.0
+
+# 重试等待时间上限（秒）
+DEFAULT_MAX_DELAY = 600.0
+
+# 最多投递次数，超过后标记为 failed
+DEFAULT_MAX_ATTEMPTS = 10
+
+# 投递进程领取通知后的租约时长（秒），进程中途退出时租约过期后由其他进程接手
+DEFAULT_LEASE_SECONDS = 60.0
+
+# 超出渠道限额的通知合并为汇总消息的间隔（秒）
+DEFAULT_DIGEST_INTERVAL = 60.0
+
+
+class OutboxNotifier(BaseNotifier):
+    """把通知写入发件箱而不是直接发送
+
+    每个渠道一行，dedupe_key 为 "<事件键>:<渠道>"；未设置事件键时使用内容哈希，
+    因此同一事件重复写入（例如 labrun 重试）只会发送一次。
+    """
+    name = 'outbox'
+
+    def __init__(self, config, db, channels: List[str], spawn: bool = False):
+        super().__init__(config)
+        self.db = db
+        self.channels = channels
+        self.spawn = spawn
+        self.event_key = None
+
+    def event(self, key: Optional[str]) -> 'OutboxNotifier':
+        """设置后续通知的事件键，例如 "42:start"；返回自身以便链式调用"""
+        self.event_key = key
+        return self
+
+    def send_notification(self, title: str, message: str, tags: str = "", priority: str = "default") -> bool:
+        key = self.event_key or hashlib.sha1(f"{title}\n{message}".encode('utf-8')).hexdigest()
+        for channel in self.channels:
+            self.db.enqueue_notification(f"{key}:{channel}", channel, title, message, tags, priority)
+        if self.spawn and self.channels:
+            # 已有投递进程在运行时，新进程获取不到锁会立即退出
+            spawn_worker(self.db.db_path)
+        return bool(self.channels)
+
+
+class OutboxWorker:
+    """发件箱投递器：领取到期的通知，按渠道发送，失败时指数退避
+
+    配置了 rate_limiter 时，超出渠道限额的通知不再单独发送，而是暂存并每隔
+    digest_interval 秒合并为一条汇总消息（"12 个实验结束: 10 成功, 2 失败"）。
+    """
+
+    def __init__(self, db, notifiers: Dict[str, BaseNotifier],
+                 base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 digest_interval: float = DEFAULT_DIGEST_INTERVAL):
+        self.db = db
+        self.notifiers = notifiers
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.rate_limiter = rate_limiter
+        self.digest_interval = digest_interval
+        self.sent_count = 0
+        self.failed_count = 0
+        self.digest_count = 0
+
+    def backoff(self, attempts: int) -> float:
+        """第 attempts 次失败后的等待时间，带 ±20% 抖动避免多个进程同时重试"""
+        delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _send(self, channel: str, title: str, message: str, tags: str, priority: str) -> Optional[str]:
+        """通过渠道发送一条消息，成功返回 None，否则返回错误信息"""
+        notifier = self.notifiers.get(channel)
+        if notifier is None:
+            return f"渠道未配置: {channel}"
+        try:
+            if not notifier.send_notification(title, message, tags or "", priority or "default"):
+                return "发送失败"
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _record(self, row: dict, error: Optional[str]):
+        """记录一条通知的投递结果"""
+        if error is None:
+            self.db.complete_notification(row['id'])
+            self.sent_count += 1
+            return
+
+        attempts = row['attempts'] + 1
+        if row['channel'] not in self.notifiers or attempts >= self.max_attempts:
+            self.db.retry_notification(row['id'], None, error)
+            self.failed_count += 1
+            print(f"[ERROR] 通知 {row['dedupe_key']} 投递失败，已放弃: {error}")
+        else:
+            self.db.retry_notification(row['id'], time.time() + self.backoff(attempts), error)
+
+    def deliver(self, row: dict):
+        error = self._send(row['channel'], row['title'], row['message'], row['tags'], row['priority'])
+        self._record(row, error)
+
+    def _acquire(self, channel: str) -> float:
+        if self.rate_limiter is None or channel not in self.notifiers:
+            return 0.0
+        return self.rate_limiter.acquire(channel)
+
+    def deliver_due(self, limit: int = 20) -> int:
+        """投递一批到期的通知，返回本批处理的条数（包括暂存待汇总的通知）"""
+        rows = self.db.claim_notifications(limit, self.lease_seconds)
+        for row in rows:
+            if self._acquire(row['channel']):
+                # 超出限额：暂存，到汇总时间后与同渠道的其他暂存通知一起发送
+                self.db.defer_notifications([row['id']], time.time() + self.digest_interval)
+            else:
+                self.deliver(row)
+        return len(rows) + self.deliver_digests()
+
+    def deliver_digests(self) -> int:
+        """把到汇总时间的暂存通知按渠道合并发送，返回涉及的通知条数"""
+        if self.rate_limiter is None:
+            return 0
+        rows = self.db.claim_digests(self.lease_seconds)
+        channels: Dict[str, List[dict]] = {}
+        for row in rows:
+            channels.setdefault(row['channel'], []).append(row)
+
+        for channel, channel_rows in channels.items():
+            wait = self._acquire(channel)
+            if wait:
+                self.db.defer_notifications([row['id'] for row in channel_rows], time.time() + wait)
+                continue
+            if len(channel_rows) == 1:
+                self.deliver(channel_rows[0])
+                continue
+            error = self._send(channel, *build_digest(channel_rows))
+            for row in channel_rows:
+                self._record(row, error)
+            if error is None:
+                self.digest_count += 1
+        return len(rows)
+
+    def run(self, stop: Optional[threading.Event] = None, exit_when_idle: bool = False,
+            poll_interval: float = 1.0):
+        """循环投递；exit_when_idle 时没有待发送通知即退出（已放弃的通知不算待发送）"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.deliver_due():
+                continue
+            stats = self.db.get_outbox_stats()
+            if exit_when_idle and not stats['pending']:
+                return
+            wait = poll_interval
+            if stats['next_attempt_at'] is not None:
+                # 等到最早一条重试到期，但仍按 poll_interval 检查新写入的通知
+                wait = min(max(stats['next_attempt_at'] - time.time(), 0.05), poll_interval)
+            stop.wait(wait)
+
+
+def create_worker(config: dict, db) -> OutboxWorker:
+    """按配置创建投递器，各渠道使用与直接发送相同的通知器"""
+    from .notify import build_channel_notifiers
+
+    notification_config = config.get('notification', {})
+    outbox_config = notification_config.get('outbox', {}) or {}
+    rate_config = notification_config.get('rate_limit', {}) or {}
+    notifiers = {notifier.name: notifier for notifier in build_channel_notifiers(config)}
+    return OutboxWorker(
+        db,
+        notifiers,
+        base_delay=float(outbox_config.get('base_delay', DEFAULT_BASE_DELAY)),
+        max_delay=float(outbox_config.get('max_delay', DEFAULT_MAX_DELAY)),
+        max_attempts=int(outbox_config.get('max_attempts', DEFAULT_MAX_ATTEMPTS)),
+        rate_limiter=RateLimiter.from_config(config, db),
+        digest_interval=float(rate_config.get('digest_interval', DEFAULT_DIGEST_INTERVAL)),
+    )
+
+
+def spawn_worker(db_path: str) -> Optional[subprocess.Popen]:
+    """启动脱离当前会话的投递进程；labrun 退出不影响它继续投递
+
+    进程的输出追加写入数据库旁的 <db>.outbox.log，投递进程启动失败（例如导入出错）时
+    可以在那里找到原因，而不是通知一直停在 pending。
+    """
+    log_path = worker_log_path(db_path)
+    try:
+        with open(log_path, 'ab') as log:
+            return subprocess.Popen(
+                [sys.executable, '-m', 'labpilot.outbox', '--db', os.path.abspath(db_path), '--exit-when-idle'],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+                cwd=os.getcwd(),
+            )
+    except OSError as e:
+        print(f"[WARN] 无法启动通知投递进程: {e}")
+        return None
+
+
+def worker_log_path(db_path: str) -> str:
+    """后台投递进程的日志文件路径"""
+    return f"{os.path.abspath(db_path)}.outbox.log"
+
+
+def _try_lock(path: str):
+    """尝试获取投递进程锁，已被其他进程持有时返回 None"""
+    import fcntl
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def run_exclusive(worker: OutboxWorker, db_path: str):
+    """同一数据库同时只运行一个投递进程，其他进程发现锁被占用时直接退出
+
+    持锁进程空闲退出前先释放锁再检查一次发件箱：若在此期间有新通知写入
+    （对应的新投递进程因锁被占用而退出），则重新获取锁继续投递，不会遗漏。
+    """
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:  # Windows 上不加锁，依靠领取通知时的租约避免重复发送
+        worker.run(exit_when_idle=True)
+        return
+
+    lock_path = f"{os.path.abspath(db_path)}.outbox.lock"
+    while True:
+        lock = _try_lock(lock_path)
+        if lock is None:
+            return
+        try:
+            worker.run(exit_when_idle=True)
+        finally:
+            lock.close()
+        if not worker.db.get_outbox_stats()['pending']:
+            return
+
+
+def run_leader(worker: OutboxWorker, db_path: str, stop: threading.Event, retry_interval: float = 5.0):
+    """常驻投递（API 进程中使用）：与 run_exclusive 共用投递进程锁
+
+    API 以多个工作进程运行时只有持锁的一个进程投递，其余进程每隔 retry_interval
+    尝试接管，持锁进程退出后由其中之一继续；labrun 启动的投递进程发现锁被占用会直接退出。
+    """
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:
+        worker.run(stop)
+        return
+
+    lock_path = f"{os.path.abspath(db_path)}.outbox.lock"
+    while not stop.is_set():
+        lock = _try_lock(lock_path)
+        if lock is None:
+            stop.wait(retry_interval)
+            continue
+        try:
+            worker.run(stop)
+        finally:
+            lock.close()
+
+
+def outbox_main(argv=None):
+    """投递进程入口，也作为 labpilot outbox 子命令"""
+    parser = argparse.ArgumentParser(prog='labpilot outbox', description='投递发件箱中的通知')
+    parser.add_argument('--db', type=str, default=None, help='数据库路径，默认读取配置文件')
+    parser.add_argument('--exit-when-idle', action='store_true', help='没有待发送通知时退出')
+    parser.add_argument('--status', action='store_true', help='查看发件箱状态')
+    args = parser.parse_args(argv)
+
+    from .config import load_config
+    from .database import get_db
+
+    config = load_config()
+    db_path = args.db or config.get('database', {}).get('path', './labpilot.db')
+    db = get_db(db_path)
+
+    if args.status:
+        stats = db.get_outbox_stats()
+        print(f"待发送 {stats['pending']} (待汇总 {stats['digest']}), 已发送 {stats['sent']}, 失败 {stats['failed']}")
+        return
+
+    worker = create_worker(config, db)
+    try:
+        if args.exit_when_idle:
+            run_exclusive(worker, db_path)
+        else:
+            worker.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    outbox_main()
@@ -0,0 +1,52 @@
+"""
+LabPilot 分页模块
+实验列表按 (start_ts, id) 倒序做键集分页：游标记录上一页最后一行的位置，下一页从该位置之后读取。
+任意深度的翻页都只需一次索引定位，翻页期间新开始的实验也不会让后续页面的行重复或遗漏
+"""
+
+import base64
+import binascii
+import json
+from typing import Dict, List, Optional
+
+# 键集分页条件，参数为游标中的 (start_ts, id)；与 ORDER BY start_ts DESC, id DESC 配合使用
+KEYSET_CONDITION = "(start_ts, id) < (?, ?)"
+
+
+def encode_cursor(position: Dict) -> str:
+    """把分页位置编码为不透明的游标字符串"""
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """解析游标；格式不正确时抛出 ValueError
+
+    返回 {'t': start_ts, 'i': id}（键集位置），或 {'o': offset}（按相关度排序的搜索结果只能按偏移翻页）。
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"无效的分页游标: {cursor!r}")
+
+    if isinstance(position, dict):
+        if set(position) == {'t', 'i'} and all(type(position[key]) is int for key in position):
+            return position
+        if set(position) == {'o'} and type(position['o']) is int and position['o'] >= 0:
+            return position
+    raise ValueError(f"无效的分页游标: {cursor!r}")
+
+
+def keyset_cursor(row: Dict) -> str:
+    return encode_cursor({'t': row['start_ts'], 'i': row['id']})
+
+
+def offset_cursor(offset: int) -> str:
+    return encode_cursor({'o': offset})
+
+
+def next_cursor(rows: List[Dict], limit: int) -> Optional[str]:
+    """按 (start_ts, id) 排序的一页结果之后的游标；不足一页（已到末尾）时为 None"""
+    if not rows or len(rows) < limit or rows[-1].get('start_ts') is None:
+        return None
+    return keyset_cursor(rows[-1])
@@ -0,0 +1,192 @@
+"""
+LabPilot 超参数模块
+把实验命令解析为带类型的键值对（--k v、--k=v、-k v、标志和脚本的位置参数），
+写入 experiment_params 表后即可按参数值筛选实验，例如 lr=1e-4 且 batch_size>=64
+"""
+
+import math
+import re
+import shlex
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+ParamValue = Union[bool, int, float, str]
+
+# 筛选表达式，如 "lr=1e-4"、"batch_size>=64"、"optimizer!=sgd"
+_FILTER = re.compile(r'^\s*([\w.\-]+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$')
+
+# 比较运算符 -> SQL 运算符
+FILTER_OPERATORS = {'=': '=', '!=': '!=', '>': '>', '>=': '>=', '<': '<', '<=': '<='}
+
+# 命中实验数低于该值的筛选条件视为高选择性：先由参数索引取出命中的实验再排序；
+# 否则沿 start_ts 索引按时间倒序逐条检查，取满一页即停止
+SELECTIVE_MATCHES = 2000
+
+# 不作为超参数的脚本后缀，第一个带这些后缀的参数视为入口脚本
+SCRIPT_SUFFIXES = ('.py', '.sh')
+
+
+def parse_value(text: str) -> ParamValue:
+    """按 bool、int、float、str 的顺序推断参数值的类型"""
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    # nan、inf 等按字符串保存，避免参与数值比较
+    return value if math.isfinite(value) else text
+
+
+def normalize_key(option: str) -> str:
+    """--batch-size、--batch_size、-batch_size 统一为 batch_size"""
+    return option.lstrip('-').replace('-', '_')
+
+
+def _script_index(argv: List[str]) -> int:
+    """入口脚本（或 python -m 的模块）在 argv 中的位置；找不到时视为 argv[0] 本身是程序"""
+    for i, arg in enumerate(argv):
+        if arg == '-m' and i + 1 < len(argv):
+            return i + 1
+        if arg.endswith(SCRIPT_SUFFIXES):
+            return i
+    return 0
+
+
+def _is_option(arg: str) -> bool:
+    # 负数（如 --offset -1）是取值而不是选项
+    return arg.startswith('-') and len(arg) > 1 and not isinstance(parse_value(arg), (int, float))
+
+
+def parse_argv(argv: List[str]) -> List[Tuple[str, ParamValue]]:
+    """从命令参数中解析超参数，返回 [(key, value)]，同名参数保留最后一次出现的值
+
+    入口脚本之前的解释器和启动器参数（python -u、torchrun --nproc_per_node 8）不计入；
+    脚本之后的位置参数依次记为 arg0、arg1……，没有值的标志记为 True。
+    """
+    params: Dict[str, ParamValue] = {}
+    positional = 0
+    args = argv[_script_index(argv) + 1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--':
+            pass
+        elif _is_option(arg):
+            if '=' in arg:
+                option, value = arg.split('=', 1)
+                params[normalize_key(option)] = parse_value(value)
+            elif i + 1 < len(args) and not _is_option(args[i + 1]):
+                params[normalize_key(arg)] = parse_value(args[i + 1])
+                i += 1
+            else:
+                params[normalize_key(arg)] = True
+        else:
+            params[f"arg{positional}"] = parse_value(arg)
+            positional += 1
+        i += 1
+    return list(params.items())
+
+
+def parse_command(command: str) -> List[Tuple[str, ParamValue]]:
+    """从命令字符串中解析超参数"""
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        # 引号不成对时按空白切分
+        argv = command.split()
+    return parse_argv(argv)
+
+
+def encode_value(value: ParamValue) -> Tuple[str, Optional[float], str]:
+    """参数值 -> (类型, 数值列, 文本列)；数值列供范围比较使用，非数值参数为 NULL"""
+    if isinstance(value, bool):
+        return 'bool', float(value), 'true' if value else 'false'
+    if isinstance(value, int):
+        return 'int', float(value), str(value)
+    if isinstance(value, float):
+        return 'float', value, repr(value)
+    return 'str', None, value
+
+
+# 写入一个实验的全部参数，由 ExperimentDB.set_params 和迁移后的回填共用
+INSERT_PARAMS = """
+    INSERT OR REPLACE INTO experiment_params (experiment_id, key, kind, num_value, text_value)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def param_rows(experiment_id: int, params: List[Tuple[str, ParamValue]]) -> List[tuple]:
+    return [(experiment_id, key) + encode_value(value) for key, value in params]
+
+
+def decode_value(kind: str, num_value: Optional[float], text_value: str) -> ParamValue:
+    if kind == 'bool':
+        return bool(num_value)
+    if kind == 'int':
+        return int(text_value)
+    if kind == 'float':
+        return num_value
+    return text_value
+
+
+def parse_filter(expression: str) -> Tuple[str, str, ParamValue]:
+    """解析筛选表达式为 (key, SQL 运算符, 值)；格式不正确时抛出 ValueError"""
+    match = _FILTER.match(expression)
+    if not match or not match.group(3):
+        raise ValueError(f"无效的参数筛选条件: {expression!r}，应为 key=value、key>=value 等形式")
+    key, operator, value = match.groups()
+    return normalize_key(key), FILTER_OPERATORS[operator], parse_value(value)
+
+
+def _match_clause(expression: str) -> Tuple[str, List[Any]]:
+    key, operator, value = parse_filter(expression)
+    _, num_value, text_value = encode_value(value)
+    column, operand = ('text_value', text_value) if num_value is None else ('num_value', num_value)
+    return f"key = ? AND {column} {operator} ?", [key, operand]
+
+
+def filter_condition(expression: str, id_column: str = "experiments.id",
+                     correlated: bool = False) -> Tuple[str, List[Any]]:
+    """把筛选表达式转换为 SQL 条件和参数
+
+    条件形如 id IN (SELECT experiment_id FROM experiment_params WHERE key = ? AND num_value >= ?)，
+    子查询由 (key, num_value) 或 (key, text_value) 索引直接定位。数值与数值比较，
+    字符串按文本比较；缺少该参数的实验不满足任何条件（包括 !=）。
+    correlated 时生成 EXISTS 子查询，按主键 (experiment_id, key) 逐条检查。
+    """
+    clause, params = _match_clause(expression)
+    if correlated:
+        return (f"EXISTS (SELECT 1 FROM experiment_params "
+                f"WHERE experiment_id = {id_column} AND {clause})", params)
+    return f"{id_column} IN (SELECT experiment_id FROM experiment_params WHERE {clause})", params
+
+
+def filter_conditions(storage, expressions: List[str],
+                      id_column: str = "experiments.id") -> Tuple[List[str], List[Any]]:
+    """按命中数为一组筛选条件选择执行方式，返回 (条件列表, 参数)
+
+    命中最少的条件若低于 SELECTIVE_MATCHES，用 IN 形式驱动查询，其余条件逐条检查；
+    全部条件都很宽泛时（如 batch_size>=64）全部逐条检查，列表沿 start_ts 索引读到一页即止，
+    不必排序全部命中的实验。命中数用覆盖索引计数，最多数到 SELECTIVE_MATCHES。
+    """
+    counted = []
+    for expression in expressions:
+        clause, params = _match_clause(expression)
+        matches = storage.query_one(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM experiment_params WHERE {clause} LIMIT ?)",
+            params + [SELECTIVE_MATCHES],
+        )[0]
+        counted.append((matches, expression))
+    driver = min(counted)[1] if counted and min(counted)[0] < SELECTIVE_MATCHES else None
+
+    conditions, params = [], []
+    for _, expression in counted:
+        condition, values = filter_condition(expression, id_column, correlated=expression is not driver)
+        conditions.append(condition)
+        params.extend(values)
+    return conditions, params
@@ -0,0 +1,142 @@
+"""
+LabPilot 进度通知模块
+实验运行期间按固定间隔或 epoch 里程碑发送进度通知，内容取自日志尾部和最新指标；
+epoch 从日志尾部缓冲区中识别，日志转发线程不承担任何额外工作
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 默认 epoch 规则，匹配 "Epoch 3/100"、"epoch [3/100]"、"epoch: 3 of 100" 等，两个捕获组为当前值和总数
+DEFAULT_EPOCH_PATTERN = r'\bepoch\s*[\[(]?\s*[=:]?\s*(\d+)\s*(?:/|of)\s*(\d+)'
+
+# 默认按固定间隔发送进度通知的周期（秒），0 表示只在里程碑发送
+DEFAULT_INTERVAL = 6 * 3600
+
+# 两次进度通知之间的最短间隔（秒），里程碑通知也受此约束
+DEFAULT_MIN_INTERVAL = 1800
+
+# 里程碑步长（百分比）
+DEFAULT_MILESTONE_PERCENT = 10
+
+# 进度通知附带的日志尾部行数
+DEFAULT_TAIL_LINES = 5
+
+# 后台线程检查是否需要发送的周期（秒）
+CHECK_INTERVAL = 5.0
+
+
+def format_duration(seconds: float) -> str:
+    return f"{int(seconds // 3600)}h {int((seconds % 3600) // 60)}m {int(seconds % 60)}s"
+
+
+class ProgressReporter:
+    """实验进度通知的节流器
+
+    不注册为 LogPump 的行回调（逐行正则匹配会让转发吞吐下降一个数量级），而是由后台线程
+    每 CHECK_INTERVAL 秒从有界的日志尾部中找出最近一次 epoch 输出，
+    在到达发送周期或越过新的里程碑时调用 send(snapshot)。
+    两次发送至少间隔 min_interval 秒（从实验开始计），节流期间越过的多个里程碑合并为一次通知。
+    """
+
+    def __init__(self, send: Callable[[dict], None], tail: Optional[Callable[[], str]] = None,
+                 metrics: Optional[Callable[[], Dict[str, float]]] = None,
+                 interval: float = DEFAULT_INTERVAL, min_interval: float = DEFAULT_MIN_INTERVAL,
+                 milestone_percent: float = DEFAULT_MILESTONE_PERCENT,
+                 tail_lines: int = DEFAULT_TAIL_LINES, total_epochs: Optional[int] = None,
+                 epoch_pattern: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.send = send
+        self.tail = tail
+        self.metrics = metrics
+        self.interval = interval
+        self.min_interval = min_interval
+        self.milestone_percent = milestone_percent
+        self.tail_lines = tail_lines
+        self.total_epochs = total_epochs
+        self.epoch_pattern = re.compile(epoch_pattern or DEFAULT_EPOCH_PATTERN, re.IGNORECASE)
+        self.clock = clock
+
+        self.epoch = None
+        self.sent_count = 0
+        self.started_at = clock()
+        self._last_sent = self.started_at
+        self._last_milestone = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, text: str):
+        """从一段输出中识别最近一次的 epoch；没有匹配时保留之前的值"""
+        matches = self.epoch_pattern.findall(text)
+        if matches:
+            epoch, total = matches[-1]
+            self.epoch = int(epoch)
+            self.total_epochs = int(total) or self.total_epochs
+
+    def milestone(self) -> int:
+        """当前已越过的里程碑序号（第几个 milestone_percent），未识别到 epoch 总数时为 0"""
+        if self.epoch is None or not self.total_epochs or self.milestone_percent <= 0:
+            return 0
+        percent = min(self.epoch / self.total_epochs * 100, 100)
+        return int(percent // self.milestone_percent)
+
+    def progress_text(self) -> str:
+        if self.epoch is None:
+            return ""
+        if self.total_epochs:
+            return f"Epoch {self.epoch}/{self.total_epochs} ({self.epoch / self.total_epochs:.0%})"
+        return f"Epoch {self.epoch}"
+
+    def snapshot(self, now: float, text: str = "") -> dict:
+        tail = ""
+        if self.tail_lines > 0:
+            lines = [line for line in text.splitlines() if line.strip()]
+            tail = "\n".join(lines[-self.tail_lines:])
+        return {
+            'seq': self.sent_count + 1,
+            'elapsed': format_duration(now - self.started_at),
+            'progress': self.progress_text(),
+            'metrics': dict(self.metrics()) if self.metrics is not None else {},
+            'tail': tail,
+        }
+
+    def poll(self, now: Optional[float] = None) -> bool:
+        """检查是否需要发送进度通知，返回本次是否发送"""
+        now = self.clock() if now is None else now
+        if now - self._last_sent < self.min_interval:
+            return False
+
+        text = self.tail() if self.tail is not None else ""
+        self.observe(text)
+
+        milestone = self.milestone()
+        # 100% 由结束通知报告
+        due_milestone = self.milestone_percent > 0 and self._last_milestone < milestone < 100 / self.milestone_percent
+        due_interval = self.interval > 0 and now - self._last_sent >= self.interval
+        if not (due_milestone or due_interval):
+            return False
+
+        snapshot = self.snapshot(now, text)
+        self._last_sent = now
+        self._last_milestone = max(self._last_milestone, milestone)
+        self.sent_count += 1
+        try:
+            self.send(snapshot)
+        except Exception as e:
+            print(f"[WARN] 进度通知发送失败: {e}")
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="labpilot-progress", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(CHECK_INTERVAL):
+            self.poll()
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止后台线程；正在发送的通知最多等待 timeout 秒"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
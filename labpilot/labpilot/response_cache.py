@@ -0,0 +1,52 @@
+"""
+LabPilot 响应缓存
+按查询参数缓存已序列化的接口响应，每个条目记录生成时的数据版本；
+版本变化（任何进程写入实验）后条目自动失效，本进程的写操作还会直接清空缓存
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+# 默认最多缓存的响应数
+DEFAULT_MAX_ENTRIES = 128
+
+
+class ResponseCache:
+    """按 LRU 淘汰的响应缓存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: str) -> Optional[tuple]:
+        """返回与 version 一致的缓存值，没有或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: str, value: tuple):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
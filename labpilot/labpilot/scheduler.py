@@ -0,0 +1,307 @@
+"""
+LabPilot GPU 调度模块
+单机常驻的调度器：共享一个 GPU 采样器，通过 Unix socket 为 labrun 发放独占的 GPU 租约
+"""
+
+import itertools
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .gpu_monitor import GPUInfo, GPUMonitor
+
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "labpilot-scheduler.sock")
+
+
+class Job:
+    """一个排队中或已持有租约的 GPU 申请"""
+
+    def __init__(self, job_id: int, conn: socket.socket, request: dict):
+        self.job_id = job_id
+        self.conn = conn
+        self.min_memory_mb = int(request.get('min_memory_mb', 0))
+        self.max_util = request.get('max_util')
+        self.stable_seconds = float(request.get('stable_seconds') or 0)
+        self.priority = int(request.get('priority', 0))
+        self.pid = request.get('pid')
+        self.experiment_id = request.get('experiment_id')
+        self.command = request.get('command', "")
+        self.submitted_at = time.time()
+        self.granted_at = None
+        self.gpu = None
+
+    def eligible(self, gpu: GPUInfo) -> bool:
+        return GPUMonitor._eligible(gpu, self.min_memory_mb, self.max_util)
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'priority': self.priority,
+            'min_memory_mb': self.min_memory_mb,
+            'pid': self.pid,
+            'experiment_id': self.experiment_id,
+            'command': self.command,
+            'gpu': self.gpu,
+            'waited': round((self.granted_at or time.time()) - self.submitted_at, 1),
+        }
+
+
+class SchedulerDaemon:
+    """GPU 调度守护进程
+
+    - 按优先级从高到低、同优先级先到先得的顺序发放租约
+    - 已发放租约的 GPU 不会再分配给其他任务，避免多个 labrun 抢同一块卡
+    - labrun 退出（连接关闭）或主动 release 时回收租约
+    """
+
+    def __init__(self, monitor: GPUMonitor, socket_path: str = DEFAULT_SOCKET_PATH,
+                 stable_seconds: float = 0):
+        self.monitor = monitor
+        self.socket_path = socket_path
+        self.stable_seconds = stable_seconds
+
+        self._lock = threading.Lock()
+        self._queue: List[Job] = []
+        self._leases: Dict[int, Job] = {}
+        self._history: Dict[int, deque] = {}
+        self._job_ids = itertools.count(1)
+        self._server = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """绑定 socket 并开始接受请求"""
+        if os.path.exists(self.socket_path):
+            if SchedulerClient.available(self.socket_path):
+                raise RuntimeError(f"调度器已在运行: {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        # 同一节点上的所有用户都通过该调度器申请 GPU
+        os.chmod(self.socket_path, 0o666)
+        self._server.listen(128)
+
+        self.monitor.add_listener(self._on_sample)
+        self.monitor.start()
+
+        threading.Thread(target=self._accept_loop, name="labpilot-scheduler", daemon=True).start()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._stopped.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._stopped.is_set() and self._server is None:
+            return
+        self._stopped.set()
+        self.monitor.stop()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        job = None
+        try:
+            for line in conn.makefile('r', encoding='utf-8'):
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                op = request.get('op')
+                if op == 'submit' and job is None:
+                    job = self._submit(conn, request)
+                elif op == 'release':
+                    break
+                elif op == 'status':
+                    _send(conn, dict(op='status', **self.status()))
+        except OSError:
+            pass
+        finally:
+            if job is not None:
+                self._release(job)
+            conn.close()
+
+    def _submit(self, conn: socket.socket, request: dict) -> Job:
+        with self._lock:
+            job = Job(next(self._job_ids), conn, request)
+            self._queue.append(job)
+            self._queue.sort(key=lambda j: (-j.priority, j.job_id))
+            _send(conn, {'op': 'queued', 'job_id': job.job_id, 'position': self._queue.index(job) + 1})
+            self._dispatch()
+        return job
+
+    def _release(self, job: Job):
+        with self._lock:
+            if job in self._queue:
+                self._queue.remove(job)
+            if job.gpu is not None and self._leases.get(job.gpu) is job:
+                del self._leases[job.gpu]
+                print(f"[LabPilot] 回收 GPU {job.gpu} (job {job.job_id})")
+            self._dispatch()
+
+    def _on_sample(self, gpus: List[GPUInfo]):
+        now = time.time()
+        with self._lock:
+            window = max([self.stable_seconds] + [job.stable_seconds for job in self._queue])
+            for gpu in gpus:
+                history = self._history.setdefault(gpu.index, deque())
+                history.append((now, gpu))
+                # 只保留覆盖稳定窗口所需的样本
+                while len(history) > 1 and history[1][0] <= now - window:
+                    history.popleft()
+            self._dispatch()
+
+    def _pick_gpu(self, job: Job) -> Optional[int]:
+        now = time.time()
+        stable_seconds = max(job.stable_seconds, self.stable_seconds)
+        for index in sorted(self._history):
+            if index in self._leases:
+                continue
+            history = self._history[index]
+            cutoff = now - stable_seconds
+            if not history or history[0][0] > cutoff:
+                continue
+            # 窗口内的样本，加上窗口开始时刻的那一份
+            samples = [gpu for t, gpu in history if t >= cutoff]
+            samples.extend([gpu for t, gpu in history if t < cutoff][-1:])
+            if all(job.eligible(gpu) for gpu in samples):
+                return index
+        return None
+
+    def _could_fit(self, job: Job) -> bool:
+        """是否有 GPU 的显存总量满足任务要求（不论当前是否被占用）"""
+        return any(history and history[-1][1].memory_total >= job.min_memory_mb
+                   for history in self._history.values())
+
+    def _dispatch(self):
+        """按队列顺序为排队任务分配 GPU（调用方需持有锁）
+
+        排在前面的任务暂时分不到 GPU 时停止分配，后面的任务不能越过它：刚回收的 GPU
+        最近一份样本里还算着旧租约占用的显存，大任务此时放不下，下一份样本到达后才能拿到。
+        只有任何 GPU 的显存总量都不够的任务会被跳过，以免一直挡住整个队列。
+        """
+        for job in list(self._queue):
+            index = self._pick_gpu(job)
+            if index is None:
+                if self._could_fit(job):
+                    break
+                continue
+            self._queue.remove(job)
+            job.gpu = index
+            job.granted_at = time.time()
+            self._leases[index] = job
+            try:
+                _send(job.conn, {'op': 'granted', 'job_id': job.job_id, 'gpu': index})
+                print(f"[LabPilot] 分配 GPU {index} 给 job {job.job_id}: {job.command}")
+            except OSError:
+                del self._leases[index]
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'queue': [job.to_dict() for job in self._queue],
+                'leases': [job.to_dict() for job in self._leases.values()],
+                'gpus': [gpu._asdict() for gpu in self.monitor.gpus],
+            }
+
+
+class SchedulerClient:
+    """labrun 侧的调度器客户端；连接保持到实验结束，断开即释放租约"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self._conn = None
+        self._reader = None
+
+    @staticmethod
+    def available(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+        """调度器是否在运行"""
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.settimeout(1)
+                probe.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._conn.connect(self.socket_path)
+            self._reader = self._conn.makefile('r', encoding='utf-8')
+
+    def _receive(self) -> dict:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("调度器连接已断开")
+        return json.loads(line)
+
+    def acquire(self, min_memory_mb: int, max_util: Optional[int] = None,
+                stable_seconds: float = 0, priority: int = 0,
+                experiment_id: Optional[int] = None, command: str = "",
+                on_queued: Optional[Callable[[dict], None]] = None) -> int:
+        """提交申请并阻塞直到获得 GPU 租约，返回 GPU 索引"""
+        self._connect()
+        _send(self._conn, {
+            'op': 'submit',
+            'min_memory_mb': min_memory_mb,
+            'max_util': max_util,
+            'stable_seconds': stable_seconds,
+            'priority': priority,
+            'pid': os.getpid(),
+            'experiment_id': experiment_id,
+            'command': command,
+        })
+        while True:
+            message = self._receive()
+            if message.get('op') == 'queued' and on_queued:
+                on_queued(message)
+            elif message.get('op') == 'granted':
+                return int(message['gpu'])
+
+    def release(self):
+        """释放租约"""
+        if self._conn is None:
+            return
+        try:
+            _send(self._conn, {'op': 'release'})
+        except OSError:
+            pass
+        self._reader.close()
+        self._conn.close()
+        self._conn = None
+
+    def status(self) -> dict:
+        self._connect()
+        _send(self._conn, {'op': 'status'})
+        try:
+            return self._receive()
+        finally:
+            self.release()
+
+
+def _send(conn: socket.socket, message: dict):
+    conn.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
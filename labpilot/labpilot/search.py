@@ -0,0 +1,70 @@
+"""
+LabPilot 全文检索模块
+把看板搜索框的输入转换为 FTS5 查询；索引表 experiments_fts 由迁移创建并由触发器与 experiments 同步
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# 参与检索的列，顺序与 experiments_fts 的列定义一致
+SEARCH_COLUMNS = ('command', 'params', 'log_snippet', 'commit_message', 'ckpt_path')
+
+# bm25 的列权重：命令和参数中的命中比日志片段中的命中更相关
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0, 5.0, 2.0)
+
+# 排序表达式，值越小越相关
+RANK_EXPRESSION = f"bm25(experiments_fts, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)})"
+
+# 每个候选窗口的命中数：只对窗口内的命中计算 bm25。常见词（如 "train"）可能命中
+# 大半的实验，对全部命中排序的耗时随库大小线性增长，而按 rowid 倒序取候选可以提前结束。
+# 结果按窗口分段：第一个窗口是最近的 SEARCH_CANDIDATES 条命中（按相关度排序），
+# 翻页越过窗口后继续下一段更早的命中，不会遗漏
+SEARCH_CANDIDATES = 1000
+
+
+def search_cte(conditions: List[str]) -> str:
+    """检索候选的公共表表达式
+
+    conditions 为作用于 experiments 的筛选条件（状态、服务器、超参数），在截取窗口之前应用，
+    窗口内都是满足条件的命中。参数依次为 MATCH 表达式、各条件的参数、窗口偏移（search_window）；
+    外层查询与 experiments 连接后按 hits.score 排序。
+    """
+    where = "".join(f" AND {condition}" for condition in conditions)
+    return f"""
+    WITH hits AS (
+        SELECT experiments_fts.rowid AS rowid, {RANK_EXPRESSION} AS score
+        FROM experiments_fts JOIN experiments ON experiments.id = experiments_fts.rowid
+        WHERE experiments_fts MATCH ?{where}
+        ORDER BY experiments_fts.rowid DESC
+        LIMIT {SEARCH_CANDIDATES} OFFSET ?
+    )
+"""
+
+
+def search_window(skip: int, limit: int) -> Tuple[int, int, int]:
+    """把第 skip 条起的一页映射到候选窗口，返回 (窗口偏移, 窗口内偏移, 本页条数)
+
+    一页不跨越窗口：窗口末尾的一页可能少于 limit 条，按返回的条数继续翻页即可。
+    """
+    window_offset = skip // SEARCH_CANDIDATES * SEARCH_CANDIDATES
+    offset = skip - window_offset
+    return window_offset, offset, min(limit, SEARCH_CANDIDATES - offset)
+
+
+_WORD = re.compile(r'\w', re.UNICODE)
+
+
+def match_query(text: str) -> Optional[str]:
+    """把用户输入转换为 FTS5 MATCH 表达式，没有可检索的词时返回 None
+
+    按空白切分，每段作为一个带前缀匹配的短语（"resnet"* 可以匹配 resnet50，
+    "lr=0.01"* 按分词规则匹配相邻的 lr、0、01），各段之间为 AND。
+    连续的中文按一个词索引，只能从开头匹配（"调整学习"* 可以匹配 "调整学习率"）。
+    用户输入中的引号、括号、AND/OR 等 FTS5 语法一律按普通文本处理。
+    """
+    phrases = []
+    for term in text.split():
+        if not _WORD.search(term):
+            continue
+        phrases.append('"' + term.replace('"', '""') + '"*')
+    return " ".join(phrases) if phrases else None
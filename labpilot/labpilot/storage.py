@@ -0,0 +1,190 @@
+"""
+LabPilot 存储模块
+CLI、后台投递进程和 API 共用的 SQLite 访问层：每个线程一个长连接（带语句缓存），
+WAL 日志模式下读写互不阻塞，写事务以 BEGIN IMMEDIATE 开始，遇到锁冲突时等待并重试
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 单次加锁等待时间（秒），由 SQLite 的 busy handler 处理
+DEFAULT_BUSY_TIMEOUT = 10.0
+
+# busy_timeout 用尽后整个操作的最多重试次数
+DEFAULT_BUSY_RETRIES = 5
+
+# 每个连接缓存的预编译语句数
+DEFAULT_CACHED_STATEMENTS = 256
+
+
+def is_busy_error(error: Exception) -> bool:
+    """是否为可重试的锁冲突（database is locked / database table is locked / SQLITE_BUSY）"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class Storage:
+    """SQLite 数据库访问入口
+
+    - 连接按线程保存并复用，不再每次调用都打开、关闭数据库
+    - journal_mode=WAL：读不阻塞写，写不阻塞读；synchronous=NORMAL 在 WAL 下仍保证数据库一致，
+      只有断电时可能丢失最后几个事务
+    - 写操作在 BEGIN IMMEDIATE 事务中执行，开始时即获取写锁，避免读事务升级为写事务时的死锁；
+      锁等待超过 busy_timeout 时按指数退避重试整个事务
+    """
+
+    def __init__(self, path: str, busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+                 busy_retries: int = DEFAULT_BUSY_RETRIES,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.busy_retries = busy_retries
+        self.cached_statements = cached_statements
+        self.busy_retry_count = 0
+
+        self._local = threading.local()
+        # 线程 -> 连接，用于关闭已退出线程遗留的连接
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """当前线程的连接，首次使用时创建"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # isolation_level=None：不由 sqlite3 模块隐式开启事务，写事务由 transaction() 显式控制；
+        # 连接只在创建它的线程中使用，check_same_thread=False 仅为了 close_all() 能统一关闭
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        self._retry(lambda: conn.execute("PRAGMA journal_mode=WAL"))
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    def _retry(self, operation):
+        """执行 operation，锁冲突时退避重试"""
+        for attempt in range(self.busy_retries + 1):
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == self.busy_retries:
+                    raise
+                self.busy_retry_count += 1
+                time.sleep(min(0.05 * (2 ** attempt), 1.0) * random.uniform(0.5, 1.5))
+
+    @contextmanager
+    def transaction(self):
+        """写事务；已在事务中时直接复用外层事务
+
+        只有 BEGIN IMMEDIATE 会在锁冲突时重试，事务体内的语句依靠 busy_timeout 等待。
+        需要整体重试的写操作请使用 write()。
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        self._retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def write(self, operation):
+        """在写事务中执行 operation(conn) 并返回其结果，锁冲突时重试整个事务"""
+        conn = self.connection()
+        if conn.in_transaction:
+            # 位于外层事务中时无法单独重试
+            return operation(conn)
+
+        def run():
+            with self.transaction() as conn:
+                return operation(conn)
+        return self._retry(run)
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """执行单条写语句（自成一个事务），返回游标以读取 rowcount / lastrowid"""
+        return self.write(lambda conn: conn.execute(sql, params))
+
+    def executemany(self, sql: str, seq_of_params) -> sqlite3.Cursor:
+        seq_of_params = list(seq_of_params)
+        return self.write(lambda conn: conn.executemany(sql, seq_of_params))
+
+    def executescript(self, script: str):
+        """执行多条建表语句"""
+        conn = self.connection()
+        self._retry(lambda: conn.executescript(script))
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        """执行只读查询，返回全部行"""
+        conn = self.connection()
+        return self._retry(lambda: conn.execute(sql, params).fetchall())
+
+    def query_one(self, sql: str, params=()) -> Optional[tuple]:
+        conn = self.connection()
+        return self._retry(lambda: conn.execute(sql, params).fetchone())
+
+    def query_dicts(self, sql: str, params=()) -> List[Dict]:
+        """执行只读查询，每行以 {列名: 值} 返回"""
+        conn = self.connection()
+
+        def run():
+            cursor = conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._retry(run)
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections.pop(threading.current_thread(), None)
+        conn.close()
+
+    def close_all(self):
+        """关闭所有线程创建的连接（进程退出或测试清理时调用）"""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            conn.close()
+        self._local = threading.local()
+
+
+# 每个数据库文件一个共享的 Storage 实例
+_storages: Dict[str, Storage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(path: str, **kwargs) -> Storage:
+    """获取数据库文件对应的共享 Storage，同一进程内的 CLI 组件、投递线程和 API 请求共用连接"""
+    key = os.path.abspath(path)
+    storage = _storages.get(key)
+    if storage is None:
+        with _storages_lock:
+            storage = _storages.get(key)
+            if storage is None:
+                storage = Storage(path, **kwargs)
+                _storages[key] = storage
+    return storage
@@ -0,0 +1,267 @@
+"""
+LabPilot 资源采样模块
+在后台线程中定期记录子进程树的 CPU、内存、I/O 以及可见 GPU 的利用率和显存，
+样本按列差分编码后压缩为紧凑的二进制块存入数据库
+"""
+
+import os
+import threading
+import time
+import zlib
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，Linux 上回退到直接读取 /proc
+    psutil = None
+
+
+# 默认采样间隔（秒）
+DEFAULT_INTERVAL = 5.0
+
+# 采样线程允许占用的 CPU 比例上限，超过后自动加大采样间隔
+DEFAULT_MAX_OVERHEAD = 0.01
+
+# 每个数据块包含的样本数
+DEFAULT_CHUNK_SAMPLES = 60
+
+# 进程指标列；CPU 以 0.1% 为单位保存为整数
+PROCESS_FIELDS = ['time_ms', 'cpu_permille', 'rss_mb', 'read_kb', 'write_kb']
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def encode_chunk(columns: List[List[int]]) -> bytes:
+    """按列差分编码并压缩；单调或缓慢变化的序列差分后几乎全为小整数"""
+    raw = bytearray()
+    for column in columns:
+        deltas = array('q', [column[0]] + [b - a for a, b in zip(column, column[1:])]) if column else array('q')
+        raw += deltas.tobytes()
+    return zlib.compress(bytes(raw), 6)
+
+
+def decode_chunk(data: bytes, field_count: int, sample_count: int) -> List[List[int]]:
+    """encode_chunk 的逆过程，返回按列组织的整数序列"""
+    raw = zlib.decompress(data)
+    columns = []
+    width = sample_count * 8
+    for i in range(field_count):
+        deltas = array('q')
+        deltas.frombytes(raw[i * width:(i + 1) * width])
+        column = []
+        total = 0
+        for delta in deltas:
+            total += delta
+            column.append(total)
+        columns.append(column)
+    return columns
+
+
+def visible_gpu_indices(env: Optional[Dict[str, str]] = None) -> Optional[List[int]]:
+    """解析 CUDA_VISIBLE_DEVICES，未设置时返回 None 表示全部 GPU"""
+    value = (env if env is not None else os.environ).get('CUDA_VISIBLE_DEVICES')
+    if value is None:
+        return None
+    indices = []
+    for part in value.split(','):
+        part = part.strip()
+        if part.isdigit():
+            indices.append(int(part))
+    return indices
+
+
+class ProcessTreeReader:
+    """读取进程树累计的 CPU 时间、RSS 与 I/O 字节数"""
+
+    def __init__(self, root_pid: int):
+        self.root_pid = root_pid
+
+    def pids(self) -> List[int]:
+        if psutil is not None:
+            try:
+                root = psutil.Process(self.root_pid)
+                return [self.root_pid] + [child.pid for child in root.children(recursive=True)]
+            except psutil.Error:
+                return []
+
+        # 通过 /proc/<pid>/task/<tid>/children 只遍历子树，不扫描整个 /proc
+        pids, stack = [], [self.root_pid]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            try:
+                tasks = os.listdir(f'/proc/{pid}/task')
+            except OSError:
+                continue
+            for tid in tasks:
+                try:
+                    with open(f'/proc/{pid}/task/{tid}/children') as f:
+                        stack.extend(int(child) for child in f.read().split())
+                except OSError:
+                    continue
+        return pids
+
+    def read(self) -> Tuple[float, int, int, int]:
+        """返回 (CPU 秒, RSS 字节, 读字节, 写字节)"""
+        cpu = 0.0
+        rss = read_bytes = write_bytes = 0
+        for pid in self.pids():
+            if psutil is not None:
+                try:
+                    process = psutil.Process(pid)
+                    with process.oneshot():
+                        times = process.cpu_times()
+                        cpu += times.user + times.system
+                        rss += process.memory_info().rss
+                        try:
+                            io = process.io_counters()
+                            read_bytes += io.read_bytes
+                            write_bytes += io.write_bytes
+                        except (psutil.Error, AttributeError):
+                            pass
+                except psutil.Error:
+                    continue
+                continue
+
+            try:
+                with open(f'/proc/{pid}/stat', 'rb') as f:
+                    fields = f.read().rsplit(b')', 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+                rss += int(fields[21]) * _PAGE_SIZE
+            except (OSError, IndexError, ValueError):
+                continue
+            try:
+                with open(f'/proc/{pid}/io', 'rb') as f:
+                    for line in f:
+                        if line.startswith(b'read_bytes:'):
+                            read_bytes += int(line.split()[1])
+                        elif line.startswith(b'write_bytes:'):
+                            write_bytes += int(line.split()[1])
+            except (OSError, ValueError):
+                pass
+        return cpu, rss, read_bytes, write_bytes
+
+
+class TelemetrySampler:
+    """实验资源采样线程
+
+    按 interval 采样一次，凑满 chunk_samples 个样本后编码为一个数据块交给 sink。
+    采样线程自身的 CPU 时间被持续统计，超过 max_overhead 时采样间隔自动翻倍。
+    """
+
+    def __init__(self, pid: int, sink: Callable[[int, float, List[str], int, bytes], None],
+                 gpu_monitor=None, gpu_indices: Optional[List[int]] = None,
+                 interval: float = DEFAULT_INTERVAL, max_overhead: float = DEFAULT_MAX_OVERHEAD,
+                 chunk_samples: int = DEFAULT_CHUNK_SAMPLES):
+        self.reader = ProcessTreeReader(pid)
+        self.sink = sink
+        self.gpu_monitor = gpu_monitor
+        self.gpu_indices = gpu_indices
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.chunk_samples = chunk_samples
+
+        self.fields = list(PROCESS_FIELDS)
+        self.sample_count = 0
+        self.chunk_count = 0
+        self.sampler_cpu = 0.0
+        self.start_time = None
+
+        self._gpu_fields_ready = False
+        self._gpu_indices_seen: List[int] = []
+        self._columns: List[List[int]] = []
+        self._chunk_start = None
+        self._last_cpu = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="labpilot-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样并写出最后一个数据块"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.gpu_monitor is not None:
+            self.gpu_monitor.stop()
+        self._flush()
+
+    def _run(self):
+        if self.gpu_monitor is not None:
+            # 首次采样可能需要等待 GPU 后端就绪，放在采样线程中避免阻塞启动
+            self.gpu_monitor.start()
+        while not self._stop.is_set():
+            started = time.thread_time()
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"[WARN] 资源采样失败: {e}")
+            self.sampler_cpu += time.thread_time() - started
+
+            # 自适应：单次采样成本相对采样间隔超出预算时降低采样频率
+            if self.sample_count and self.sampler_cpu / self.sample_count > self.interval * self.max_overhead:
+                self.interval *= 2
+            self._stop.wait(self.interval)
+
+    def _gpu_values(self) -> List[int]:
+        gpus = self.gpu_monitor.snapshot() if self.gpu_monitor is not None else []
+        if self.gpu_indices is not None:
+            gpus = [gpu for gpu in gpus if gpu.index in self.gpu_indices]
+        if not self._gpu_fields_ready:
+            # GPU 列在第一次采样时确定
+            for gpu in gpus:
+                self.fields.extend([f'gpu{gpu.index}_util', f'gpu{gpu.index}_mem_mb'])
+            self._gpu_indices_seen = [gpu.index for gpu in gpus]
+            self._gpu_fields_ready = True
+        by_index = {gpu.index: gpu for gpu in gpus}
+        values = []
+        for index in self._gpu_indices_seen:
+            gpu = by_index.get(index)
+            if gpu is None:
+                values.extend([0, 0])
+            else:
+                values.extend([gpu.utilization, gpu.memory_total - gpu.memory_free])
+        return values
+
+    def sample(self):
+        now = time.time()
+        cpu, rss, read_bytes, write_bytes = self.reader.read()
+        cpu_permille = 0
+        if self._last_cpu is not None:
+            last_time, last_cpu = self._last_cpu
+            cpu_permille = int(max(cpu - last_cpu, 0) / max(now - last_time, 1e-6) * 1000)
+        self._last_cpu = (now, cpu)
+
+        row = [int(now * 1000), cpu_permille, rss // (1024 * 1024), read_bytes // 1024, write_bytes // 1024]
+        row.extend(self._gpu_values())
+
+        if not self._columns:
+            self._columns = [[] for _ in row]
+            self._chunk_start = now
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self.sample_count += 1
+
+        if len(self._columns[0]) >= self.chunk_samples:
+            self._flush()
+
+    def _flush(self):
+        if not self._columns or not self._columns[0]:
+            return
+        columns, self._columns = self._columns, []
+        self.sink(self.chunk_count, self._chunk_start, self.fields, len(columns[0]), encode_chunk(columns))
+        self.chunk_count += 1
+
+    def overhead(self) -> float:
+        """采样线程占用的 CPU 时间 / 实际经过时间"""
+        if self.start_time is None:
+            return 0.0
+        return self.sampler_cpu / max(time.time() - self.start_time, 1e-6)
+
+    def summary(self) -> str:
+        return f"资源采样 {self.sample_count} 次, 采样开销 {self.overhead() * 100:.3f}% CPU"
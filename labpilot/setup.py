@@ -33,6 +33,9 @@ setup(
     url="https://github.com/yourusername/labpilot",
     packages=find_packages(),
     install_requires=requirements,
+    extras_require={
+        "nvml": ["nvidia-ml-py"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -52,7 +55,7 @@ setup(
     entry_points={
         "console_scripts": [
             "labrun=labpilot.cli:main",
-            "labpilot=labpilot.cli:main",
+            "labpilot=labpilot.cli:labpilot_main",
         ],
     },
     include_package_data=True,
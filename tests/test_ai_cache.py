@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import unittest
+
+from labpilot.ai_cache import AICache, cache_key
+from labpilot.git_utils import GitUtils
+
+
+class AICacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot_ai_cache.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_depends_on_every_input(self):
+        base = cache_key("diff", "model", "zh-CN", 1)
+
+        self.assertEqual(base, cache_key("diff", "model", "zh-CN", 1))
+        self.assertNotEqual(base, cache_key("diff", "model", "en", 1))
+        self.assertNotEqual(base, cache_key("diff", "model", "zh-CN", 2))
+        self.assertNotEqual(cache_key("ab", "c"), cache_key("a", "bc"))
+
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        cache = AICache(self.path, max_bytes=3 * (64 + 100))
+        for name in ("a", "b", "c"):
+            cache.put(cache_key(name), name * 100)
+            time.sleep(0.01)
+        cache.get(cache_key("a"))
+
+        cache.put(cache_key("d"), "d" * 100)
+
+        self.assertIsNone(cache.get(cache_key("b")))
+        self.assertEqual(cache.get(cache_key("a")), "a" * 100)
+        self.assertLessEqual(cache.total_bytes(), cache.max_bytes)
+        cache.close()
+
+    def test_repeated_diff_skips_the_network(self):
+        git_utils = GitUtils()
+        git_utils.ai_config = {"api_key": "test", "cache_path": self.path}
+        requests = []
+
+        def fake_completion(messages, deadline=None):
+            requests.append(messages)
+            return "feat: cached summary"
+
+        git_utils._chat_completion = fake_completion
+
+        first = git_utils.generate_ai_commit_message("diff --git a/train.py b/train.py")
+        second = git_utils.generate_ai_commit_message("diff --git a/train.py b/train.py")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(requests), 1)
+        cache = git_utils.get_ai_cache()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
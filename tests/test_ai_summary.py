@@ -0,0 +1,105 @@
+import json
+import re
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from labpilot.git_utils import GitUtils, split_diff
+
+
+def file_diff(path, hunks=1, lines=40):
+    body = "".join(
+        f"@@ -{i * 100},{lines} +{i * 100},{lines} @@\n" + "".join(f"+x_{i}_{n} = {n}\n" for n in range(lines))
+        for i in range(hunks)
+    )
+    return f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n{body}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = payload["messages"][-1]["content"]
+        self.server.prompts.append(prompt)
+        match = re.search(r"以下是文件 (\S+) 的一段", prompt)
+        if match:
+            path = match.group(1)
+            if "slow" in path:
+                time.sleep(self.server.slow_seconds)
+            content = f"修改了 {path}"
+        else:
+            content = "feat: 合并后的提交信息"
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MapReduceSummaryTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.prompts = []
+        self.server.slow_seconds = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.git_utils = GitUtils()
+        self.git_utils.ai_config = {
+            "api_key": "test",
+            "base_url": f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+            "max_diff_chars": 2000,
+            "cache": False,
+            "timeout": 5,
+        }
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_split_diff_per_file_and_hunk(self):
+        diff = file_diff("a.py") + file_diff("big.py", hunks=4)
+
+        chunks = split_diff(diff, 2000)
+
+        self.assertEqual([path for path, _ in chunks].count("a.py"), 1)
+        self.assertGreater([path for path, _ in chunks].count("big.py"), 1)
+        self.assertTrue(all(chunk.startswith("diff --git a/") for _, chunk in chunks))
+        self.assertTrue(all(len(chunk) <= 2000 + 20 for _, chunk in chunks))
+
+    def test_large_diff_is_summarized_per_file_then_merged(self):
+        diff = "".join(file_diff(f"module{i}.py") for i in range(6))
+
+        message = self.git_utils.generate_ai_commit_message(diff)
+
+        self.assertEqual(message, "feat: 合并后的提交信息")
+        self.assertEqual(len(self.server.prompts), 7)
+        reduce_prompt = self.server.prompts[-1]
+        for i in range(6):
+            self.assertIn(f"module{i}.py: 修改了 module{i}.py", reduce_prompt)
+
+    def test_token_budget_limits_summarized_chunks(self):
+        self.git_utils.ai_config["token_budget"] = 400
+        diff = "".join(file_diff(f"module{i}.py") for i in range(6))
+
+        self.git_utils.generate_ai_commit_message(diff)
+
+        self.assertLess(len(self.server.prompts), 7)
+        self.assertIn("未详细总结", self.server.prompts[-1])
+
+    def test_deadline_bounds_total_time(self):
+        self.server.slow_seconds = 3
+        self.git_utils.ai_config["deadline"] = 1
+        diff = file_diff("fast.py") + file_diff("slow.py") + file_diff("other.py")
+
+        started = time.monotonic()
+        message = self.git_utils.generate_ai_commit_message(diff)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIn("fast.py", self.server.prompts[-1] + (message or ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.migrations import backfill_params
+from labpilot.response_cache import ResponseCache
+from labpilot.storage import get_storage
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_entries_expire_with_version_and_lru(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "v1", (b"a", {}))
+        cache.put("b", "v1", (b"b", {}))
+        self.assertEqual(cache.get("a", "v1"), (b"a", {}))
+        cache.put("c", "v1", (b"c", {}))
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertIsNone(cache.get("a", "v2"))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+class ConditionalGetTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.db = ExperimentDB(self.path)
+        for i in range(3):
+            self.db.insert_experiment(f"python train.py --seed {i}")
+        for target, value in (("_experiment_db", self.db), ("_response_cache", ResponseCache())):
+            patcher = patch.object(main, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def test_data_version_follows_every_write(self):
+        versions = [self.db.get_data_version()]
+        self.db.start_experiment(1)
+        versions.append(self.db.get_data_version())
+        self.db.delete_experiment(2)
+        versions.append(self.db.get_data_version())
+        self.db.get_experiments()
+        versions.append(self.db.get_data_version())
+        self.assertEqual(len(set(versions[:3])), 3)
+        self.assertEqual(versions[2], versions[3])
+
+    def test_unchanged_poll_gets_304_without_querying(self):
+        first = self.client.get("/experiments", params={"limit": 2})
+        etag = first.headers["ETag"]
+        self.assertIn("X-Next-Cursor", first.headers)
+        self.assertEqual(first.headers["Cache-Control"], "no-cache")
+
+        with patch.object(main, "_list_experiments", side_effect=AssertionError("queried")):
+            for tag in (etag, f"W/{etag}", f'"other", {etag}'):
+                response = self.client.get("/experiments", params={"limit": 2}, headers={"If-None-Match": tag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+            # 没有带 ETag 的客户端直接得到缓存的响应
+            cached = self.client.get("/experiments", params={"limit": 2})
+            self.assertEqual(cached.content, first.content)
+            self.assertEqual(cached.headers["X-Next-Cursor"], first.headers["X-Next-Cursor"])
+
+        other = self.client.get("/experiments", params={"limit": 1}, headers={"If-None-Match": etag})
+        self.assertEqual(other.status_code, 304)
+
+    def test_writes_change_etag_and_invalidate_cache(self):
+        etag = self.client.get("/experiments").headers["ETag"]
+        self.client.put("/experiments/1", json={"status": "success"})
+        self.assertEqual(len(main.get_response_cache()), 0)
+        response = self.client.get("/experiments", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        # labrun 等其他进程的写入同样使缓存失效
+        etag = response.headers["ETag"]
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO experiments (start_time, command, status) VALUES ('2030-01-01T00:00:00', 'x', 'running')")
+        conn.commit()
+        conn.close()
+        response = self.client.get("/experiments", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_param_writes_change_etag(self):
+        params = {"param": "seed=7"}
+        etag = self.client.get("/experiments", params=params).headers["ETag"]
+        self.db.set_params(1, [("seed", 7)])
+        response = self.client.get("/experiments", params=params, headers={"If-None-Match": etag})
+        self.assertEqual([row["id"] for row in response.json()], [1])
+
+        # 升级后的后台参数回填只写 experiment_params，同样使缓存失效
+        self.db.storage.execute("DELETE FROM experiment_params")
+        self.db.storage.execute("INSERT INTO schema_meta (key, value) VALUES ('params_backfill_before', 4)")
+        etag = self.client.get("/experiments", params=params).headers["ETag"]
+        backfill_params(self.db.storage, pause=0)
+        response = self.client.get("/experiments", params={"param": "seed=2"}, headers={"If-None-Match": etag})
+        self.assertEqual([row["id"] for row in response.json()], [3])
+        response = self.client.get("/experiments", params=params, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_stats_etag_rolls_over_with_time_window(self):
+        first = self.client.get("/experiments/stats")
+        self.assertEqual(first.json()["total_experiments"], 3)
+        etag = first.headers["ETag"]
+        self.assertEqual(self.client.get("/experiments/stats", headers={"If-None-Match": etag}).status_code, 304)
+
+        later = main.time.time() + main.STATS_MAX_AGE
+        with patch.object(main.time, "time", return_value=later):
+            response = self.client.get("/experiments/stats", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
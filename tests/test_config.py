@@ -0,0 +1,38 @@
+import os
+import tempfile
+import time
+import unittest
+
+from labpilot.config import clear_config_cache, load_config
+
+
+class ConfigTests(unittest.TestCase):
+    def setUp(self):
+        clear_config_cache()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.yaml")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("timeout:\n  default: 60\n")
+
+    def tearDown(self):
+        clear_config_cache()
+        self.temp_dir.cleanup()
+
+    def test_config_is_parsed_once_per_process(self):
+        first = load_config(self.path)
+
+        self.assertEqual(first["timeout"]["default"], 60)
+        self.assertIs(load_config(self.path), first)
+
+    def test_modified_file_is_reloaded(self):
+        load_config(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("timeout:\n  default: 120\n")
+        future = time.time() + 10
+        os.utime(self.path, (future, future))
+
+        self.assertEqual(load_config(self.path)["timeout"]["default"], 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.executor import DBExecutor, Overloaded, executor_from_config
+from labpilot.storage import get_storage
+
+
+class DBExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self.executor = DBExecutor(readers=4, max_pending=8)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_reads_run_concurrently_up_to_pool_size(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_read(i):
+            with lock:
+                active.append(i)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(i)
+            return i
+
+        async def run():
+            return await asyncio.gather(*(self.executor.read(slow_read, i) for i in range(8)))
+
+        self.assertEqual(asyncio.run(run()), list(range(8)))
+        self.assertEqual(max(peak), 4)
+
+    def test_writes_run_in_order_on_one_thread(self):
+        calls = []
+
+        def write(i):
+            calls.append((i, threading.current_thread().name))
+            return i
+
+        async def run():
+            return await asyncio.gather(*(self.executor.write(write, i) for i in range(6)))
+
+        self.assertEqual(asyncio.run(run()), list(range(6)))
+        self.assertEqual([i for i, _ in calls], list(range(6)))
+        self.assertEqual(len({name for _, name in calls}), 1)
+
+    def test_requests_beyond_max_pending_are_rejected(self):
+        release = threading.Event()
+
+        async def run():
+            blocked = [asyncio.ensure_future(self.executor.read(release.wait)) for _ in range(8)]
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded):
+                await self.executor.read(time.time)
+            release.set()
+            await asyncio.gather(*blocked)
+            self.assertEqual(self.executor.pending, 0)
+            return await self.executor.read(lambda: "ok")
+
+        self.assertEqual(asyncio.run(run()), "ok")
+
+    def test_config(self):
+        executor = executor_from_config({'api': {'readers': 2, 'max_pending': 3}})
+        self.addCleanup(executor.shutdown)
+        self.assertEqual((executor.readers, executor.max_pending), (2, 3))
+
+
+class APIConcurrencyTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.db = ExperimentDB(self.path)
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def test_endpoints_use_executor_and_shed_load(self):
+        executor = DBExecutor(readers=2, max_pending=4)
+        self.addCleanup(executor.shutdown)
+        with patch.object(main, "_experiment_db", self.db), patch.object(main, "_db_executor", executor):
+            client = TestClient(main.app)
+            created = client.post("/experiments", json={"command": "python train.py --lr 0.1"}).json()
+            updated = client.put(f"/experiments/{created['id']}", json={"status": "success"}).json()
+            self.assertEqual(updated["status"], "success")
+            self.assertEqual(client.get(f"/experiments/{created['id']}").json()["command"],
+                             "python train.py --lr 0.1")
+            self.assertEqual(client.get("/experiments/999").status_code, 404)
+
+            with patch.object(executor, "max_pending", 0):
+                response = client.get("/experiments")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+
+            self.db.record_ai_cache_stats(created["id"], 3, 1)
+            self.assertEqual(client.delete(f"/experiments/{created['id']}").status_code, 200)
+            self.assertEqual(client.get("/experiments").json(), [])
+            self.assertIsNone(self.db.get_ai_cache_stats(created["id"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,12 @@
 import os
 import subprocess
 import tempfile
+import threading
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
-from labpilot.git_utils import GitUtils
+from labpilot.git_utils import GitState, GitUtils
 
 
 def run_git(args, cwd):
@@ -68,6 +70,93 @@ class GitUtilsTests(unittest.TestCase):
         status = run_git(["status", "--porcelain"], self.repo).stdout
         self.assertIn("other.py", status)
 
+    def test_async_ai_message_commits_immediately_and_attaches_note_later(self):
+        (self.repo / "train.py").write_text("import helper\nprint(helper.VALUE + 1)\n", encoding="utf-8")
+
+        git_utils = GitUtils()
+        git_utils.git_config = {"ai_message": "async"}
+        git_utils.ai_config = {"api_key": "test"}
+        release = threading.Event()
+
+        def slow_ai(diff):
+            release.wait(5)
+            return "feat: bump training output"
+
+        git_utils.generate_ai_commit_message = slow_ai
+
+        commit_hash = git_utils.auto_commit(specific_files=["train.py"])
+
+        # AI 尚未返回时快照已经以临时信息提交
+        self.assertIn("Auto-snapshot", git_utils.get_commit_body())
+        messages = []
+        thread = git_utils.start_ai_message(commit_hash, messages.append)
+        release.set()
+        thread.join(timeout=5)
+
+        self.assertEqual(messages, ["feat: bump training output"])
+        note = run_git(["notes", "show", commit_hash], self.repo).stdout.strip()
+        self.assertEqual(note, "feat: bump training output")
+        self.assertEqual(run_git(["rev-parse", "HEAD"], self.repo).stdout.strip(), commit_hash)
+
+    def test_failed_async_commit_does_not_note_previous_head(self):
+        (self.repo / "train.py").write_text("print('changed')\n", encoding="utf-8")
+        hook = self.repo / ".git" / "hooks" / "pre-commit"
+        hook.write_text("#!/bin/sh\nexit 1\n", encoding="utf-8")
+        hook.chmod(0o755)
+        head = run_git(["rev-parse", "HEAD"], self.repo).stdout.strip()
+
+        git_utils = GitUtils()
+        git_utils.git_config = {"ai_message": "async"}
+        git_utils.ai_config = {"api_key": "test"}
+        git_utils.generate_ai_commit_message = lambda diff: "feat: unrelated"
+
+        self.assertEqual(git_utils.auto_commit(specific_files=["train.py"]), head)
+        self.assertIsNone(git_utils.start_ai_message(head))
+        self.assertEqual(GitUtils().ai_message_mode(), "sync")
+
+    def test_launch_probes_git_state_with_two_subprocesses(self):
+        (self.repo / "helper.py").write_text("VALUE = 2\n", encoding="utf-8")
+        git_utils = GitUtils()
+        real_run = subprocess.run
+        calls = []
+
+        def counting_run(cmd, *args, **kwargs):
+            calls.append(cmd)
+            return real_run(cmd, *args, **kwargs)
+
+        with patch("labpilot.git_utils.subprocess.run", counting_run):
+            self.assertEqual(git_utils.get_related_dirty_files("train.py"), ["helper.py"])
+            self.assertTrue(git_utils.is_dirty())
+            commit_hash, subject = git_utils.get_git_info()
+            body = git_utils.get_commit_body()
+
+        self.assertEqual([cmd[1] for cmd in calls], ["status", "log"])
+        # 状态查询限定在入口脚本的依赖集合内
+        self.assertIn(":(literal)train.py", calls[0])
+        self.assertNotIn(":(literal)other.py", calls[0])
+        self.assertEqual(commit_hash, run_git(["rev-parse", "HEAD"], self.repo).stdout.strip())
+        self.assertEqual((subject, body), ("test: baseline", "test: baseline"))
+
+    def test_parse_porcelain_v2_status(self):
+        output = "\0".join([
+            "# branch.oid 0123abcd",
+            "# branch.head main",
+            "1 .M N... 100644 100644 100644 aaaa bbbb train.py",
+            "2 R. N... 100644 100644 100644 aaaa bbbb R100 new name.py",
+            "old name.py",
+            "? untracked.py",
+            "",
+        ])
+
+        head, branch, files = GitState._parse_status(output)
+
+        self.assertEqual((head, branch), ("0123abcd", "main"))
+        self.assertEqual(files, ["train.py", "new name.py", "untracked.py"])
+
+    def test_state_outside_repository(self):
+        with tempfile.TemporaryDirectory() as other:
+            self.assertFalse(GitState.probe(cwd=other).is_repo)
+
 
 if __name__ == "__main__":
     unittest.main()
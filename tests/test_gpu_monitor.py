@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+
+from labpilot.gpu_monitor import FakeBackend, GPUBackend, GPUInfo, GPUMonitor, parse_smi_line
+
+
+def gpu(index, free, utilization=0):
+    return GPUInfo(index, free, 24576, utilization)
+
+
+class CountingBackend(GPUBackend):
+    """每次采样把 GPU 0 的空闲显存加一，便于区分新旧快照"""
+    name = "counting"
+
+    def __init__(self):
+        super().__init__(interval=0.01)
+        self.samples = 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples += 1
+            self._publish([gpu(0, self.samples)])
+            self._stop.wait(self.interval)
+
+
+class GPUMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend([gpu(0, 1000, 90), gpu(1, 2000, 95)])
+        self.monitor = GPUMonitor(self.backend)
+
+    def publish_later(self, delay, gpus):
+        timer = threading.Timer(delay, self.backend.set_gpus, args=(gpus,))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def test_free_gpus_apply_memory_and_utilization_thresholds(self):
+        self.backend.set_gpus([gpu(0, 20000, 80), gpu(1, 20000, 5), gpu(2, 4000, 0)])
+
+        self.assertEqual(self.monitor.free_gpus(12 * 1024), [0, 1])
+        self.assertEqual(self.monitor.free_gpus(12 * 1024, max_util=10), [1])
+
+    def test_waiter_wakes_as_soon_as_memory_is_released(self):
+        self.publish_later(0.1, [gpu(0, 1000, 90), gpu(1, 20000, 0)])
+
+        start = time.time()
+        chosen = self.monitor.wait_for(12 * 1024, timeout=5)
+
+        self.assertEqual(chosen, 1)
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_brief_dip_is_not_grabbed_within_stability_window(self):
+        self.publish_later(0.05, [gpu(0, 20000, 0), gpu(1, 2000, 95)])
+        self.publish_later(0.15, [gpu(0, 1000, 90), gpu(1, 2000, 95)])
+
+        self.assertIsNone(self.monitor.wait_for(12 * 1024, stable_seconds=0.3, timeout=0.6))
+
+    def test_stable_gpu_is_chosen_after_window(self):
+        self.publish_later(0.05, [gpu(0, 1000, 90), gpu(1, 20000, 0)])
+
+        start = time.time()
+        chosen = self.monitor.wait_for(12 * 1024, stable_seconds=0.3, timeout=5)
+
+        self.assertEqual(chosen, 1)
+        self.assertGreaterEqual(time.time() - start, 0.3)
+
+    def test_stopped_monitor_restarts_on_next_query(self):
+        # wait_for_gpu 选中显卡后会停止共享的监控器，之后的查询不能读到停止前的快照
+        backend = CountingBackend()
+        monitor = GPUMonitor(backend)
+        self.addCleanup(monitor.stop)
+        before = monitor.snapshot()[0].memory_free
+        monitor.stop()
+        self.assertIsNone(monitor.updated_at)
+
+        time.sleep(0.05)
+        stopped_at = backend.samples
+        time.sleep(0.05)
+        self.assertEqual(backend.samples, stopped_at)
+
+        self.assertGreater(monitor.snapshot()[0].memory_free, before)
+        self.assertTrue(backend._thread.is_alive())
+
+    def test_parse_smi_line_tolerates_missing_utilization(self):
+        self.assertEqual(parse_smi_line("1, 20000, 24576, [N/A]"), GPUInfo(1, 20000, 24576, 0))
+        self.assertIsNone(parse_smi_line("No devices were found"))
+
+
+if __name__ == "__main__":
+    unittest.main()
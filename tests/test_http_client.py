@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from labpilot.http_client import HTTPClient
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.client_ports.add(self.client_address[1])
+        if self.path == "/slow":
+            time.sleep(1)
+        body = json.dumps({"errcode": 0}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.server.daemon_threads = True
+        self.server.client_ports = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = HTTPClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_to_same_host_reuse_one_connection(self):
+        for _ in range(3):
+            response = self.client.post(self.base_url + "/webhook", json={"text": "hi"}, timeout=5)
+            self.assertEqual(response.json(), {"errcode": 0})
+
+        self.assertEqual(len(self.server.client_ports), 1)
+        stats = self.client.stats()[f"127.0.0.1:{self.server.server_address[1]}"]
+        self.assertEqual((stats["requests"], stats["errors"]), (3, 0))
+
+    def test_total_timeout_is_enforced_and_counted_as_error(self):
+        started = time.monotonic()
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.post(self.base_url + "/slow", json={}, timeout=0.3)
+
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(self.client.stats()[f"127.0.0.1:{self.server.server_address[1]}"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from labpilot.import_graph import ImportGraph
+
+
+class ImportGraphTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "project"
+        self.cache_path = os.path.join(self.temp_dir.name, "cache", "graph.json")
+        self.write("train.py", "import models.net\nfrom utils import helper\nimport numpy\n")
+        self.write("models/__init__.py", "")
+        self.write("models/net.py", "from . import layers\nfrom ..utils.helper import VALUE\n")
+        self.write("models/layers.py", "def layer():\n    from .blocks import Block\n")
+        self.write("models/blocks.py", "Block = object\n")
+        self.write("utils/__init__.py", "")
+        self.write("utils/helper.py", "VALUE = 1\n")
+        self.write("unrelated.py", "import os\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, rel_path, content):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def dependencies(self, **kwargs):
+        graph = ImportGraph(str(self.root), self.cache_path, **kwargs)
+        related = graph.dependencies(str(self.root / "train.py"))
+        graph.save()
+        return graph, related
+
+    def test_resolves_absolute_relative_and_nested_imports(self):
+        _, related = self.dependencies()
+
+        self.assertEqual(related, {
+            "train.py", "models/net.py", "models/__init__.py", "models/layers.py",
+            "models/blocks.py", "utils/__init__.py", "utils/helper.py",
+        })
+
+    def test_cache_reparses_only_changed_files(self):
+        first, _ = self.dependencies()
+        self.assertEqual(first.parsed_count, 7)
+
+        second, _ = self.dependencies()
+        self.assertEqual(second.parsed_count, 0)
+
+        self.write("models/blocks.py", "import extra\nBlock = object\n")
+        self.write("extra.py", "")
+        future = time.time() + 10
+        os.utime(self.root / "models" / "blocks.py", (future, future))
+        os.utime(self.root, (future, future))
+        third, related = self.dependencies()
+
+        self.assertEqual(third.parsed_count, 2)
+        self.assertIn("extra.py", related)
+
+    def test_cold_scan_parses_in_parallel(self):
+        with patch("labpilot.import_graph.os.cpu_count", return_value=4):
+            graph, related = self.dependencies(parallel_threshold=2)
+
+        self.assertEqual(len(related), 7)
+        self.assertEqual(graph.parsed_count, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import io
+import os
+import threading
+import unittest
+
+from labpilot.log_pump import LogPump
+
+
+class LogPumpTests(unittest.TestCase):
+    def _pump_bytes(self, data, **kwargs):
+        read_fd, write_fd = os.pipe()
+
+        def writer():
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(data)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        sink = io.BytesIO()
+        with os.fdopen(read_fd, "rb") as stream:
+            pump = LogPump(stream, sinks=[sink], echo=False, **kwargs)
+            lines = []
+            pump.add_line_handler(lines.append)
+            pump.run()
+        thread.join()
+        return pump, sink, lines
+
+    def test_pump_tees_full_output_and_keeps_bounded_tail(self):
+        data = b"".join(b"line %d\n" % i for i in range(50000))
+
+        pump, sink, lines = self._pump_bytes(data, chunk_size=4096, tail_bytes=1024)
+
+        self.assertEqual(sink.getvalue(), data)
+        self.assertEqual(pump.bytes_total, len(data))
+        self.assertLessEqual(len(pump.tail_text()), 1024)
+        self.assertTrue(pump.tail_text().endswith("line 49999\n"))
+        self.assertEqual(len(lines), 50000)
+        self.assertEqual(lines[-1], "line 49999")
+        self.assertGreater(pump.throughput_mbps(), 0)
+
+    def test_pump_flushes_trailing_partial_line_and_notes(self):
+        pump, sink, lines = self._pump_bytes("进度 99%".encode("utf-8"), chunk_size=3)
+        pump.write_note("\n实验超时\n")
+
+        self.assertEqual(lines, ["进度 99%"])
+        self.assertIn("实验超时", pump.tail_text())
+        self.assertTrue(sink.getvalue().endswith("实验超时\n".encode("utf-8")))
+
+
+if __name__ == "__main__":
+    unittest.main()
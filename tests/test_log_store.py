@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from labpilot.database import ExperimentDB
+from labpilot.log_store import LogStore
+
+
+class LogStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = ExperimentDB(os.path.join(self.temp_dir.name, "labpilot.db"))
+        self.store = LogStore(os.path.join(self.temp_dir.name, "logs"), self.db)
+        self.experiment_id = self.db.insert_experiment("python train.py")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_log(self, line_count, segment_bytes=16 * 1024):
+        data = b"".join(b"step %d loss=0.%06d\n" % (i, i) for i in range(1, line_count + 1))
+        writer = self.store.open_writer(self.experiment_id, segment_bytes=segment_bytes)
+        for offset in range(0, len(data), 1000):
+            writer.write(data[offset:offset + 1000])
+        writer.close()
+        return data, writer
+
+    def test_segments_are_compressed_and_indexed(self):
+        data, writer = self._write_log(20000)
+
+        segments = self.db.get_log_segments(self.experiment_id)
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(writer.raw_bytes, len(data))
+        self.assertEqual(self.store.total_lines(self.experiment_id), 20000)
+        self.assertGreater(writer.compression_ratio(), 3)
+        for previous, current in zip(segments, segments[1:]):
+            self.assertEqual(current["first_line"], previous["first_line"] + previous["line_count"])
+            self.assertEqual(current["byte_offset"], previous["byte_offset"] + previous["raw_bytes"])
+
+    def test_concurrent_writes_and_close_keep_every_segment(self):
+        # 转发线程未结束时主线程追加说明并关闭写入器（labrun 超时后的情形）
+        writer = self.store.open_writer(self.experiment_id, segment_bytes=4 * 1024)
+        line = b"x" * 99 + b"\n"
+
+        def write_lines():
+            for _ in range(2000):
+                writer.write(line)
+
+        threads = [threading.Thread(target=write_lines) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        writer.write(line)
+        for thread in threads:
+            thread.join()
+        writer.close()
+        writer.write(line)
+
+        segments = self.db.get_log_segments(self.experiment_id)
+        self.assertEqual([segment["seq"] for segment in segments], list(range(len(segments))))
+        self.assertEqual(self.store.total_lines(self.experiment_id), 8001)
+        self.assertEqual(writer.raw_bytes, 8001 * len(line))
+
+    def test_line_range_decompresses_only_covering_segments(self):
+        self._write_log(20000)
+
+        with patch.object(self.store, "_read_segment", wraps=self.store._read_segment) as read_segment:
+            lines = self.store.read_lines(self.experiment_id, 10000, 10010)
+
+        self.assertEqual(lines[0], "step 10000 loss=0.010000")
+        self.assertEqual(lines[-1], "step 10010 loss=0.010010")
+        self.assertEqual(len(lines), 11)
+        self.assertLessEqual(read_segment.call_count, 2)
+
+    def test_delete_removes_files_and_index(self):
+        self._write_log(100)
+
+        self.store.delete(self.experiment_id)
+
+        self.assertEqual(self.db.get_log_segments(self.experiment_id), [])
+        self.assertFalse(os.path.exists(self.store.experiment_dir(self.experiment_id)))
+
+
+if __name__ == "__main__":
+    unittest.main()
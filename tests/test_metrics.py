@@ -0,0 +1,62 @@
+import math
+import os
+import tempfile
+import unittest
+
+from labpilot.database import ExperimentDB
+from labpilot.metrics import MetricExtractor, lttb
+
+
+class MetricExtractorTests(unittest.TestCase):
+    def test_extracts_points_with_current_step_and_batches_them(self):
+        batches = []
+        extractor = MetricExtractor(sink=batches.append, batch_size=4)
+
+        extractor.feed_line("Epoch 1 step 10 loss=0.50 acc: 0.81")
+        extractor.feed_line("val_loss=9.9 (ignored)")
+        extractor.feed_line("step=20 loss: 2.5e-1 lr=1e-4")
+        extractor.feed_line("saving checkpoint")
+        extractor.flush()
+
+        points = [point for batch in batches for point in batch]
+        self.assertEqual(batches[0], [(10, "loss", 0.5), (10, "acc", 0.81), (20, "loss", 0.25), (20, "lr", 1e-4)])
+        self.assertEqual(len(points), 4)
+        self.assertEqual(extractor.latest["loss"], (20, 0.25))
+
+    def test_counts_occurrences_when_log_has_no_step(self):
+        extractor = MetricExtractor(patterns={"reward": r"reward\s*=\s*([-\d.]+)"})
+
+        first = extractor.feed_line("reward = 1.0")
+        second = extractor.feed_line("reward = -2.0")
+
+        self.assertEqual(first, [(0, "reward", 1.0)])
+        self.assertEqual(second, [(1, "reward", -2.0)])
+
+
+class DownsampleTests(unittest.TestCase):
+    def setUp(self):
+        self.points = [(i, math.sin(i / 50.0)) for i in range(10000)]
+
+    def test_lttb_keeps_endpoints_and_threshold(self):
+        sampled = lttb(self.points, 200)
+
+        self.assertEqual(len(sampled), 200)
+        self.assertEqual(sampled[0], self.points[0])
+        self.assertEqual(sampled[-1], self.points[-1])
+
+    def test_db_series_is_bucketed_in_sql(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = ExperimentDB(os.path.join(temp_dir, "labpilot.db"))
+            experiment_id = db.insert_experiment("python train.py")
+            db.insert_metrics(experiment_id, [(step, "loss", value) for step, value in self.points])
+
+            series = db.get_metric_series(experiment_id, "loss", buckets=100)
+
+            self.assertEqual(db.get_metric_names(experiment_id), {"loss": 10000})
+            self.assertLessEqual(len(series), 200)
+            self.assertEqual(series, sorted(series))
+            self.assertAlmostEqual(max(p[1] for p in series), max(p[1] for p in self.points))
+
+
+if __name__ == "__main__":
+    unittest.main()
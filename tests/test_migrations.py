@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from labpilot.database import ExperimentDB
+from labpilot.migrations import BASE_SCHEMA, SCHEMA_VERSION, backfill_timestamps, migrate, schema_version
+from labpilot.storage import get_storage
+
+
+def epoch_ms(iso):
+    return int(datetime.fromisoformat(iso).timestamp() * 1000)
+
+
+class MigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def create_legacy_db(self, rows):
+        """未引入迁移之前的数据库：只有基础表，user_version 为 0"""
+        conn = sqlite3.connect(self.path)
+        conn.executescript(BASE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO experiments (start_time, end_time, server, command, status) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.close()
+
+    def test_legacy_db_is_upgraded_and_backfilled(self):
+        base = datetime(2025, 3, 1, 12, 0, 0, 123456)
+        rows = [((base + timedelta(minutes=i)).isoformat(),
+                 (base + timedelta(minutes=i, seconds=30)).isoformat() if i % 2 else None,
+                 "gpu01", f"python train.py --seed {i}", "success")
+                for i in range(25)]
+        self.create_legacy_db(rows)
+
+        db = ExperimentDB(self.path)
+        db.backfill_thread.join(10)
+        self.assertEqual(schema_version(db.storage), SCHEMA_VERSION)
+
+        stored = db.storage.query("SELECT start_time, end_time, start_ts, end_ts FROM experiments ORDER BY id")
+        for start_time, end_time, start_ts, end_ts in stored:
+            self.assertAlmostEqual(start_ts, epoch_ms(start_time), delta=1)
+            if end_time is None:
+                self.assertIsNone(end_ts)
+            else:
+                self.assertAlmostEqual(end_ts, epoch_ms(end_time), delta=1)
+
+        self.assertEqual(db.get_experiments(limit=1)[0]["command"], "python train.py --seed 24")
+        # 再次打开不会重复迁移
+        self.assertEqual(migrate(db.storage), SCHEMA_VERSION)
+
+    def test_backfill_runs_in_batches_newest_first(self):
+        self.create_legacy_db([(f"2025-01-01T00:00:{i:02d}", None, "a", "cmd", "success") for i in range(10)])
+        storage = get_storage(self.path)
+        migrate(storage)
+        storage.execute("""
+            UPDATE experiments SET start_ts = NULL
+        """)
+
+        self.assertEqual(backfill_timestamps(storage, batch_size=3, pause=0), 10)
+        self.assertEqual(storage.query_one("SELECT COUNT(*) FROM experiments WHERE start_ts IS NULL")[0], 0)
+
+    def test_triggers_maintain_timestamps_for_any_writer(self):
+        db = ExperimentDB(self.path)
+        experiment_id = db.insert_experiment("python train.py")
+        row = db.get_experiment(experiment_id)
+        self.assertAlmostEqual(row["start_ts"], epoch_ms(row["start_time"]), delta=1)
+        self.assertIsNone(row["end_ts"])
+
+        end_time = datetime.now().isoformat()
+        db.update_experiment(experiment_id, end_time, 1.0, "success", "", 0)
+        self.assertAlmostEqual(db.get_experiment(experiment_id)["end_ts"], epoch_ms(end_time), delta=1)
+
+        # 不经过 ExperimentDB 的写入（如旧版本的 API）同样会得到时间戳
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO experiments (start_time, command) VALUES ('2025-05-05T10:00:00', 'x')")
+        conn.commit()
+        conn.close()
+        start_ts = db.storage.query_one("SELECT start_ts FROM experiments WHERE command = 'x'")[0]
+        self.assertEqual(start_ts, epoch_ms("2025-05-05T10:00:00"))
+
+    def test_filtered_list_uses_index_without_sorting(self):
+        db = ExperimentDB(self.path)
+        for column in ("status", "server"):
+            plan = " ".join(row[3] for row in db.storage.query(f"""
+                EXPLAIN QUERY PLAN
+                SELECT * FROM experiments WHERE {column} = ? ORDER BY start_ts DESC, id DESC LIMIT 50
+            """, ("x",)))
+            self.assertIn(f"idx_experiments_{column}_start", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
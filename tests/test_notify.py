@@ -1,11 +1,27 @@
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
 
-from labpilot.notify import FeishuNotifier, WeComNotifier, get_notifier
+from labpilot.notify import BaseNotifier, FeishuNotifier, MultiNotifier, WeComNotifier, get_notifier
+
+
+class FakeNotifier(BaseNotifier):
+    def __init__(self, name, delay=0.0, result=True):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.result = result
+        self.sent = threading.Event()
+
+    def send_notification(self, title, message, tags="", priority="default"):
+        time.sleep(self.delay)
+        self.sent.set()
+        return self.result
 
 
 class NotificationTests(unittest.TestCase):
-    @patch("labpilot.notify.requests.post")
+    @patch("labpilot.notify._post")
     def test_feishu_notifier_sends_interactive_card(self, post):
         post.return_value = Mock(json=lambda: {"code": 0})
         notifier = FeishuNotifier({
@@ -24,7 +40,7 @@ class NotificationTests(unittest.TestCase):
         self.assertEqual(kwargs["json"]["card"]["header"]["title"]["content"], "标题")
         self.assertEqual(kwargs["timeout"], 3)
 
-    @patch("labpilot.notify.requests.post")
+    @patch("labpilot.notify._post")
     def test_wecom_notifier_sends_markdown_message(self, post):
         post.return_value = Mock(json=lambda: {"errcode": 0})
         notifier = WeComNotifier({
@@ -58,6 +74,21 @@ class NotificationTests(unittest.TestCase):
 
         self.assertEqual(len(notifier.notifiers), 2)
 
+    def test_multi_notifier_sends_concurrently_within_deadline(self):
+        notifier = MultiNotifier({}, [
+            FakeNotifier("dingtalk", delay=0.3),
+            FakeNotifier("ntfy", delay=0.3, result=False),
+            FakeNotifier("feishu", delay=5),
+        ], deadline=0.6)
+
+        started = time.monotonic()
+        self.assertTrue(notifier.send_notification("标题", "内容"))
+        elapsed = time.monotonic() - started
+
+        # 串行发送至少需要 5.6s；并发时受 deadline 约束
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(notifier.last_results, {"dingtalk": True, "ntfy": False, "feishu": None})
+
 
 if __name__ == "__main__":
     unittest.main()
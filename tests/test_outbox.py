@@ -0,0 +1,147 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from labpilot.database import ExperimentDB
+from labpilot.notify import BaseNotifier, RateLimiter, TokenBucket, build_digest
+from labpilot import outbox as outbox_module
+from labpilot.outbox import OutboxNotifier, OutboxWorker, spawn_worker, worker_log_path
+
+
+class FlakyNotifier(BaseNotifier):
+    def __init__(self, name, failures=0):
+        super().__init__()
+        self.name = name
+        self.failures = failures
+        self.delivered = []
+        self.messages = []
+
+    def send_notification(self, title, message, tags="", priority="default"):
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.delivered.append(title)
+        self.messages.append(message)
+        return True
+
+
+class OutboxTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = ExperimentDB(os.path.join(self.temp_dir.name, "labpilot.db"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_notifications_are_queued_per_channel_and_deduplicated(self):
+        outbox = OutboxNotifier({}, self.db, ["dingtalk", "ntfy"])
+
+        outbox.event("1:start").send_start_notification("gpu01", "python train.py", "abcdef1")
+        outbox.event("1:start").send_start_notification("gpu01", "python train.py", "abcdef1")
+
+        self.assertEqual(self.db.get_outbox_stats()["pending"], 2)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        channel = FlakyNotifier("dingtalk", failures=1)
+        worker = OutboxWorker(self.db, {"dingtalk": channel}, base_delay=0.2)
+        OutboxNotifier({}, self.db, ["dingtalk"]).event("1:end").send_notification("结束", "ok")
+
+        self.assertEqual(worker.deliver_due(), 1)
+        # 退避期间不会被再次领取
+        self.assertEqual(worker.deliver_due(), 0)
+        self.assertEqual(self.db.get_outbox_stats()["pending"], 1)
+
+        time.sleep(0.3)
+        self.assertEqual(worker.deliver_due(), 1)
+        self.assertEqual(channel.delivered, ["结束"])
+        self.assertEqual(self.db.get_outbox_stats()["sent"], 1)
+
+    def test_delivery_gives_up_after_max_attempts(self):
+        worker = OutboxWorker(self.db, {"ntfy": FlakyNotifier("ntfy", failures=5)},
+                              base_delay=0, max_attempts=2)
+        OutboxNotifier({}, self.db, ["ntfy"]).send_notification("结束", "failed")
+
+        worker.run(exit_when_idle=True, poll_interval=0.01)
+
+        stats = self.db.get_outbox_stats()
+        self.assertEqual((stats["pending"], stats["failed"]), (0, 1))
+
+    def test_claimed_rows_are_not_handed_to_a_second_worker(self):
+        OutboxNotifier({}, self.db, ["dingtalk"]).send_notification("开始", "run")
+
+        first = self.db.claim_notifications()
+        second = self.db.claim_notifications()
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+
+    def test_spawned_worker_output_goes_to_log_next_to_db(self):
+        # 用一个只往 stderr 输出的脚本代替解释器，模拟投递进程启动即失败
+        fake_python = os.path.join(self.temp_dir.name, "python")
+        with open(fake_python, "w") as f:
+            f.write("#!/bin/sh\necho 'No module named labpilot' >&2\nexit 1\n")
+        os.chmod(fake_python, os.stat(fake_python).st_mode | stat.S_IEXEC)
+
+        with patch.object(outbox_module.sys, "executable", fake_python):
+            process = spawn_worker(self.db.db_path)
+        process.wait(timeout=10)
+
+        with open(worker_log_path(self.db.db_path)) as f:
+            self.assertIn("No module named labpilot", f.read())
+
+
+    def test_token_bucket_limits_burst_and_refills(self):
+        bucket = TokenBucket(20)
+        tokens, updated_at = None, 0.0
+        for _ in range(10):
+            tokens, wait = bucket.take(tokens, updated_at, 0.0)
+            self.assertEqual(wait, 0.0)
+        tokens, wait = bucket.take(tokens, updated_at, 0.0)
+        # 突发 10 条后按每分钟 10 条补充，需等待 6 秒
+        self.assertAlmostEqual(wait, 6.0)
+        self.assertEqual(bucket.take(tokens, 0.0, 6.0)[1], 0.0)
+
+    def test_over_budget_notifications_are_coalesced_into_a_digest(self):
+        channel = FlakyNotifier("dingtalk")
+        limiter = RateLimiter(self.db, {"dingtalk": TokenBucket(4, burst=2)})
+        worker = OutboxWorker(self.db, {"dingtalk": channel}, rate_limiter=limiter, digest_interval=0.05)
+        outbox = OutboxNotifier({}, self.db, ["dingtalk"])
+        for run in range(6):
+            outbox.event(f"{run}:end")
+            if run == 5:
+                outbox.send_failure_notification("gpu01", f"python train.py --seed {run}", "abcdef1", 1, "1m")
+            else:
+                outbox.send_success_notification("gpu01", f"python train.py --seed {run}", "abcdef1", "1m")
+
+        worker.deliver_due()
+        self.assertEqual(len(channel.delivered), 2)
+        self.assertEqual(self.db.get_outbox_stats()["digest"], 4)
+
+        # 配额恢复后，暂存的 4 条合并为一条汇总消息
+        limiter.buckets["dingtalk"] = TokenBucket(600, burst=1)
+        time.sleep(0.2)
+        worker.deliver_due()
+
+        self.assertEqual(len(channel.delivered), 3)
+        self.assertIn("4 个实验结束: 3 成功, 1 失败", channel.messages[-1])
+        stats = self.db.get_outbox_stats()
+        self.assertEqual((stats["sent"], stats["pending"]), (6, 0))
+
+    def test_digest_lists_items_and_raises_priority_on_failure(self):
+        rows = [{"title": "✅ 实验成功", "message": f"[gpu01] run {i}", "tags": "white_check_mark"}
+                for i in range(12)]
+        rows.append({"title": "❌ 实验失败", "message": "[gpu01] run 12", "tags": "x"})
+
+        title, message, _, priority = build_digest(rows)
+
+        self.assertEqual(title, "📬 通知汇总 (13 条)")
+        self.assertTrue(message.startswith("13 个实验结束: 12 成功, 1 失败"))
+        self.assertIn("以及其他 3 条", message)
+        self.assertEqual(priority, "high")
+
+
+if __name__ == "__main__":
+    unittest.main()
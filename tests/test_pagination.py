@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.pagination import decode_cursor, encode_cursor
+from labpilot.storage import get_storage
+
+
+class PaginationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.db = ExperimentDB(self.path)
+        patcher = patch.object(main, "_experiment_db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # 多个实验在同一毫秒开始，由 id 决定顺序
+        self.db.storage.executemany(
+            "INSERT INTO experiments (start_time, command, status) VALUES (?, ?, ?)",
+            [(f"2025-01-01T00:00:{i // 3:02d}", f"python train.py --seed {i}",
+              "failed" if i % 2 else "success") for i in range(20)],
+        )
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def list_page(self, **kwargs):
+        response = TestClient(main.app).get("/experiments", params=kwargs)
+        if response.status_code != 200:
+            raise ValueError(response.status_code)
+        return [row["id"] for row in response.json()], response.headers.get("X-Next-Cursor")
+
+    def walk(self, **kwargs):
+        ids, cursor = self.list_page(**kwargs)
+        pages = [ids]
+        while cursor:
+            ids, cursor = self.list_page(cursor=cursor, **kwargs)
+            pages.append(ids)
+        return pages
+
+    def test_cursor_pages_match_offset_order(self):
+        everything, _ = self.list_page()
+        self.assertEqual(everything, list(range(20, 0, -1)))
+
+        pages = self.walk(limit=6)
+        self.assertEqual([len(page) for page in pages], [6, 6, 6, 2])
+        self.assertEqual(sum(pages, []), everything)
+
+        failed = sum(self.walk(limit=4, status="failed"), [])
+        self.assertEqual(failed, [i for i in everything if i % 2 == 0])
+
+        self.assertEqual(self.list_page(skip=6, limit=6)[0], pages[1])
+
+    def test_pages_stay_stable_under_concurrent_inserts(self):
+        first, cursor = self.list_page(limit=5)
+        self.db.insert_experiment("python train.py --new")
+        second, _ = self.list_page(limit=5, cursor=cursor)
+        self.assertEqual(second, list(range(15, 10, -1)))
+
+    def test_db_cursor_and_search_offset_cursor(self):
+        rows = self.db.get_experiments(limit=3)
+        cursor = encode_cursor({'t': rows[-1]['start_ts'], 'i': rows[-1]['id']})
+        self.assertEqual([row['id'] for row in self.db.get_experiments(limit=3, cursor=cursor)], [17, 16, 15])
+
+        pages = self.walk(limit=8, search="train")
+        self.assertEqual(sorted(sum(pages, [])), list(range(1, 21)))
+        self.assertEqual(decode_cursor(self.list_page(limit=8, search="train")[1]), {'o': 8})
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ("not-base64!", encode_cursor({'t': "x", 'i': 1}), encode_cursor([1, 2])):
+            with self.assertRaises(ValueError) as context:
+                self.list_page(cursor=cursor)
+            self.assertEqual(context.exception.args[0], 400)
+        with self.assertRaises(ValueError):
+            self.list_page(cursor=encode_cursor({'o': 5}))
+        with self.assertRaises(ValueError):
+            self.db.get_experiments(cursor=encode_cursor({'o': 5}))
+
+
+if __name__ == "__main__":
+    unittest.main()
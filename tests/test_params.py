@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.migrations import BASE_SCHEMA, backfill_params
+from labpilot import params as params_module
+from labpilot.params import filter_condition, filter_conditions, parse_command, parse_filter
+from labpilot.storage import get_storage
+
+
+class ParseTests(unittest.TestCase):
+    def test_options_flags_and_positionals_are_typed(self):
+        params = dict(parse_command(
+            "torchrun --nproc_per_node 8 train.py configs/base.yaml --lr=1e-4 --batch-size 64 "
+            "--offset -1 --amp --optimizer adamw --resume false -- extra"
+        ))
+        self.assertEqual(params, {
+            "arg0": "configs/base.yaml", "lr": 1e-4, "batch_size": 64, "offset": -1, "amp": True,
+            "optimizer": "adamw", "resume": False, "arg1": "extra",
+        })
+        self.assertNotIn("nproc_per_node", params)
+
+    def test_module_invocation_and_last_value_wins(self):
+        self.assertEqual(parse_command("python -u -m pkg.train --seed 1 --seed 2 'a b'"),
+                         [("seed", 2), ("arg0", "a b")])
+        self.assertEqual(parse_command("./train --epochs 10"), [("epochs", 10)])
+
+    def test_filters(self):
+        self.assertEqual(parse_filter("batch-size >= 64"), ("batch_size", ">=", 64))
+        self.assertEqual(filter_condition("optimizer!=sgd")[1], ["optimizer", "sgd"])
+        for expression in ("lr", "lr=", "=1", "lr~1"):
+            with self.assertRaises(ValueError):
+                parse_filter(expression)
+
+
+class ParamStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def test_api_filters_use_param_indexes(self):
+        db = ExperimentDB(self.path)
+        runs = {
+            "a": db.insert_experiment("python train.py --lr 1e-4 --batch_size 32"),
+            "b": db.insert_experiment("python train.py --lr 0.0001 --batch_size 128 --optimizer sgd"),
+            "c": db.insert_experiment("python train.py --lr 3e-4 --batch_size 64 --optimizer adamw"),
+        }
+        self.assertEqual(db.get_params(runs["b"]), {"lr": 1e-4, "batch_size": 128, "optimizer": "sgd"})
+
+        with patch.object(main, "_experiment_db", db):
+            client = TestClient(main.app)
+
+            def ids(*filters):
+                response = client.get("/experiments", params=[("param", f) for f in filters])
+                self.assertEqual(response.status_code, 200, response.text)
+                return sorted(row["id"] for row in response.json())
+
+            self.assertEqual(ids("lr=1e-4"), [runs["a"], runs["b"]])
+            self.assertEqual(ids("lr=1e-4", "batch_size>=64"), [runs["b"]])
+            self.assertEqual(ids("lr<2e-4", "optimizer=sgd"), [runs["b"]])
+            self.assertEqual(ids("optimizer!=sgd"), [runs["c"]])
+            self.assertEqual(client.get("/experiments", params={"param": "lr"}).status_code, 400)
+            self.assertEqual(client.get(f"/experiments/{runs['c']}/params").json()["params"]["optimizer"], "adamw")
+
+            created = client.post("/experiments", json={"command": "python eval.py --batch_size 256"}).json()
+            self.assertEqual(ids("batch_size>128"), [created["id"]])
+
+        self.assertEqual([row["id"] for row in db.get_experiments(param_filters=["batch_size>=64", "lr>=1e-4"])],
+                         [runs["c"], runs["b"]])
+
+        plan = " ".join(row[3] for row in db.storage.query(
+            "EXPLAIN QUERY PLAN SELECT id FROM experiments WHERE " + filter_condition("batch_size>=64")[0],
+            filter_condition("batch_size>=64")[1]))
+        self.assertIn("idx_experiment_params_num", plan)
+
+        # 宽泛的条件沿 start_ts 索引逐条检查，最有选择性的条件驱动查询
+        with patch.object(params_module, "SELECTIVE_MATCHES", 2):
+            conditions, values = filter_conditions(db.storage, ["lr=1e-4", "optimizer=sgd"])
+            self.assertEqual(values, ["lr", 1e-4, "optimizer", "sgd"])
+            self.assertTrue(conditions[0].startswith("EXISTS"))
+            self.assertIn(" IN (", conditions[1])
+            self.assertEqual([row["id"] for row in db.get_experiments(param_filters=["lr=1e-4"])],
+                             [runs["b"], runs["a"]])
+
+        db.delete_experiment(runs["a"])
+        self.assertEqual(db.get_params(runs["a"]), {})
+
+    def test_existing_experiments_are_backfilled_newest_first(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(BASE_SCHEMA)
+        conn.executemany("INSERT INTO experiments (start_time, command) VALUES ('2025-01-01T00:00:00', ?)",
+                         [(f"python train.py --seed {i}",) for i in range(25)])
+        conn.commit()
+        conn.close()
+
+        db = ExperimentDB(self.path)
+        db.backfill_thread.join(10)
+        self.assertEqual(db.get_params(25), {"seed": 24})
+        self.assertEqual(db.storage.query_one("SELECT COUNT(*) FROM experiment_params")[0], 25)
+        self.assertIsNone(db.storage.query_one("SELECT value FROM schema_meta WHERE key = 'params_backfill_before'"))
+        self.assertEqual(backfill_params(db.storage), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
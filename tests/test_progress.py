@@ -0,0 +1,90 @@
+import unittest
+
+from labpilot.notify import BaseNotifier
+from labpilot.progress import ProgressReporter
+
+
+class RecordingNotifier(BaseNotifier):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send_notification(self, title, message, tags="", priority="default"):
+        self.sent.append((title, message, priority))
+        return True
+
+
+class ProgressReporterTests(unittest.TestCase):
+    def make_reporter(self, **kwargs):
+        self.snapshots = []
+        self.now = 0.0
+        self.output = ""
+        kwargs.setdefault("tail", lambda: self.output)
+        kwargs.setdefault("interval", 0)
+        kwargs.setdefault("min_interval", 60)
+        return ProgressReporter(self.snapshots.append, clock=lambda: self.now, **kwargs)
+
+    def test_epoch_milestones_are_detected_from_output(self):
+        reporter = self.make_reporter()
+        reporter.observe("Epoch [2/40] loss=0.6\nEpoch [3/40] loss=0.5\nstep 100 loss=0.4\n")
+
+        self.assertEqual(reporter.epoch, 3)
+        self.assertEqual(reporter.milestone(), 0)
+        self.assertEqual(reporter.progress_text(), "Epoch 3/40 (8%)")
+
+        reporter.observe("epoch: 13 of 40")
+        self.assertEqual(reporter.milestone(), 3)
+        # 尾部中没有 epoch 输出时保留之前的值
+        reporter.observe("step 200 loss=0.3")
+        self.assertEqual(reporter.epoch, 13)
+
+    def test_milestones_are_throttled_and_merged(self):
+        reporter = self.make_reporter(min_interval=600)
+        self.output = "Epoch 1/10\n"
+
+        self.assertFalse(reporter.poll(100))
+        self.output = "Epoch 2/10\n"
+        # 未到最短间隔
+        self.assertFalse(reporter.poll(300))
+
+        self.output = "Epoch 4/10\n"
+        self.assertTrue(reporter.poll(700))
+        self.assertEqual(self.snapshots[-1]["progress"], "Epoch 4/10 (40%)")
+        # 期间越过的 10%~40% 合并为一次通知，不会补发
+        self.assertFalse(reporter.poll(1400))
+
+        self.output = "Epoch 10/10\n"
+        # 100% 由结束通知报告
+        self.assertFalse(reporter.poll(2000))
+        self.assertEqual(len(self.snapshots), 1)
+
+    def test_interval_cadence_without_epochs(self):
+        reporter = self.make_reporter(interval=3600, tail=lambda: "a\n\nb\nc\n", tail_lines=2,
+                                      metrics=lambda: {"loss": 0.25})
+
+        self.assertFalse(reporter.poll(3000))
+        self.assertTrue(reporter.poll(3600))
+        self.assertFalse(reporter.poll(5000))
+        self.assertTrue(reporter.poll(7300))
+
+        snapshot = self.snapshots[-1]
+        self.assertEqual(snapshot["seq"], 2)
+        self.assertEqual(snapshot["elapsed"], "2h 1m 40s")
+        self.assertEqual(snapshot["tail"], "b\nc")
+        self.assertEqual(snapshot["metrics"], {"loss": 0.25})
+
+    def test_progress_notification_message(self):
+        notifier = RecordingNotifier()
+        notifier.send_progress_notification("gpu01", "python train.py", "abcdef123", "1h 0m 0s",
+                                            "Epoch 4/10 (40%)", {"loss": 0.123456}, "last line")
+
+        title, message, priority = notifier.sent[0]
+        self.assertEqual(title, "📈 实验进行中")
+        self.assertIn("Progress: Epoch 4/10 (40%)", message)
+        self.assertIn("Metrics: loss=0.1235", message)
+        self.assertTrue(message.endswith("last line"))
+        self.assertEqual(priority, "low")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from labpilot.gpu_monitor import FakeBackend, GPUInfo, GPUMonitor
+from labpilot.scheduler import SchedulerClient, SchedulerDaemon
+
+
+def gpu(index, free):
+    return GPUInfo(index, free, 24576, 0)
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "scheduler.sock")
+        self.backend = FakeBackend([gpu(0, 20000), gpu(1, 1000)])
+        self.daemon = SchedulerDaemon(GPUMonitor(self.backend), self.socket_path)
+        self.daemon.start()
+
+    def tearDown(self):
+        self.daemon.stop()
+        self.temp_dir.cleanup()
+
+    def acquire_async(self, client, results, **kwargs):
+        thread = threading.Thread(target=lambda: results.append(client.acquire(12 * 1024, **kwargs)))
+        thread.start()
+        return thread
+
+    def test_free_gpu_is_leased_to_only_one_client(self):
+        first, second = SchedulerClient(self.socket_path), SchedulerClient(self.socket_path)
+        results = []
+
+        self.assertEqual(first.acquire(12 * 1024), 0)
+        thread = self.acquire_async(second, results)
+        time.sleep(0.2)
+
+        # GPU 0 仍显示空闲，但已被租出，第二个客户端必须继续排队
+        self.assertEqual(results, [])
+        self.assertEqual(len(self.daemon.status()["queue"]), 1)
+
+        first.release()
+        thread.join(timeout=2)
+        self.assertEqual(results, [0])
+        second.release()
+
+    def test_lease_is_released_when_client_disconnects(self):
+        first = SchedulerClient(self.socket_path)
+        first.acquire(12 * 1024)
+
+        # 模拟 labrun 进程退出：不发送 release，直接关闭连接
+        first._reader.close()
+        first._conn.close()
+        time.sleep(0.2)
+
+        self.assertEqual(self.daemon.status()["leases"], [])
+
+    def test_higher_priority_job_is_served_first(self):
+        holder = SchedulerClient(self.socket_path)
+        holder.acquire(12 * 1024)
+        low, high = SchedulerClient(self.socket_path), SchedulerClient(self.socket_path)
+        low_results, high_results = [], []
+        low_thread = self.acquire_async(low, low_results, priority=0)
+        time.sleep(0.1)
+        high_thread = self.acquire_async(high, high_results, priority=10)
+        time.sleep(0.1)
+
+        holder.release()
+        high_thread.join(timeout=2)
+
+        self.assertEqual(high_results, [0])
+        self.assertEqual(low_results, [])
+
+        self.backend.set_gpus([gpu(0, 20000), gpu(1, 20000)])
+        low_thread.join(timeout=2)
+        self.assertEqual(low_results, [1])
+        low.release()
+        high.release()
+
+    def test_small_job_does_not_overtake_blocked_high_priority_job(self):
+        # 一块 48 GB 的 GPU：回收后最近的样本仍显示旧任务占用的显存
+        self.daemon.stop()
+        total = 48 * 1024
+        self.backend = FakeBackend([GPUInfo(0, total - 1024, total, 0)])
+        self.daemon = SchedulerDaemon(GPUMonitor(self.backend), self.socket_path)
+        self.daemon.start()
+
+        holder = SchedulerClient(self.socket_path)
+        self.assertEqual(holder.acquire(30 * 1024), 0)
+        self.backend.set_gpus([GPUInfo(0, total - 31 * 1024, total, 0)])
+
+        big, small = SchedulerClient(self.socket_path), SchedulerClient(self.socket_path)
+        big_results, small_results = [], []
+        big_thread = threading.Thread(target=lambda: big_results.append(big.acquire(40 * 1024, priority=10)),
+                                      daemon=True)
+        small_thread = threading.Thread(target=lambda: small_results.append(small.acquire(2 * 1024)),
+                                        daemon=True)
+        big_thread.start()
+        time.sleep(0.1)
+        small_thread.start()
+        time.sleep(0.1)
+
+        holder.release()
+        time.sleep(0.2)
+        self.assertEqual((big_results, small_results), ([], []))
+
+        # 回收后的新样本到达，高优先级的大任务拿到这块卡
+        self.backend.set_gpus([GPUInfo(0, total - 1024, total, 0)])
+        big_thread.join(timeout=2)
+        self.assertEqual((big_results, small_results), ([0], []))
+
+        big.release()
+        small_thread.join(timeout=2)
+        self.assertEqual(small_results, [0])
+        small.release()
+
+    def test_job_larger_than_any_gpu_does_not_block_queue(self):
+        huge, small = SchedulerClient(self.socket_path), SchedulerClient(self.socket_path)
+        errors = []
+
+        def wait_forever():
+            try:
+                huge.acquire(64 * 1024, priority=10)
+            except ConnectionError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=wait_forever, daemon=True)
+        thread.start()
+        time.sleep(0.1)
+
+        # 没有任何 GPU 放得下的任务不会挡住后面的任务
+        self.assertEqual(small.acquire(12 * 1024), 0)
+        self.assertEqual(len(self.daemon.status()["queue"]), 1)
+        small.release()
+
+        huge._conn.shutdown(socket.SHUT_RDWR)
+        thread.join(timeout=2)
+        huge.release()
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
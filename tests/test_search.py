@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.migrations import backfill_fts
+from labpilot import search as search_module
+from labpilot.search import match_query
+from labpilot.storage import get_storage
+
+
+class MatchQueryTests(unittest.TestCase):
+    def test_terms_become_prefix_phrases(self):
+        self.assertEqual(match_query("resnet lr=0.01"), '"resnet"* "lr=0.01"*')
+
+    def test_fts_syntax_is_treated_as_text(self):
+        self.assertEqual(match_query('a"b OR'), '"a""b"* "OR"*')
+        self.assertIsNone(match_query("  -- () "))
+
+
+class SearchTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.db = ExperimentDB(self.path)
+        patcher = patch.object(main, "_experiment_db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def search(self, text, **filters):
+        response = TestClient(main.app).get("/experiments", params={"search": text, **filters})
+        self.assertEqual(response.status_code, 200, response.text)
+        return [row["id"] for row in response.json()]
+
+    def test_ranked_prefix_search_follows_updates_and_deletes(self):
+        in_command = self.db.insert_experiment("python train.py --model resnet50")
+        in_log = self.db.insert_experiment("python train.py --model vit")
+        self.db.update_experiment(in_log, "2025-01-01T00:00:00", 1.0, "failed",
+                                  "loading resnet weights failed", 1)
+        other = self.db.insert_experiment("python eval.py", commit_message="修复数据加载")
+
+        # 命令中的命中排在日志片段中的命中之前
+        self.assertEqual(self.search("resn"), [in_command, in_log])
+        self.assertEqual(self.search("resnet", status="failed"), [in_log])
+        self.assertEqual(self.search("train resnet50"), [in_command])
+        self.assertEqual(self.search("修复"), [other])
+        self.assertEqual(self.search("--"), [])
+
+        self.db.update_experiment(in_log, "2025-01-01T00:00:00", 1.0, "failed", "cuda oom", 1)
+        self.assertEqual(self.search("resnet"), [in_command])
+        self.db.delete_experiment(in_command)
+        self.assertEqual(self.search("resnet"), [])
+        # 索引与 experiments 表内容一致
+        self.db.storage.execute("INSERT INTO experiments_fts (experiments_fts) VALUES ('integrity-check')")
+
+    def test_filters_apply_before_candidate_window_and_pages_reach_older_matches(self):
+        self.db.storage.executemany(
+            "INSERT INTO experiments (start_time, command, status) VALUES (?, ?, ?)",
+            [("2025-01-01T00:00:00", f"python train.py --seed {i}", "failed" if i < 5 else "success")
+             for i in range(25)],
+        )
+        client = TestClient(main.app)
+        with patch.object(search_module, "SEARCH_CANDIDATES", 10):
+            # 失败的实验都比最近 10 条命中更早
+            self.assertEqual(sorted(self.search("train", status="failed")), [1, 2, 3, 4, 5])
+
+            seen = []
+            params = {"search": "train", "limit": 4}
+            while True:
+                response = client.get("/experiments", params=params)
+                seen.extend(row["id"] for row in response.json())
+                if "X-Next-Cursor" not in response.headers:
+                    break
+                params["cursor"] = response.headers["X-Next-Cursor"]
+            self.assertEqual(sorted(seen), list(range(1, 26)))
+            self.assertEqual(len(client.get("/experiments", params={"search": "train", "skip": 20}).json()), 5)
+
+    def test_migration_indexes_existing_rows(self):
+        get_storage(self.path).close_all()
+        conn = sqlite3.connect(self.path)
+        for name in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER experiments_fts_{name}")
+        conn.execute("DROP TABLE experiments_fts")
+        conn.execute("INSERT INTO experiments (start_time, command, status) VALUES ('2025-01-01T00:00:00', 'python legacy_run.py', 'success')")
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+
+        db = ExperimentDB(self.path)
+        if db.backfill_thread is not None:
+            db.backfill_thread.join(10)
+        self.assertEqual(len(self.search("legacy_run")), 1)
+        self.assertIsNone(db.storage.query_one("SELECT 1 FROM schema_meta WHERE key = 'fts_backfill_before'"))
+        db.storage.execute("INSERT INTO experiments_fts (experiments_fts) VALUES ('integrity-check')")
+
+    def test_rows_changed_before_backfill_stay_consistent(self):
+        ids = [self.db.insert_experiment(f"python old_{i}.py") for i in range(4)]
+        # 模拟迁移刚完成：已有实验尚未建立索引
+        self.db.storage.execute("INSERT INTO experiments_fts (experiments_fts) VALUES ('delete-all')")
+        self.db.storage.execute("INSERT INTO schema_meta (key, value) VALUES ('fts_backfill_before', ?)", (ids[-1] + 1,))
+        new = self.db.insert_experiment("python old_new.py")
+        self.assertEqual(self.search("old_1"), [])
+        self.assertEqual(self.search("old_new"), [new])
+
+        self.db.delete_experiment(ids[0])
+        self.db.storage.execute("UPDATE experiments SET command = 'python renamed.py' WHERE id = ?", (ids[1],))
+        self.assertEqual(backfill_fts(self.db.storage, batch_size=2, pause=0), 3)
+
+        self.assertEqual(self.search("renamed"), [ids[1]])
+        self.assertEqual(self.search("old_0"), [])
+        self.assertEqual(sorted(self.search("old_2") + self.search("old_3")), ids[2:])
+        self.db.storage.execute("INSERT INTO experiments_fts (experiments_fts) VALUES ('integrity-check')")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import main
+from labpilot.database import ExperimentDB
+from labpilot.migrations import RESET_STATS, backfill_stats
+from labpilot.storage import get_storage
+
+
+class StatsTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.db = ExperimentDB(self.path)
+
+    def tearDown(self):
+        get_storage(self.path).close_all()
+        self.temp_dir.cleanup()
+
+    def scanned_stats(self):
+        """旧实现：每次全表扫描"""
+        storage = self.db.storage
+        cutoff = (datetime.now() - timedelta(days=1)).isoformat()
+        return {
+            'total_experiments': storage.query_one("SELECT COUNT(*) FROM experiments")[0],
+            'status_counts': dict(storage.query("SELECT status, COUNT(*) FROM experiments GROUP BY status")),
+            'server_counts': dict(storage.query(
+                "SELECT server, COUNT(*) FROM experiments WHERE server IS NOT NULL GROUP BY server")),
+            'recent_experiments': storage.query_one(
+                "SELECT COUNT(*) FROM experiments WHERE start_time >= ?", (cutoff,))[0],
+        }
+
+    def populate(self):
+        now = datetime.now()
+        rows = [((now - timedelta(hours=hours, minutes=7)).isoformat(), f"gpu{hours % 3}", "cmd",
+                 ["success", "failed", None][hours % 3]) for hours in range(0, 60, 2)]
+        self.db.storage.executemany(
+            "INSERT INTO experiments (start_time, server, command, status) VALUES (?, ?, ?, ?)", rows)
+
+    def test_rollup_follows_inserts_updates_and_deletes(self):
+        self.populate()
+        self.assertEqual(self.db.get_stats(), self.scanned_stats())
+
+        experiment_id = self.db.insert_experiment("python train.py", status="queued")
+        self.db.start_experiment(experiment_id)
+        self.db.update_experiment(experiment_id, datetime.now().isoformat(), 1.0, "success", "", 0)
+        self.db.storage.execute("UPDATE experiments SET server = 'gpu9' WHERE id = 1")
+        self.db.delete_experiment(2)
+        self.assertEqual(self.db.get_stats(), self.scanned_stats())
+        self.assertEqual(self.db.storage.query_one(
+            "SELECT COUNT(*) FROM experiment_stats WHERE count <= 0")[0], 0)
+
+    def test_rebuild_repairs_drifted_rollup(self):
+        self.populate()
+        expected = self.db.get_stats()
+        conn = sqlite3.connect(self.path)
+        conn.execute("UPDATE experiment_stats_hourly SET count = count + 5")
+        conn.commit()
+        conn.close()
+        self.assertNotEqual(self.db.get_stats(), expected)
+
+        self.assertGreater(self.db.rebuild_stats(), 0)
+        self.assertEqual(self.db.get_stats(), expected)
+
+    def test_rows_changed_during_batched_rebuild_are_counted_once(self):
+        self.populate()
+        expected = self.scanned_stats()
+        self.db.storage.write(lambda conn: [conn.execute(statement) for statement in RESET_STATS])
+        self.assertEqual(self.db.get_stats()['total_experiments'], 0)
+
+        # 重建尚未处理到的实验被修改或删除，新实验由触发器直接计入
+        self.db.storage.execute("UPDATE experiments SET status = 'failed', server = 'gpu7' WHERE id = 3")
+        self.db.delete_experiment(4)
+        self.db.insert_experiment("python train.py", status="queued")
+        self.assertEqual(backfill_stats(self.db.storage, batch_size=7, pause=0), 29)
+        self.assertEqual(self.db.get_stats(), self.scanned_stats())
+        self.assertEqual(self.db.get_stats()['total_experiments'], expected['total_experiments'])
+
+    def test_stats_route_is_not_captured_by_experiment_route(self):
+        self.populate()
+        with patch.object(main, "_experiment_db", self.db):
+            response = TestClient(main.app).get("/experiments/stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_experiments"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from labpilot.database import ExperimentDB
+from labpilot.storage import Storage, get_storage
+
+
+class StorageTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "labpilot.db")
+        self.storage = Storage(self.path, busy_timeout=0.05, busy_retries=8)
+        self.storage.executescript("CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v TEXT)")
+
+    def tearDown(self):
+        self.storage.close_all()
+        self.temp_dir.cleanup()
+
+    def test_connections_use_wal_and_are_reused_per_thread(self):
+        conn = self.storage.connection()
+        self.assertIs(self.storage.connection(), conn)
+        self.assertEqual(self.storage.query_one("PRAGMA journal_mode")[0], "wal")
+        # NORMAL = 1
+        self.assertEqual(self.storage.query_one("PRAGMA synchronous")[0], 1)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.storage.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_open_reader_does_not_block_writer(self):
+        self.storage.execute("INSERT INTO t (v) VALUES ('a')")
+        reader = sqlite3.connect(self.path)
+        reader.execute("BEGIN")
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+
+        self.storage.execute("INSERT INTO t (v) VALUES ('b')")
+
+        # 读事务看到的是开始时的快照
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+        reader.close()
+        self.assertEqual(self.storage.query_one("SELECT COUNT(*) FROM t")[0], 2)
+
+    def test_write_is_retried_while_another_process_holds_the_lock(self):
+        holder = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+        timer = threading.Timer(0.2, lambda: holder.execute("COMMIT"))
+        timer.start()
+        try:
+            cursor = self.storage.execute("INSERT INTO t (v) VALUES ('c')")
+        finally:
+            timer.join()
+            holder.close()
+
+        self.assertEqual(cursor.rowcount, 1)
+        self.assertGreater(self.storage.busy_retry_count, 0)
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction() as conn:
+                conn.execute("INSERT INTO t (v) VALUES ('d')")
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.storage.query("SELECT v FROM t"), [])
+
+    def test_experiment_db_shares_storage_per_file(self):
+        first = ExperimentDB(self.path)
+        second = ExperimentDB(self.path)
+        self.assertIs(first.storage, second.storage)
+        self.assertIs(first.storage, get_storage(self.path))
+
+        experiment_id = first.insert_experiment("python train.py", "abc123")
+        self.assertEqual(second.get_experiment(experiment_id)["command"], "python train.py")
+        first.storage.close_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
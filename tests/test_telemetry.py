@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from labpilot.database import ExperimentDB
+from labpilot.gpu_monitor import FakeBackend, GPUInfo, GPUMonitor
+from labpilot.telemetry import TelemetrySampler, decode_chunk, encode_chunk, visible_gpu_indices
+
+
+class TelemetryEncodingTests(unittest.TestCase):
+    def test_delta_encoding_round_trips_and_is_compact(self):
+        columns = [
+            [1700000000000 + i * 5000 for i in range(600)],
+            [(i * 37) % 1000 for i in range(600)],
+            [2048 + i // 10 for i in range(600)],
+        ]
+
+        data = encode_chunk(columns)
+
+        self.assertEqual(decode_chunk(data, 3, 600), columns)
+        self.assertLess(len(data), 600 * 3 * 8 // 4)
+
+    def test_visible_gpu_indices(self):
+        self.assertIsNone(visible_gpu_indices({}))
+        self.assertEqual(visible_gpu_indices({"CUDA_VISIBLE_DEVICES": "2, 3"}), [2, 3])
+
+
+class TelemetrySamplerTests(unittest.TestCase):
+    def test_sampler_records_process_tree_and_visible_gpus(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = ExperimentDB(os.path.join(temp_dir, "labpilot.db"))
+            experiment_id = db.insert_experiment("python -c busy")
+            process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(1)"])
+            backend = FakeBackend([GPUInfo(0, 1000, 24576, 99), GPUInfo(1, 20000, 24576, 40)])
+            sampler = TelemetrySampler(
+                process.pid,
+                sink=lambda *chunk: db.insert_telemetry_chunk(experiment_id, *chunk),
+                gpu_monitor=GPUMonitor(backend),
+                gpu_indices=[1],
+                interval=0.05,
+                chunk_samples=4,
+            )
+
+            sampler.start()
+            time.sleep(0.5)
+            sampler.stop()
+            process.wait()
+
+            series = db.get_telemetry(experiment_id)
+            self.assertGreater(sampler.chunk_count, 1)
+            self.assertEqual(len(series["time_ms"]), sampler.sample_count)
+            self.assertGreater(max(series["rss_mb"]), 0)
+            self.assertEqual(set(series["gpu1_util"]), {40})
+            self.assertNotIn("gpu0_util", series)
+            self.assertLess(sampler.overhead(), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()